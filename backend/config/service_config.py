@@ -0,0 +1,144 @@
+"""
+服务运行配置
+后端服务的缓存、并发等运行参数（runtime_config.py 由 quick_setup.py 生成，这里存放不随模型切换变化的参数）
+"""
+
+# 标准化服务注册表配置
+STD_REGISTRY_CONFIG = {
+    "max_size": 4,  # 最多同时保留的 StdService 实例数量（每个实例持有一个嵌入模型和一个 Milvus 连接）
+}
+
+# 向量检索后端配置
+VECTOR_BACKEND_CONFIG = {
+    "default_backend": "milvus",  # milvus: Milvus Lite 检索; numpy: 进程内精确检索（需先运行 tools/export_numpy_index.py）
+    "numpy_mmap": True,  # 以内存映射方式加载 .npy 向量文件，多个进程可共享页缓存
+    "quantization": "none",  # numpy 后端的向量压缩方式: none / int8 / binary（压缩后用 float 向量重排）
+    "rescore_multiplier": 8,  # 压缩模式下候选数量相对 limit 的倍数
+}
+
+# 查询向量缓存配置（内存 LRU + SQLite 磁盘缓存）
+EMBEDDING_CACHE_CONFIG = {
+    "enabled": True,
+    "memory_size": 10000,  # 内存中最多缓存的向量数量
+    "disk_path": "db/embedding_cache.sqlite",  # 磁盘缓存路径，设为 None 则只使用内存缓存
+}
+
+# 术语名称快速匹配配置（精确 / 规范化 / 别名命中时跳过向量检索）
+LEXICAL_CONFIG = {
+    "enabled": True,
+    "terms_csv": "../万条金融标准术语.csv",  # 相对于 backend 目录
+    "collections": ["financial_terms"],  # 只对这些集合启用（索引内容来自金融术语表）
+}
+
+# 混合检索配置（BM25 + 向量检索，倒数排名融合）
+HYBRID_SEARCH_CONFIG = {
+    "enabled": False,  # 默认关闭：开启后 /api/std 的结果带 match_type="hybrid" 和 rrf_score，仅 BM25 命中的术语 distance 为 None；只对 LEXICAL_CONFIG["collections"] 中的集合生效
+    "dense_top_k": 10,  # 向量检索召回数量
+    "sparse_top_k": 10,  # BM25 召回数量
+    "dense_weight": 1.0,  # 向量检索在 RRF 中的权重
+    "sparse_weight": 1.0,  # BM25 在 RRF 中的权重
+    "rrf_k": 60,  # RRF 平滑常数
+    "bm25_k1": 1.2,
+    "bm25_b": 0.75,
+}
+
+# 接口响应缓存配置（/api/std 和 /api/ner，按请求内容哈希缓存）
+RESPONSE_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 2048,  # 最多缓存的响应数量
+    "ttl_seconds": 600,  # 响应有效期
+    "bypass_header": "X-Cache-Bypass",  # 请求头设为 1/true 时跳过缓存
+    "status_header": "X-Cache",  # 响应头，取值 HIT/MISS/BYPASS
+}
+
+# 分阶段执行器配置：CPU 推理与 LLM 调用使用独立的线程池和并发上限，互不阻塞
+STAGE_EXECUTOR_CONFIG = {
+    "cpu": {
+        "max_workers": 16,  # NER / 嵌入 / 检索等 CPU 推理线程数（NER 由微批调度器统一执行，这些线程大多在等待结果）
+        "max_concurrency": 32,  # 同时进入 CPU 阶段的最大请求数
+    },
+    "llm": {
+        "max_workers": 16,  # LLM 调用以 I/O 等待为主，线程数可以更大
+        "max_concurrency": 16,
+    },
+}
+
+# NER 微批处理配置：合并并发请求为一批做前向计算
+NER_BATCHING_CONFIG = {
+    "enabled": True,
+    "max_batch_size": 16,  # 每批最多合并的文本数
+    "max_wait_ms": 5,  # 收到第一个请求后最多等待的毫秒数
+}
+
+# 嵌入微批处理配置：合并所有接口对同一模型的并发嵌入请求（位于查询向量缓存之后，只有未命中的文本进入队列）
+EMBEDDING_BATCHING_CONFIG = {
+    "enabled": True,
+    "max_batch_size": 64,  # 每批最多合并的文本数
+    "max_wait_ms": 3,  # 收到第一个文本后最多等待的毫秒数
+}
+
+# 批量标准化配置（/api/std/batch）
+STD_BATCH_CONFIG = {
+    "chunk_size": 32,  # 每个分块的文档数，分块内的 NER 和检索各做一次批量计算
+    "max_concurrency": 4,  # 单个批量请求同时处理的分块数
+    "max_documents": 10000,  # 单个请求允许的最大文档数
+}
+
+# 长文档 NER 配置：超过模型输入窗口的文本按重叠的 token 窗口切分后批量识别
+LONG_DOCUMENT_NER_CONFIG = {
+    "enabled": True,
+    "window_tokens": 384,  # 每个窗口的 token 数（不超过模型最大长度减去特殊 token）
+    "overlap_tokens": 64,  # 相邻窗口重叠的 token 数，保证边界处的实体完整出现在某个窗口中
+    "batch_size": 16,  # 每次前向计算的窗口数
+}
+
+# NER 推理后端配置
+NER_BACKEND_CONFIG = {
+    "backend": "torch",  # torch 或 onnx（onnx 需先运行 tools/export_onnx_ner.py 导出模型，未导出时回退到 torch）
+    "onnx_dir": "models/onnx/ner",  # ONNX 模型导出目录
+    "quantized": True,  # 是否加载动态 int8 量化后的模型
+}
+
+# ONNX 嵌入模型配置（provider 为 onnx 时使用，需先运行 tools/export_onnx_embeddings.py 导出）
+ONNX_EMBEDDING_CONFIG = {
+    "root_dir": "models/onnx/embeddings",  # 导出根目录，每个模型一个子目录
+    "quantized": True,  # 是否加载动态 int8 量化后的模型
+    "batch_size": 32,  # 每次前向计算的文本数
+}
+
+# 模型加载配置：模型和集合延迟加载，启动时只在后台预加载 preload 中的服务
+MODEL_LOADING_CONFIG = {
+    "preload": ["ner", "std"],  # 启动时预加载的服务（ner: NER 模型，std: 默认配置的标准化服务）；/readyz 在它们全部就绪后返回 200
+    "warmup": True,  # 加载后执行一次示例推理预热
+    "warmup_text": "JPMorgan Chase reports ROE increased to 15%",
+}
+
+# 服务进程配置（python main.py 的默认参数）
+SERVING_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8000,
+    "workers": 1,  # 大于 1 时使用预先 fork 的多进程模式：父进程加载模型后 fork，工作进程共享模型权重（需 numpy 检索后端）
+    "threads_per_worker": None,  # 每个工作进程的算子内线程数，None 表示按 CPU_TOPOLOGY_CONFIG 规划
+}
+
+# CPU 线程拓扑配置：服务启动时（多进程模式下每个工作进程启动时）设置 torch / OMP / MKL / tokenizers 的线程数
+CPU_TOPOLOGY_CONFIG = {
+    "enabled": True,
+    "use_physical_cores": True,  # 按物理核心计算线程数（超线程的兄弟线程对矩阵运算帮助不大）
+    "reserve_cores": 0,  # 预留给事件循环、分词等的核心数
+    "intra_op_threads": None,  # 每个进程的算子内线程数，None 表示 可用核心数 // 工作进程数
+    "inter_op_threads": 1,  # torch 算子间线程数（推理时几乎没有可并行的独立算子）
+    "tokenizers_parallelism": False,  # 是否启用 tokenizers 的并行分词（多进程模式下总是关闭）
+    "pin_cores": False,  # 是否把每个工作进程绑定到各自的核心（仅 Linux）
+}
+
+# 索引构建流水线配置（tools/create_financial_terms_db.py、tools/create_milvus_db.py）
+BUILD_PIPELINE_CONFIG = {
+    "chunk_rows": 4096,  # 每次从 CSV 读取的行数
+    "initial_batch_size": 256,  # 初始嵌入批大小，之后按实测吞吐调整
+    "min_batch_size": 32,
+    "max_batch_size": 4096,
+    "target_batch_seconds": 1.0,  # 每批嵌入的目标耗时，批越大吞吐越高，但插入阶段等待越久
+    "queue_size": 4,  # 各阶段之间队列的最大批数，限制读取和嵌入领先插入的程度
+    "max_retries": 2,  # 嵌入或插入失败的行在同一次构建中的重试轮数，仍失败的行记入检查点，下次运行时继续
+}
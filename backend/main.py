@@ -1,12 +1,32 @@
+import time
+_import_started = time.perf_counter()  # 用于统计启动导入耗时
+
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, ConfigDict
 from services.ner_service import NERService
-from services.std_service import StdService
+from services.std_registry import std_registry
+from config.service_config import (
+    VECTOR_BACKEND_CONFIG, LEXICAL_CONFIG, RESPONSE_CACHE_CONFIG, STD_BATCH_CONFIG, MODEL_LOADING_CONFIG,
+    SERVING_CONFIG, CPU_TOPOLOGY_CONFIG
+)
+from utils.embedding_cache import get_embedding_cache
+from utils.embedding_dispatcher import dispatcher_stats
+from utils.numpy_index import index_paths
+from utils.response_cache import ResponseCache, content_hash, index_version
+from utils.executors import run_in_stage, executor_stats, shutdown_executors
+from utils.lazy_service import LazyService
+from utils.import_report import startup_report
+from utils.prefork import serve_prefork
+from utils.cpu_topology import plan_topology, apply_topology, applied_topology
 from services.abbr_service import AbbrService
 from services.corr_service import CorrService
 from services.gen_service import GenService
-from typing import List, Dict, Optional, Literal, Union, Any
+from typing import List, Dict, Optional, Literal, Union, Any, Callable
+import asyncio
+import json
 import logging
 
 # 尝试加载运行时配置
@@ -21,6 +41,10 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 启动导入概要：按需依赖（torch、boto3、langchain_openai 等）不应出现在已导入列表中
+startup_imports = startup_report(_import_started)
+logger.info(f"启动导入完成: {startup_imports}")
+
 # 创建 FastAPI 应用
 app = FastAPI()
 
@@ -31,15 +55,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[RESPONSE_CACHE_CONFIG["status_header"]],
 )
 
 # 初始化各个服务
-ner_service = NERService()  # 命名实体识别服务
-standardization_service = StdService()  # 术语标准化服务
+def warmup_ner(service: NERService):
+    """用示例文本执行一次实体识别"""
+    service.process(MODEL_LOADING_CONFIG["warmup_text"], {}, {'allFinancialTerms': True})
+
+def warmup_std(service):
+    """用示例文本执行一次术语检索（同时加载嵌入模型）"""
+    service.search_similar_terms(MODEL_LOADING_CONFIG["warmup_text"], limit=1)
+
+# 模型服务延迟加载：启动时在后台预加载 MODEL_LOADING_CONFIG["preload"] 中的服务，其余在首次使用时加载
+warmup_enabled = MODEL_LOADING_CONFIG["warmup"]
+ner_service = LazyService("ner", NERService, warmup_ner if warmup_enabled else None)  # 命名实体识别服务
+standardization_service = LazyService(  # 术语标准化服务（默认配置常驻注册表）
+    "std", std_registry.acquire, warmup_std if warmup_enabled else None, release=std_registry.release
+)
+model_services = {"ner": ner_service, "std": standardization_service}
 abbr_service = AbbrService()  # 缩写扩展服务
 gen_service = GenService()  # 文本生成服务
 corr_service = CorrService()  # 拼写纠正服务
 
+# 接口响应缓存（/api/std 和 /api/ner）
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_CONFIG["max_entries"],
+    ttl_seconds=RESPONSE_CACHE_CONFIG["ttl_seconds"]
+)
+
 # 基础模型类
 class BaseInputModel(BaseModel):
     """基础输入模型，包含所有模型共享的字段"""
@@ -55,7 +99,7 @@ class BaseInputModel(BaseModel):
 
 class EmbeddingOptions(BaseModel):
     """向量数据库配置选项"""
-    provider: Literal["huggingface", "openai", "bedrock"] = Field(
+    provider: Literal["huggingface", "openai", "bedrock", "onnx"] = Field(
         default="huggingface",
         description="向量数据库提供商"
     )
@@ -71,6 +115,10 @@ class EmbeddingOptions(BaseModel):
         default="financial_terms",
         description="集合名称"
     )
+    backend: Literal["milvus", "numpy"] = Field(
+        default=VECTOR_BACKEND_CONFIG["default_backend"],
+        description="向量检索后端（numpy 为进程内精确检索，不使用 Milvus）"
+    )
 
 class TextInput(BaseInputModel):
     """文本输入模型，用于标准化和命名实体识别"""
@@ -88,6 +136,21 @@ class TextInput(BaseInputModel):
         description="向量数据库配置选项"
     )
 
+class StdBatchInput(BaseModel):
+    """批量标准化输入模型"""
+    documents: List[Any] = Field(
+        ...,
+        description="文档列表，每项为文本或包含 text（及可选 id）的对象"
+    )
+    options: Dict[str, bool] = Field(
+        default_factory=dict,
+        description="处理选项"
+    )
+    embeddingOptions: EmbeddingOptions = Field(
+        default_factory=EmbeddingOptions,
+        description="向量数据库配置选项"
+    )
+
 class AbbrInput(BaseInputModel):
     """缩写扩展输入模型"""
     text: str = Field(..., description="输入文本")
@@ -179,59 +242,314 @@ class GenInput(BaseInputModel):
         description="生成方法"
     )
 
-# API 端点：术语标准化
-@app.post("/api/std")
-async def standardization(input: TextInput):
+async def cached_json_response(request: Request, endpoint: str, payload: Dict,
+                               version: Callable[[], Optional[str]], compute):
+    """
+    带响应缓存的接口处理
+
+    Args:
+        request: 当前请求，用于读取缓存绕过请求头
+        endpoint: 接口名称，作为缓存键的一部分
+        payload: 影响结果的请求内容
+        version: 返回索引和模型版本的函数，只在启用缓存时调用，版本变化后缓存自动失效；
+            返回 None 表示依赖的模型尚未加载，此时跳过查找，计算完成（模型已加载）后再取版本写入缓存
+        compute: 未命中时计算响应内容的异步函数
+
+    Returns:
+        JSON 响应，响应头中标明缓存状态 (HIT/MISS/BYPASS)
+    """
+    status_header = RESPONSE_CACHE_CONFIG["status_header"]
+    if not RESPONSE_CACHE_CONFIG["enabled"]:
+        return await compute()
+
+    if request.headers.get(RESPONSE_CACHE_CONFIG["bypass_header"], "").lower() in ("1", "true", "yes"):
+        response_cache.record_bypass()
+        response = JSONResponse(content=jsonable_encoder(await compute()))
+        response.headers[status_header] = "BYPASS"
+        return response
+
+    current_version = version()
+    if current_version is not None:
+        key = content_hash({"endpoint": endpoint, "payload": payload, "index_version": current_version})
+        body = response_cache.get(key)
+        if body is not None:
+            return Response(content=body, media_type="application/json", headers={status_header: "HIT"})
+
+    response = JSONResponse(content=jsonable_encoder(await compute()))
+    if current_version is None:
+        current_version = version()
+    if current_version is not None:
+        key = content_hash({"endpoint": endpoint, "payload": payload, "index_version": current_version})
+        response_cache.put(key, response.body)
+    response.headers[status_header] = "MISS"
+    return response
+
+def std_index_version(embedding_options: EmbeddingOptions) -> str:
+    """标准化结果依赖的索引版本（向量索引文件和术语表）"""
+    db_path = f"db/{embedding_options.dbName}.db"
+    if embedding_options.backend == "numpy":
+        paths = list(index_paths(db_path))
+    else:
+        paths = [db_path]
+    return index_version(paths + [LEXICAL_CONFIG["terms_csv"]])
+
+def ner_model_version() -> Optional[str]:
+    """NER 结果依赖的模型版本（推理后端、模型文件和窗口配置）；NER 服务尚未加载时返回 None，不触发加载"""
+    service = ner_service.get_if_ready()
+    return service.version if service is not None else None
+
+def std_result_version(embedding_options: EmbeddingOptions) -> Optional[str]:
+    """/api/std 结果依赖的版本：向量索引和 NER 模型（每个请求都先做 NER）"""
+    ner_version = ner_model_version()
+    if ner_version is None:
+        return None
+    return f"{std_index_version(embedding_options)}:{ner_version}"
+
+def split_term_types(options: Dict[str, bool]):
+    """从处理选项中分离术语类型配置"""
+    options = dict(options)
+    all_financial_terms = options.pop('allFinancialTerms', False)
+    return options, {'allFinancialTerms': all_financial_terms}
+
+def format_std_result(entities: List[Dict], std_results: List[List[Dict]]) -> Dict:
+    """组装单个文档的标准化结果"""
+    if not entities:
+        return {"message": "No financial terms have been recognized", "standardized_terms": []}
+
+    standardized_results = []
+    for entity, std_result in zip(entities, std_results):
+        standardized_results.append({
+            "original_term": entity['word'],
+            "entity_group": entity['entity_group'],
+            "match_type": std_result[0]["match_type"] if std_result else None,
+            "standardized_results": std_result
+        })
+
+    return {
+        "message": f"{len(entities)} financial terms have been recognized and standardized",
+        "standardized_terms": standardized_results
+    }
+
+def standardize_documents(texts: List[str], options: Dict[str, bool],
+                          embedding_options: EmbeddingOptions) -> List[Dict]:
+    """
+    批量标准化多个文档：所有文档做一次批量 NER，所有实体做一次批量检索
+
+    Args:
+        texts: 文档文本列表
+        options: 处理选项
+        embedding_options: 向量数据库配置选项
+
+    Returns:
+        与 texts 一一对应的标准化结果
+    """
+    # 配置术语类型并进行命名实体识别
+    options, term_types = split_term_types(options)
+    if len(texts) == 1:
+        ner_results = [ner_service.get().process(texts[0], options, term_types)]
+    else:
+        ner_results = ner_service.get().process_batch(texts, options, term_types)
+    entities_per_doc = [ner_result.get('entities', []) for ner_result in ner_results]
+
+    words = [entity['word'] for entities in entities_per_doc for entity in entities]
+    batch_results = []
+    if words:
+        # 从注册表获取共享的标准化服务，所有实体一次性批量检索
+        with std_registry.lease(
+            provider=embedding_options.provider,
+            model=embedding_options.model,
+            db_path=f"db/{embedding_options.dbName}.db",
+            collection_name=embedding_options.collectionName,
+            backend=embedding_options.backend
+        ) as std_service:
+            batch_results = std_service.search_similar_terms_batch(words)
+
+    results = []
+    offset = 0
+    for entities in entities_per_doc:
+        results.append(format_std_result(entities, batch_results[offset:offset + len(entities)]))
+        offset += len(entities)
+    return results
+
+def standardize_text(input: TextInput) -> Dict:
+    """对文本做命名实体识别并标准化识别出的实体"""
+    return standardize_documents([input.text], input.options, input.embeddingOptions)[0]
+
+def recognize_entities(input: TextInput) -> Dict:
+    """对文本做命名实体识别"""
+    return ner_service.get().process(input.text, input.options, input.termTypes)
+
+def standardize_batch_chunk(documents: List[Dict], options: Dict[str, bool],
+                            embedding_options: EmbeddingOptions) -> List[Dict]:
+    """
+    处理批量请求中的一个分块，生成每个文档的 NDJSON 结果行
+
+    整块批量处理失败时逐个文档重试，只有出错的文档返回错误，其余文档不受影响
+
+    Args:
+        documents: 文档列表，每项包含 index、id、text（解析失败的文档带有 error）
+        options: 处理选项
+        embedding_options: 向量数据库配置选项
+
+    Returns:
+        与 documents 一一对应的结果行
+    """
+    valid = [doc for doc in documents if "error" not in doc]
+    results = {}
     try:
-        # 记录请求信息
-        logger.info(f"Received request: text={input.text}, options={input.options}, embeddingOptions={input.embeddingOptions}")
+        chunk_results = standardize_documents([doc["text"] for doc in valid], options, embedding_options) if valid else []
+        for doc, result in zip(valid, chunk_results):
+            results[doc["index"]] = result
+    except Exception as e:
+        logger.warning(f"批量标准化分块失败，逐个文档重试: {e}")
+        for doc in valid:
+            try:
+                results[doc["index"]] = standardize_documents([doc["text"]], options, embedding_options)[0]
+            except Exception as doc_error:
+                logger.error(f"文档 {doc['index']} 标准化失败: {doc_error}")
+                doc["error"] = str(doc_error)
+
+    lines = []
+    for doc in documents:
+        line = {"index": doc["index"], "id": doc.get("id")}
+        if doc["index"] in results:
+            line.update({"status": "success", "result": results[doc["index"]]})
+        else:
+            line.update({"status": "error", "error": doc["error"]})
+        lines.append(line)
+    return lines
 
-        # 配置术语类型
-        all_financial_terms = input.options.pop('allFinancialTerms', False)
-        term_types = {'allFinancialTerms': all_financial_terms}
+def parse_batch_documents(items: List[Any]) -> List[Dict]:
+    """
+    将批量请求中的文档规范化为 {index, id, text}
 
-        # 进行命名实体识别
-        ner_results = ner_service.process(input.text, input.options, term_types)
+    文档可以是字符串，或包含 text（及可选 id）的对象；格式不正确的文档带上 error，不影响其他文档
+    """
+    documents = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            documents.append({"index": index, "id": None, "text": item})
+        elif isinstance(item, dict) and isinstance(item.get("text"), str):
+            documents.append({"index": index, "id": item.get("id"), "text": item["text"]})
+        else:
+            documents.append({"index": index, "id": None, "error": "Document must be a string or an object with a 'text' field"})
+    return documents
 
-        # 初始化标准化服务
-        standardization_service = StdService(
-            provider=input.embeddingOptions.provider,
-            model=input.embeddingOptions.model,
-            db_path=f"db/{input.embeddingOptions.dbName}.db",
-            collection_name=input.embeddingOptions.collectionName
-        )
+def parse_jsonl(content: str) -> List[Any]:
+    """解析 JSONL 内容，跳过空行；无法解析的行保留为 None，由 parse_batch_documents 标记错误"""
+    items = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except json.JSONDecodeError:
+            items.append(None)
+    return items
 
-        # 获取识别到的实体
-        entities = ner_results.get('entities', [])
-        if not entities:
-            return {"message": "No financial terms have been recognized", "standardized_terms": []}
-
-        # 标准化每个实体
-        standardized_results = []
-        for entity in entities:
-            std_result = standardization_service.search_similar_terms(entity['word'])
-            standardized_results.append({
-                "original_term": entity['word'],
-                "entity_group": entity['entity_group'],
-                "standardized_results": std_result
-            })
+async def stream_std_batch(documents: List[Dict], options: Dict[str, bool], embedding_options: EmbeddingOptions):
+    """
+    按分块并发处理文档，每个分块完成后立即输出其中文档的 NDJSON 结果行
 
-        return {
-            "message": f"{len(entities)} financial terms have been recognized and standardized",
-            "standardized_terms": standardized_results
+    同时处理的分块数受 STD_BATCH_CONFIG["max_concurrency"] 限制，结果行按完成顺序输出，用 index 对应输入顺序
+    """
+    chunk_size = STD_BATCH_CONFIG["chunk_size"]
+    chunks = [documents[start:start + chunk_size] for start in range(0, len(documents), chunk_size)]
+    pending = set()
+    next_chunk = 0
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < STD_BATCH_CONFIG["max_concurrency"]:
+                pending.add(asyncio.ensure_future(
+                    run_in_stage("cpu", standardize_batch_chunk, chunks[next_chunk], options, embedding_options)
+                ))
+                next_chunk += 1
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for line in task.result():
+                    yield json.dumps(jsonable_encoder(line), ensure_ascii=False) + "\n"
+    finally:
+        # 客户端断开时取消尚未开始的分块
+        for task in pending:
+            task.cancel()
+
+# API 端点：术语标准化
+@app.post("/api/std")
+async def standardization(input: TextInput, request: Request):
+    try:
+        # 记录请求信息
+        logger.info(f"Received request: text={input.text}, options={input.options}, embeddingOptions={input.embeddingOptions}")
+
+        payload = {
+            "text": input.text,
+            "options": input.options,
+            "embeddingOptions": jsonable_encoder(input.embeddingOptions)
         }
+        # 标准化结果同时依赖向量索引和 NER 模型（termTypes 不影响结果，不计入缓存键）
+        return await cached_json_response(
+            request, "std", payload, lambda: std_result_version(input.embeddingOptions),
+            lambda: run_in_stage("cpu", standardize_text, input)
+        )
 
     except Exception as e:
         logger.error(f"Error in standardization processing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# API 端点：批量术语标准化（NDJSON 流式输出）
+@app.post("/api/std/batch")
+async def batch_standardization(request: Request):
+    """
+    批量标准化多个文档，每个文档的结果作为一行 JSON 流式返回
+
+    支持三种请求格式:
+    - application/json: StdBatchInput
+    - application/x-ndjson 或 application/jsonl: 每行一个文档，使用默认配置
+    - multipart/form-data: file 字段为 JSONL 文件，可选 config 字段为 JSON 格式的 options/embeddingOptions
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise HTTPException(status_code=400, detail="Missing 'file' field")
+            config = json.loads(form.get("config") or "{}")
+            batch_input = StdBatchInput(documents=[], **config)
+            items = parse_jsonl((await upload.read()).decode("utf-8"))
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            batch_input = StdBatchInput(documents=[])
+            items = parse_jsonl((await request.body()).decode("utf-8"))
+        else:
+            batch_input = StdBatchInput(**(await request.json()))
+            items = batch_input.documents
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch request: {str(e)}")
+
+    if len(items) > STD_BATCH_CONFIG["max_documents"]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many documents: {len(items)} > {STD_BATCH_CONFIG['max_documents']}"
+        )
+
+    documents = parse_batch_documents(items)
+    logger.info(f"Received batch standardization request: {len(documents)} documents, embeddingOptions={batch_input.embeddingOptions}")
+    return StreamingResponse(
+        stream_std_batch(documents, batch_input.options, batch_input.embeddingOptions),
+        media_type="application/x-ndjson"
+    )
+
 # API 端点：命名实体识别
 @app.post("/api/ner")
-async def ner(input: TextInput):
+async def ner(input: TextInput, request: Request):
     try:
         logger.info(f"Received NER request: text={input.text}, options={input.options}, termTypes={input.termTypes}")
-        results = ner_service.process(input.text, input.options, input.termTypes)
-        return results
+        payload = {"text": input.text, "options": input.options, "termTypes": input.termTypes}
+        return await cached_json_response(
+            request, "ner", payload, ner_model_version,
+            lambda: run_in_stage("cpu", recognize_entities, input)
+        )
     except Exception as e:
         logger.error(f"Error in NER processing: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -241,9 +559,9 @@ async def ner(input: TextInput):
 async def correct_notes(input: CorrInput):
     try:
         if input.method == "correct_spelling":  # 拼写纠正
-            return corr_service.correct_spelling(input.text, input.llmOptions)
+            return await run_in_stage("llm", corr_service.correct_spelling, input.text, input.llmOptions)
         elif input.method == "add_mistakes":  # 添加错误（测试用）
-            return corr_service.add_mistakes(input.text, input.errorOptions)
+            return await run_in_stage("cpu", corr_service.add_mistakes, input.text, input.errorOptions)
         else:
             raise HTTPException(status_code=400, detail="Invalid method")
     except Exception as e:
@@ -255,17 +573,21 @@ async def correct_notes(input: CorrInput):
 async def expand_abbreviations(input: AbbrInput):
     try:
         if input.method == "simple_ollama":  # 简单扩展
-            output = abbr_service.simple_ollama_expansion(input.text, input.llmOptions)
+            output = await run_in_stage("llm", abbr_service.simple_ollama_expansion, input.text, input.llmOptions)
             return {"input": input.text, "output": output}
         elif input.method == "query_db_llm_rerank":  # 数据库查询+重排序
-            return abbr_service.query_db_llm_rerank(
+            return await run_in_stage(
+                "llm",
+                abbr_service.query_db_llm_rerank,
                 input.text, 
                 input.context, 
                 input.llmOptions,
                 input.embeddingOptions
             )
         elif input.method == "llm_rank_query_db":  # LLM扩展+数据库标准化
-            return abbr_service.llm_rank_query_db(
+            return await run_in_stage(
+                "llm",
+                abbr_service.llm_rank_query_db,
                 input.text, 
                 input.context, 
                 input.llmOptions,
@@ -282,7 +604,9 @@ async def expand_abbreviations(input: AbbrInput):
 async def generate_financial_content(input: GenInput):
     try:
         if input.method == "generate_financial_report":  # 生成金融报告
-            return gen_service.generate_financial_report(
+            return await run_in_stage(
+                "llm",
+                gen_service.generate_financial_report,
                 input.company_info,
                 input.financial_data,
                 input.analysis_type,
@@ -290,12 +614,16 @@ async def generate_financial_content(input: GenInput):
                 input.llmOptions
             )
         elif input.method == "generate_investment_analysis":  # 生成投资分析
-            return gen_service.generate_investment_analysis(
+            return await run_in_stage(
+                "llm",
+                gen_service.generate_investment_analysis,
                 input.market_data,
                 input.llmOptions
             )
         elif input.method == "generate_risk_assessment":  # 生成风险评估
-            return gen_service.generate_risk_assessment(
+            return await run_in_stage(
+                "llm",
+                gen_service.generate_risk_assessment,
                 input.portfolio_info,
                 input.market_conditions,
                 input.llmOptions
@@ -306,6 +634,60 @@ async def generate_financial_content(input: GenInput):
         logger.error(f"Error in financial content generation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+def apply_cpu_topology():
+    """
+    按 CPU 拓扑设置线程数（在预加载模型之前执行，torch 等按需导入的库在导入时生效）
+    多进程模式下工作进程已由 serve_prefork 按各自的规划设置，不再覆盖
+    """
+    if CPU_TOPOLOGY_CONFIG["enabled"] and applied_topology() is None:
+        apply_topology(plan_topology(workers=1))
+
+@app.on_event("startup")
+def preload_model_services():
+    """在后台预加载配置的模型服务，不阻塞服务启动"""
+    for name in MODEL_LOADING_CONFIG["preload"]:
+        model_services[name].start_background()
+
+@app.on_event("shutdown")
+def shutdown_stage_executors():
+    """关闭分阶段执行器的线程池"""
+    shutdown_executors()
+
+# 存活检查：进程正常运行即返回
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# 就绪检查：预加载的模型服务全部加载并预热完成后返回 200，否则返回 503
+@app.get("/readyz")
+async def readyz():
+    ready = all(model_services[name].ready for name in MODEL_LOADING_CONFIG["preload"])
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "loading",
+            "services": {name: service.status() for name, service in model_services.items()}
+        }
+    )
+
+# 运行指标API
+@app.get("/api/metrics")
+async def get_metrics():
+    """获取缓存命中率和服务实例等运行指标"""
+    return {
+        "status": "success",
+        "data": {
+            "embedding_cache": get_embedding_cache().stats(),
+            "response_cache": response_cache.stats(),
+            "executors": executor_stats(),
+            "ner_batching": ner_service.get().batch_stats() if ner_service.ready else {"loaded": False},
+            "embedding_batching": dispatcher_stats(),
+            "std_registry": std_registry.stats(),
+            "startup_imports": startup_imports
+        }
+    }
+
 # 配置信息API
 @app.get("/api/config")
 async def get_config():
@@ -317,9 +699,14 @@ async def get_config():
                 "provider": DEFAULT_EMBEDDING_PROVIDER,
                 "model": DEFAULT_EMBEDDING_MODEL,
                 "dbName": get_db_name_from_model(DEFAULT_EMBEDDING_MODEL),
-                "collectionName": "financial_terms"
+                "collectionName": "financial_terms",
+                "backend": VECTOR_BACKEND_CONFIG["default_backend"]
             },
             "model_info": get_model_info(DEFAULT_EMBEDDING_MODEL),
+            "ner": {
+                "backend": ner_service.get().backend if ner_service.ready else None
+            },
+            "cpu_topology": applied_topology(),
             "available_models": {
                 "lightweight": {
                     "model": "sentence-transformers/all-MiniLM-L6-v2",
@@ -387,12 +774,34 @@ def get_model_info(model_name: str) -> dict:
         "description": "自定义模型"
     })
 
+def preload_model_services_now():
+    """在当前进程中同步加载并预热所有预加载服务（多进程模式在 fork 之前调用）"""
+    for name in MODEL_LOADING_CONFIG["preload"]:
+        model_services[name].get()
+
 # 启动服务器
 if __name__ == "__main__":
+    import argparse
     import uvicorn
+
+    parser = argparse.ArgumentParser(description="金融术语标准化系统后端服务")
+    parser.add_argument("--host", default=SERVING_CONFIG["host"], help="监听地址")
+    parser.add_argument("--port", type=int, default=SERVING_CONFIG["port"], help="监听端口")
+    parser.add_argument("--workers", type=int, default=SERVING_CONFIG["workers"], help="工作进程数，大于 1 时使用预先 fork 的多进程模式")
+    parser.add_argument("--threads-per-worker", type=int, default=SERVING_CONFIG["threads_per_worker"], help="每个工作进程的算子内线程数")
+    args = parser.parse_args()
+
     print("🚀 启动金融术语标准化系统...")
-    print("📖 API文档地址: http://localhost:8000/docs")
-    print("🔧 API接口地址: http://localhost:8000")
+    print(f"📖 API文档地址: http://localhost:{args.port}/docs")
+    print(f"🔧 API接口地址: http://localhost:{args.port}")
     print(f"🤖 当前嵌入模型: {DEFAULT_EMBEDDING_MODEL}")
     print(f"💾 数据库名称: {get_db_name_from_model(DEFAULT_EMBEDDING_MODEL)}")
-    uvicorn.run(app, host="127.0.0.1", port=8000, reload=False)
+
+    if args.workers > 1:
+        if VECTOR_BACKEND_CONFIG["default_backend"] != "numpy":
+            parser.error("多进程模式需要 numpy 检索后端（Milvus Lite 数据库文件不能被多个进程同时打开），"
+                         "请在 config/service_config.py 中设置 VECTOR_BACKEND_CONFIG[\"default_backend\"] = \"numpy\"")
+        print(f"👥 工作进程数: {args.workers}")
+        serve_prefork(app, args.host, args.port, args.workers, preload_model_services_now, args.threads_per_worker)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, reload=False)
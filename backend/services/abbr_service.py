@@ -1,8 +1,8 @@
-from langchain_community.llms import Ollama
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from typing import Dict
+from langchain_core.prompts import ChatPromptTemplate
+from typing import Dict, Iterator
+from contextlib import contextmanager
 from services.std_service import StdService
+from services.std_registry import std_registry
 import os
 import logging
 
@@ -17,12 +17,10 @@ class AbbrService:
     1. 简单 LLM 扩展：快速但不保证准确性
     2. LLM 生成 + 数据库查询：更准确但较慢
     """
-    def __init__(self):
-        self.std_service = None  # 按需初始化标准化服务
-        
-    def _get_std_service(self, embedding_options: dict) -> StdService:
+    @contextmanager
+    def _get_std_service(self, embedding_options: dict) -> Iterator[StdService]:
         """
-        获取或创建标准化服务实例
+        从共享注册表中获取标准化服务实例，退出上下文时自动归还
         
         Args:
             embedding_options: 嵌入模型配置选项，包含：
@@ -30,23 +28,29 @@ class AbbrService:
                 - model: 模型名称
                 - dbName: 数据库名称
                 - collectionName: 集合名称
+                - backend: 向量检索后端 (milvus/numpy)
             
-        Returns:
+        Yields:
             配置好的标准化服务实例
             
         Raises:
             ValueError: 当标准化服务初始化失败时
         """
         try:
-            return StdService(
+            std_service = std_registry.acquire(
                 provider=embedding_options.get("provider", "huggingface"),
                 model=embedding_options.get("model", "sentence-transformers/all-MiniLM-L6-v2"),
                 db_path=f"db/{embedding_options.get('dbName', 'financial_terms_minilm')}.db",
-                collection_name=embedding_options.get("collectionName", "financial_terms")
+                collection_name=embedding_options.get("collectionName", "financial_terms"),
+                backend=embedding_options.get("backend")
             )
         except Exception as e:
             logger.error(f"Failed to initialize StdService: {str(e)}")
             raise ValueError(f"Failed to initialize standardization service: {str(e)}")
+        try:
+            yield std_service
+        finally:
+            std_registry.release(std_service)
 
     def _get_llm(self, llm_options: dict):
         """
@@ -66,9 +70,12 @@ class AbbrService:
         provider = llm_options.get("provider", "ollama")
         model = llm_options.get("model", "llama3.1:8b")
         
+        # 提供商的依赖只在首次使用时导入
         if provider == "ollama":
+            from langchain_community.llms import Ollama
             return Ollama(model=model)
         elif provider == "openai":
+            from langchain.chat_models import ChatOpenAI
             return ChatOpenAI(
                 model=model,
                 temperature=0,
@@ -139,9 +146,6 @@ class AbbrService:
             ValueError: 当标准化服务初始化失败时
         """
         try:
-            # 获取标准化服务实例
-            self.std_service = self._get_std_service(embedding_options)
-            
             # 使用 LLM 生成扩展
             llm = self._get_llm(llm_options)
             expand_prompt = ChatPromptTemplate.from_messages([
@@ -156,7 +160,8 @@ class AbbrService:
             expansion_text = expansion_result.content if hasattr(expansion_result, 'content') else str(expansion_result)
             
             # 在数据库中查找相似的标准术语
-            std_terms = self.std_service.search_similar_terms(expansion_text)
+            with self._get_std_service(embedding_options) as std_service:
+                std_terms = std_service.search_similar_terms_batch([expansion_text])[0]
             
             return {
                 "input": text,
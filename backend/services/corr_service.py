@@ -1,6 +1,4 @@
-from langchain_community.llms import Ollama
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from typing import Dict
 import os
 import logging
@@ -33,9 +31,12 @@ class CorrService:
         provider = llm_options.get("provider", "ollama")
         model = llm_options.get("model", "llama3.1:8b")
         
+        # 提供商的依赖只在首次使用时导入
         if provider == "ollama":
+            from langchain_community.llms import Ollama
             return Ollama(model=model)
         elif provider == "openai":
+            from langchain.chat_models import ChatOpenAI
             return ChatOpenAI(
                 model=model,
                 temperature=0,
@@ -1,6 +1,12 @@
-from transformers import pipeline
-import torch
 import logging
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.micro_batcher import MicroBatcher
+from utils.onnx_ner import load_onnx_ner_pipeline
+from utils.cpu_topology import configure_torch, applied_intra_op_threads
+from utils.response_cache import content_hash, index_version
+from config.service_config import NER_BATCHING_CONFIG, LONG_DOCUMENT_NER_CONFIG, NER_BACKEND_CONFIG
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -12,11 +18,45 @@ class NERService:
     使用适合金融领域的NER模型进行金融文本的实体识别
     """
     def __init__(self):
-        # 初始化 NER 模型，使用 GPU 如果可用
+        # 初始化 NER 模型：配置为 onnx 且已导出模型时使用 ONNX Runtime，否则使用 PyTorch 模型
+        self.pipe = None
+        self.backend = "torch"
+        # 快速分词器和模型不是线程安全的：调度器线程和各计算线程的所有分词与前向计算都在此锁下串行执行
+        self._pipe_lock = threading.Lock()
+        if NER_BACKEND_CONFIG["backend"] == "onnx":
+            try:
+                self.pipe = load_onnx_ner_pipeline(
+                    NER_BACKEND_CONFIG["onnx_dir"],
+                    quantized=NER_BACKEND_CONFIG["quantized"],
+                    num_threads=applied_intra_op_threads()
+                )
+                self.backend = "onnx"
+            except Exception as e:
+                logger.warning(f"ONNX NER 模型加载失败，使用 PyTorch 模型: {e}")
+        if self.pipe is None:
+            self._load_torch_pipeline()
+        self.version = self._model_version()
+
+        # 合并并发请求的微批处理调度器
+        self.batcher = None
+        if NER_BATCHING_CONFIG["enabled"]:
+            self.batcher = MicroBatcher(
+                self._run_pipeline_batch,
+                max_batch_size=NER_BATCHING_CONFIG["max_batch_size"],
+                max_wait_ms=NER_BATCHING_CONFIG["max_wait_ms"],
+                name="ner"
+            )
+
+    def _load_torch_pipeline(self):
+        """加载 PyTorch NER 模型，使用 GPU 如果可用"""
+        import torch
+        from transformers import pipeline
+        # 按启动时应用的 CPU 线程配置设置 torch
+        configure_torch()
+
         # 首先尝试使用金融领域的模型，如果不存在则使用通用模型
         try:
             # 尝试使用金融领域的模型
-            import os
             local_model_path = "models/Financial-NER"
             if os.path.exists(local_model_path):
                 logger.info(f"使用本地金融模型: {local_model_path}")
@@ -61,6 +101,39 @@ class NERService:
             except Exception as e2:
                 logger.error(f"所有模型加载失败: {e2}")
                 raise e2
+
+    def _model_version(self) -> str:
+        """
+        识别结果依赖的模型版本：实际使用的推理后端、模型路径（本地目录按其中文件的修改时间和大小）和长文档窗口配置，
+        作为接口响应缓存版本，切换后端、模型或窗口配置后缓存自动失效
+        """
+        if self.backend == "onnx":
+            model_path = NER_BACKEND_CONFIG["onnx_dir"]
+        else:
+            model_path = getattr(self.pipe.model, "name_or_path", "") or ""
+        files = [model_path]
+        if os.path.isdir(model_path):
+            files = [os.path.join(model_path, name) for name in sorted(os.listdir(model_path))]
+        return content_hash({
+            "backend": self.backend,
+            "quantized": NER_BACKEND_CONFIG["quantized"] if self.backend == "onnx" else None,
+            "model": model_path,
+            "files": index_version(files),
+            "windowing": LONG_DOCUMENT_NER_CONFIG
+        })[:16]
+
+    def _call_pipe(self, inputs, **kwargs):
+        """在模型锁下调用 NER 模型"""
+        with self._pipe_lock:
+            return self.pipe(inputs, **kwargs)
+
+    def _run_pipeline_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """对一批文本做一次填充后的前向计算"""
+        return self._call_pipe(texts, batch_size=len(texts))
+
+    def batch_stats(self) -> Dict:
+        """微批处理调度器的队列深度和批大小分布"""
+        return self.batcher.stats() if self.batcher is not None else {"enabled": False}
   
     def process(self, text, options, term_types):
         """
@@ -74,9 +147,173 @@ class NERService:
         Returns:
             包含识别出的实体和原始文本的字典
         """
-        # 使用模型进行实体识别
-        result = self.pipe(text)
-        
+        # 超过模型输入窗口的长文本按滑动窗口识别
+        windows = self._split_windows(text)
+        if windows is not None:
+            return self.process_long_document(text, options, term_types, windows=windows)
+
+        # 使用模型进行实体识别（并发请求由调度器合并为一批）
+        if self.batcher is not None:
+            result = self.batcher(text)
+        else:
+            result = self._call_pipe(text)
+
+        return self._postprocess(result, text, options, term_types)
+
+    def process_batch(self, texts, options, term_types):
+        """
+        批量处理多段文本，所有文本在一次批量前向计算中完成识别
+
+        Args:
+            texts: 输入文本列表
+            options: 处理选项
+            term_types: 需要识别的术语类型
+
+        Returns:
+            与 texts 一一对应的结果列表，格式与 process 相同
+        """
+        if not texts:
+            return []
+
+        # 长文本单独按滑动窗口识别，其余文本一起批量识别
+        windows_per_text = [self._split_windows(text) for text in texts]
+        short_texts = [text for text, windows in zip(texts, windows_per_text) if windows is None]
+        short_results = iter(self._call_pipe(short_texts, batch_size=NER_BATCHING_CONFIG["max_batch_size"]) if short_texts else [])
+
+        results = []
+        for text, windows in zip(texts, windows_per_text):
+            if windows is None:
+                results.append(self._postprocess(next(short_results), text, options, term_types))
+            else:
+                results.append(self.process_long_document(text, options, term_types, windows=windows))
+        return results
+
+    def process_long_document(self, text, options, term_types, windows=None):
+        """
+        长文档实体识别：按重叠的 token 窗口切分，所有窗口批量识别后合并
+
+        Args:
+            text: 输入文本
+            options: 处理选项
+            term_types: 需要识别的术语类型
+            windows: 预先计算的窗口字符区间，默认按 LONG_DOCUMENT_NER_CONFIG 切分
+
+        Returns:
+            格式与 process 相同，实体位置对应原始文本
+        """
+        if windows is None:
+            windows = self._split_windows(text, force=True)
+        window_results = self._call_pipe(
+            [text[start:end] for start, end in windows],
+            batch_size=LONG_DOCUMENT_NER_CONFIG["batch_size"]
+        )
+        entities = []
+        for (start, _), result in zip(windows, window_results):
+            entities.extend(self._shift_entities(result, start))
+        return self._postprocess(self._merge_window_entities(entities), text, options, term_types)
+
+    def iter_long_document(self, text, options, term_types) -> Iterator[Dict]:
+        """
+        长文档实体识别的生成器模式：每处理完一批窗口，就产出不会再被后续窗口改变的实体
+
+        Args:
+            text: 输入文本
+            options: 处理选项
+            term_types: 需要识别的术语类型
+
+        Yields:
+            按位置顺序产出的实体，位置对应原始文本
+        """
+        windows = self._split_windows(text, force=True)
+        batch_size = LONG_DOCUMENT_NER_CONFIG["batch_size"]
+        pending: List[Dict] = []
+        for batch_start in range(0, len(windows), batch_size):
+            batch = windows[batch_start:batch_start + batch_size]
+            for (start, _), result in zip(batch, self._call_pipe([text[s:e] for s, e in batch], batch_size=batch_size)):
+                pending.extend(self._shift_entities(result, start))
+            pending = self._merge_window_entities(pending)
+
+            # 结束位置早于下一个窗口起点的实体不会再出现在后续窗口中；
+            # 最后一个就绪实体暂缓产出，以便与后续相邻实体合并
+            next_start = windows[batch_start + batch_size][0] if batch_start + batch_size < len(windows) else None
+            if next_start is None:
+                ready, pending = pending, []
+            else:
+                split = sum(1 for entity in pending if entity['end'] <= next_start)
+                split = max(split - 1, 0)
+                ready, pending = pending[:split], pending[split:]
+            if ready:
+                yield from self._postprocess(ready, text, options, term_types)["entities"]
+
+    def _split_windows(self, text, force=False) -> Optional[List[Tuple[int, int]]]:
+        """
+        按 token 把文本切分为重叠的窗口
+
+        Args:
+            text: 输入文本
+            force: 为 True 时即使文本未超过窗口长度也返回（单个）窗口
+
+        Returns:
+            窗口的字符区间 [(start, end), ...]；未启用长文档模式或文本不超过一个窗口时返回 None
+        """
+        if not force and (not LONG_DOCUMENT_NER_CONFIG["enabled"] or len(text) <= LONG_DOCUMENT_NER_CONFIG["window_tokens"]):
+            # 每个 token 至少对应一个字符，字符数不超过窗口长度的文本无需分词检查
+            return None
+
+        tokenizer = self.pipe.tokenizer
+        window_tokens = min(
+            LONG_DOCUMENT_NER_CONFIG["window_tokens"],
+            tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+        )
+        overlap_tokens = min(LONG_DOCUMENT_NER_CONFIG["overlap_tokens"], window_tokens // 2)
+        with self._pipe_lock:
+            offsets = tokenizer(
+                text, add_special_tokens=False, return_offsets_mapping=True, truncation=False, verbose=False
+            )["offset_mapping"]
+        if len(offsets) <= window_tokens:
+            return [(0, len(text))] if force else None
+
+        def is_word_start(i):
+            # 子词 token 与前一个 token 相连，窗口边界不能落在单词内部
+            return i == 0 or i >= len(offsets) or offsets[i][0] > offsets[i - 1][1]
+
+        windows = []
+        start = 0
+        while True:
+            end = min(start + window_tokens, len(offsets))
+            while end < len(offsets) and end > start + 1 and not is_word_start(end):
+                end -= 1
+            windows.append((offsets[start][0], offsets[end - 1][1]))
+            if end >= len(offsets):
+                return windows
+            next_start = max(end - overlap_tokens, start + 1)
+            while next_start > start + 1 and not is_word_start(next_start):
+                next_start -= 1
+            start = next_start
+
+    @staticmethod
+    def _shift_entities(result, offset) -> List[Dict]:
+        """把窗口内的实体位置平移为原始文本中的位置"""
+        if isinstance(result, dict):
+            result = result.get('entities', [])
+        shifted = []
+        for entity in result:
+            entity = dict(entity)
+            entity['start'] += offset
+            entity['end'] += offset
+            shifted.append(entity)
+        return shifted
+
+    def _merge_window_entities(self, entities) -> List[Dict]:
+        """
+        合并各窗口的实体：重叠区域中重复或被窗口边界截断的实体，保留完整且得分最高的一个
+        """
+        for entity in entities:
+            entity['score'] = float(entity['score'])
+        return sorted(self._remove_overlapping_entities(entities), key=lambda x: x['start'])
+
+    def _postprocess(self, result, text, options, term_types):
+        """合并、去重并过滤模型输出的实体"""
         # 确保结果是实体列表
         if isinstance(result, dict):
             result = result.get('entities', [])
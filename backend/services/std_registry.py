@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+import threading
+import logging
+
+from services.std_service import StdService, DEFAULT_EMBEDDING_MODEL, DEFAULT_EMBEDDING_PROVIDER
+from config.service_config import STD_REGISTRY_CONFIG, VECTOR_BACKEND_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RegistryKey = Tuple[str, str, str, str, str]
+
+
+class _RegistryEntry:
+    """注册表中的单个条目，记录服务实例、引用计数和初始化状态"""
+    def __init__(self):
+        self.service: Optional[StdService] = None
+        self.error: Optional[Exception] = None
+        self.ref_count = 0
+        self.ready = threading.Event()
+
+
+class StdServiceRegistry:
+    """
+    进程级标准化服务注册表
+    按 (provider, model, db_path, collection_name, backend) 复用已加载的 StdService，
+    使用引用计数保护正在使用的实例，并对空闲实例做 LRU 淘汰
+    """
+    def __init__(self, max_size: int = STD_REGISTRY_CONFIG["max_size"]):
+        """
+        初始化注册表
+
+        Args:
+            max_size: 最多保留的服务实例数量，超出后淘汰最久未使用且空闲的实例
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[RegistryKey, _RegistryEntry]" = OrderedDict()
+
+    @staticmethod
+    def make_key(provider=None, model=None,
+                 db_path="db/financial_terms_minilm.db",
+                 collection_name="financial_terms",
+                 backend=None) -> RegistryKey:
+        """生成注册表键，未指定的参数使用与 StdService 相同的默认值"""
+        provider = (provider or DEFAULT_EMBEDDING_PROVIDER).lower()
+        model = model or DEFAULT_EMBEDDING_MODEL
+        backend = backend or VECTOR_BACKEND_CONFIG["default_backend"]
+        return (provider, model, db_path, collection_name, backend)
+
+    def acquire(self, provider=None, model=None,
+                db_path="db/financial_terms_minilm.db",
+                collection_name="financial_terms",
+                backend=None) -> StdService:
+        """
+        获取一个标准化服务实例并增加引用计数，使用完毕后必须调用 release
+
+        Args:
+            provider: 嵌入模型提供商
+            model: 嵌入模型名称
+            db_path: Milvus 数据库路径
+            collection_name: 集合名称
+            backend: 向量检索后端 (milvus/numpy)
+
+        Returns:
+            已加载的标准化服务实例
+
+        Raises:
+            Exception: 服务初始化失败时抛出原始异常
+        """
+        key = self.make_key(provider, model, db_path, collection_name, backend)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            creator = entry is None
+            if creator:
+                entry = _RegistryEntry()
+                self._entries[key] = entry
+            entry.ref_count += 1
+            self._entries.move_to_end(key)
+
+        if creator:
+            # 在锁外加载模型，避免阻塞其他键的获取
+            try:
+                entry.service = StdService(
+                    provider=key[0],
+                    model=key[1],
+                    db_path=key[2],
+                    collection_name=key[3],
+                    backend=key[4]
+                )
+                logger.info(f"标准化服务已加入注册表: {key}")
+            except Exception as e:
+                entry.error = e
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+            finally:
+                entry.ready.set()
+            self._evict()
+        else:
+            entry.ready.wait()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.service
+
+    def release(self, service: StdService):
+        """
+        归还服务实例，减少引用计数
+
+        Args:
+            service: 通过 acquire 获取的服务实例
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.service is service:
+                    entry.ref_count = max(entry.ref_count - 1, 0)
+                    break
+        self._evict()
+
+    @contextmanager
+    def lease(self, provider=None, model=None,
+              db_path="db/financial_terms_minilm.db",
+              collection_name="financial_terms",
+              backend=None):
+        """以上下文管理器的方式获取并自动归还服务实例"""
+        service = self.acquire(provider, model, db_path, collection_name, backend)
+        try:
+            yield service
+        finally:
+            self.release(service)
+
+    def _evict(self):
+        """淘汰超出容量的空闲实例（正在使用的实例不会被淘汰）"""
+        evicted = []
+        with self._lock:
+            overflow = len(self._entries) - self.max_size
+            if overflow <= 0:
+                return
+            for key, entry in list(self._entries.items()):
+                if overflow <= 0:
+                    break
+                if entry.ref_count == 0 and entry.ready.is_set():
+                    del self._entries[key]
+                    evicted.append((key, entry.service))
+                    overflow -= 1
+
+        for key, service in evicted:
+            logger.info(f"从注册表中淘汰标准化服务: {key}")
+            if service is not None:
+                service.close()
+
+    def clear(self):
+        """关闭并移除所有空闲实例"""
+        with self._lock:
+            idle = [(key, entry) for key, entry in self._entries.items()
+                    if entry.ref_count == 0 and entry.ready.is_set()]
+            for key, _ in idle:
+                del self._entries[key]
+        for _, entry in idle:
+            if entry.service is not None:
+                entry.service.close()
+
+    def stats(self) -> Dict:
+        """返回注册表当前状态，便于监控"""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "size": len(self._entries),
+                "entries": [
+                    {
+                        "provider": key[0],
+                        "model": key[1],
+                        "db_path": key[2],
+                        "collection_name": key[3],
+                        "backend": key[4],
+                        "ref_count": entry.ref_count,
+                        "loaded": entry.service is not None
+                    }
+                    for key, entry in self._entries.items()
+                ]
+            }
+
+
+# 进程级共享注册表
+std_registry = StdServiceRegistry()
@@ -1,9 +1,12 @@
-from pymilvus import MilvusClient
 from dotenv import load_dotenv
 from utils.embedding_factory import EmbeddingFactory
 from utils.embedding_config import EmbeddingProvider, EmbeddingConfig
+from utils.numpy_index import NumpyVectorIndex
+from utils.term_catalog import TermLexicon, load_terms
+from utils.bm25_index import BM25Index, reciprocal_rank_fusion
+from config.service_config import VECTOR_BACKEND_CONFIG, LEXICAL_CONFIG, HYBRID_SEARCH_CONFIG
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 
 # 尝试加载运行时配置
@@ -25,30 +28,43 @@ class StdService:
     金融术语标准化服务
     使用向量数据库进行金融术语的标准化和相似度搜索
     """
+    # 搜索结果中返回的术语字段
+    OUTPUT_FIELDS = ["term_id", "term_name", "term_type", "domain", "category"]
+
     def __init__(self,
                  provider=None,
                  model=None,
                  db_path="db/financial_terms_minilm.db",
-                 collection_name="financial_terms"):
+                 collection_name="financial_terms",
+                 backend=None):
         """
         初始化标准化服务
 
         Args:
-            provider: 嵌入模型提供商 (openai/bedrock/huggingface)
+            provider: 嵌入模型提供商 (openai/bedrock/huggingface/onnx)
             model: 使用的模型名称
             db_path: Milvus 数据库路径
             collection_name: 集合名称
+            backend: 向量检索后端 (milvus/numpy)，numpy 后端从 db_path 对应的 .npy 文件加载向量，不打开 Milvus
+
+        Raises:
+            ValueError: 当提供不支持的提供商或检索后端时
         """
         # 使用配置文件中的默认值
         if provider is None:
             provider = DEFAULT_EMBEDDING_PROVIDER
         if model is None:
             model = DEFAULT_EMBEDDING_MODEL
+        if backend is None:
+            backend = VECTOR_BACKEND_CONFIG["default_backend"]
+        if backend not in ("milvus", "numpy"):
+            raise ValueError(f"Unsupported vector backend: {backend}")
         # 根据 provider 字符串匹配正确的枚举值
         provider_mapping = {
             'openai': EmbeddingProvider.OPENAI,
             'bedrock': EmbeddingProvider.BEDROCK,
-            'huggingface': EmbeddingProvider.HUGGINGFACE
+            'huggingface': EmbeddingProvider.HUGGINGFACE,
+            'onnx': EmbeddingProvider.ONNX
         }
         
         # 创建 embedding 函数
@@ -61,10 +77,38 @@ class StdService:
             model_name=model
         )
         self.embedding_func = EmbeddingFactory.create_embedding_function(config)
-        
-        # 连接 Milvus
-        self.client = MilvusClient(db_path)
+        self.backend = backend
         self.collection_name = collection_name
+        self.lexicon = None
+        self.bm25 = None
+        self.bm25_terms = []
+        try:
+            self._build_term_indexes(collection_name)
+            self._open_index(db_path, model)
+        except Exception:
+            # 初始化失败时释放已获取的共享嵌入模型
+            self.close()
+            raise
+
+    def _open_index(self, db_path: str, model: str):
+        """打开向量检索后端（numpy 索引或 Milvus 集合）"""
+        if self.backend == "numpy":
+            # 进程内精确检索，不需要 Milvus 连接
+            self.index = NumpyVectorIndex(
+                db_path,
+                mmap=VECTOR_BACKEND_CONFIG["numpy_mmap"],
+                quantization=VECTOR_BACKEND_CONFIG["quantization"],
+                rescore_multiplier=VECTOR_BACKEND_CONFIG["rescore_multiplier"]
+            )
+            if self.index.model_name and self.index.model_name != model:
+                raise ValueError(
+                    f"NumPy 索引由模型 {self.index.model_name} 生成，与当前模型 {model} 不一致"
+                )
+            return
+
+        # 连接 Milvus（pymilvus 只在使用 milvus 后端时导入）
+        from pymilvus import MilvusClient
+        self.client = MilvusClient(db_path)
 
         # 加载集合（如果存在）
         try:
@@ -95,43 +139,196 @@ class StdService:
             - term_type: 术语类型
             - domain: 金融领域
             - category: 术语分类
-            - distance: 相似度距离
+            - distance: 相似度距离（混合检索中仅由 BM25 召回的术语为 None）
+            - match_type: 命中方式 (exact/normalized/variant/vector/hybrid)
+            - rrf_score: 混合检索的融合得分（仅 hybrid）
         """
+        # 术语名称直接命中时跳过向量检索
+        lexical_result = self._lexical_lookup(query, limit)
+        if lexical_result is not None:
+            return lexical_result
+
         # 获取查询的向量表示
         query_embedding = self.embedding_func.embed_query(query)
-        
+
+        # 搜索相似项
+        dense_hits = self._search_vectors([query_embedding], self._dense_limit(limit))[0]
+        return self._fuse_with_bm25(query, dense_hits, limit)
+
+    def search_similar_terms_batch(self, queries: List[str], limit: int = 5) -> List[List[Dict]]:
+        """
+        批量搜索多个查询文本的相似金融术语
+        对查询去重后一次性生成向量，并在一次 Milvus 搜索中完成所有查询
+
+        Args:
+            queries: 查询文本列表
+            limit: 每个查询返回结果的最大数量
+
+        Returns:
+            与 queries 顺序一一对应的结果列表，每项格式与 search_similar_terms 相同
+        """
+        if not queries:
+            return []
+
+        # 去重，保持首次出现的顺序
+        unique_queries = list(dict.fromkeys(queries))
+
+        # 术语名称直接命中的查询不再做向量检索
+        results_by_query = {}
+        for query in unique_queries:
+            lexical_result = self._lexical_lookup(query, limit)
+            if lexical_result is not None:
+                results_by_query[query] = lexical_result
+        vector_queries = [query for query in unique_queries if query not in results_by_query]
+
+        if vector_queries:
+            # 一次前向计算生成所有查询的向量
+            query_embeddings = self.embedding_func.embed_documents(vector_queries)
+
+            # 一次搜索请求完成所有查询
+            vector_results = self._search_vectors(query_embeddings, self._dense_limit(limit))
+            for query, dense_hits in zip(vector_queries, vector_results):
+                results_by_query[query] = self._fuse_with_bm25(query, dense_hits, limit)
+
+        return [results_by_query[query] for query in queries]
+
+    def _build_term_indexes(self, collection_name: str):
+        """基于术语表构建名称哈希索引和 BM25 索引，仅对金融术语集合启用"""
+        if collection_name not in LEXICAL_CONFIG["collections"]:
+            return
+        if not LEXICAL_CONFIG["enabled"] and not HYBRID_SEARCH_CONFIG["enabled"]:
+            return
+        try:
+            terms = load_terms(LEXICAL_CONFIG["terms_csv"])
+        except OSError as e:
+            logger.warning(f"术语文件读取失败，跳过术语名称匹配和 BM25 检索: {e}")
+            return
+
+        if LEXICAL_CONFIG["enabled"]:
+            self.lexicon = TermLexicon(terms)
+            logger.info(f"术语名称索引已构建: {len(self.lexicon)} 条")
+        if HYBRID_SEARCH_CONFIG["enabled"]:
+            self.bm25_terms = terms
+            self.bm25 = BM25Index(
+                [term["term_name"] for term in terms],
+                k1=HYBRID_SEARCH_CONFIG["bm25_k1"],
+                b=HYBRID_SEARCH_CONFIG["bm25_b"]
+            )
+            logger.info(f"BM25 索引已构建: {len(self.bm25.vocabulary)} 个词, {self.bm25.memory_bytes() / 1024:.0f} KB")
+
+    def _dense_limit(self, limit: int) -> int:
+        """向量检索的召回数量，混合检索时使用配置的 dense_top_k"""
+        if self.bm25 is None:
+            return limit
+        return max(limit, HYBRID_SEARCH_CONFIG["dense_top_k"])
+
+    def _fuse_with_bm25(self, query: str, dense_hits: List[Dict], limit: int) -> List[Dict]:
+        """
+        使用倒数排名融合合并向量检索和 BM25 检索结果
+
+        Args:
+            query: 查询文本
+            dense_hits: 向量检索结果
+            limit: 返回结果的最大数量
+
+        Returns:
+            融合后的术语列表；未启用 BM25 时直接返回向量检索结果
+        """
+        if self.bm25 is None:
+            return dense_hits[:limit]
+
+        sparse_hits = self.bm25.search(query, HYBRID_SEARCH_CONFIG["sparse_top_k"])
+        if not sparse_hits:
+            return dense_hits[:limit]
+
+        candidates = {hit["term_id"]: hit for hit in dense_hits}
+        for doc_id, _ in sparse_hits:
+            term = self.bm25_terms[doc_id]
+            if term["term_id"] not in candidates:
+                candidates[term["term_id"]] = self._format_term(term, None)
+
+        fused = reciprocal_rank_fusion(
+            [[hit["term_id"] for hit in dense_hits],
+             [self.bm25_terms[doc_id]["term_id"] for doc_id, _ in sparse_hits]],
+            [HYBRID_SEARCH_CONFIG["dense_weight"], HYBRID_SEARCH_CONFIG["sparse_weight"]],
+            k=HYBRID_SEARCH_CONFIG["rrf_k"]
+        )
+
+        results = []
+        for term_id, score in fused[:limit]:
+            result = dict(candidates[term_id])
+            result["match_type"] = "hybrid"
+            result["rrf_score"] = score
+            results.append(result)
+        return results
+
+    def _lexical_lookup(self, query: str, limit: int) -> Optional[List[Dict]]:
+        """
+        在术语名称索引中查找查询
+
+        Returns:
+            命中时返回距离为 1.0 的术语列表，未命中时返回 None
+        """
+        if self.lexicon is None:
+            return None
+        match_type, terms = self.lexicon.lookup(query)
+        if match_type is None:
+            return None
+        return [self._format_term(term, 1.0, match_type) for term in terms[:limit]]
+
+    def _search_vectors(self, vectors: List[List[float]], limit: int) -> List[List[Dict]]:
+        """
+        在 Milvus 集合中搜索一组查询向量
+
+        Args:
+            vectors: 查询向量列表
+            limit: 每个向量返回结果的最大数量
+
+        Returns:
+            与 vectors 顺序一一对应的结果列表
+        """
+        if self.backend == "numpy":
+            return [
+                [self._format_term(self.index.terms[idx], score) for idx, score in hits]
+                for hits in self.index.search(vectors, limit)
+            ]
+
         # 设置搜索参数
         search_params = {
             "collection_name": self.collection_name,
-            "data": [query_embedding],
+            "data": vectors,
             "limit": limit,
-            "output_fields": [
-                "term_id", "term_name", "term_type",
-                "domain", "category"
-            ],
+            "output_fields": self.OUTPUT_FIELDS,
             # "filter": "domain == 'Finance'"
         }
-        
-        # 搜索相似项
+
         search_result = self.client.search(**search_params)
 
-        results = []
-        for hit in search_result[0]:
-            results.append({
-                "concept_id": hit['entity'].get('concept_id'),
-                "concept_name": hit['entity'].get('concept_name'),
-                "domain_id": hit['entity'].get('domain_id'),
-                "vocabulary_id": hit['entity'].get('vocabulary_id'),
-                "concept_class_id": hit['entity'].get('concept_class_id'),
-                "standard_concept": hit['entity'].get('standard_concept'),
-                "concept_code": hit['entity'].get('concept_code'),
-                "synonyms": hit['entity'].get('synonyms'),
-                "distance": float(hit['distance'])
-            })
+        return [[self._format_hit(hit) for hit in hits] for hits in search_result]
 
-        return results
+    def _format_hit(self, hit: Dict) -> Dict:
+        """将 Milvus 搜索结果转换为接口返回的术语格式"""
+        return self._format_term(hit['entity'], hit['distance'])
+
+    def _format_term(self, term: Dict, distance: Optional[float], match_type: str = "vector") -> Dict:
+        """按接口返回格式组装术语信息、相似度和命中方式"""
+        result = {field: term.get(field) for field in self.OUTPUT_FIELDS}
+        result["distance"] = float(distance) if distance is not None else None
+        result["match_type"] = match_type
+        return result
 
-    def __del__(self):
-        """清理资源，释放集合"""
+    def close(self):
+        """
+        释放集合、关闭 Milvus 连接并释放对共享嵌入模型的引用
+        实例由 StdServiceRegistry 共享时，只应由注册表在淘汰时调用
+        """
+        if hasattr(self, 'embedding_func') and hasattr(self.embedding_func, 'close'):
+            self.embedding_func.close()
+        if hasattr(self, 'index'):
+            self.index = None
         if hasattr(self, 'client') and hasattr(self, 'collection_name'):
-            self.client.release_collection(self.collection_name)
\ No newline at end of file
+            try:
+                self.client.release_collection(self.collection_name)
+                self.client.close()
+            except Exception as e:
+                logger.warning(f"释放集合失败: {e}")
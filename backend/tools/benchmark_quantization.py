@@ -0,0 +1,71 @@
+"""
+向量压缩的召回率与内存对比
+对 export_numpy_index.py 生成的各模型索引，比较 int8 / binary 压缩（含 float 重排）相对 float32 精确检索的 recall@k
+
+查询向量取自索引中随机抽样的术语向量并加入高斯噪声（余弦约 0.8），避免查询与自身完全重合
+
+用法（在项目根目录运行）:
+    python3 backend/tools/benchmark_quantization.py --models lightweight balanced best
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.numpy_index import NumpyVectorIndex, normalize_rows
+from utils.quantization import quantized_bytes
+
+# 设置日志
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 与 export_numpy_index.py 一致的数据库名称
+DB_NAMES = {
+    "lightweight": "financial_terms_minilm",
+    "balanced": "financial_terms_mpnet",
+    "best": "financial_terms_bge_m3",
+}
+
+parser = argparse.ArgumentParser(description="向量压缩召回率与内存对比")
+parser.add_argument("--models", nargs="+", choices=DB_NAMES.keys(), default=list(DB_NAMES.keys()))
+parser.add_argument("--queries", type=int, default=500, help="查询数量")
+parser.add_argument("--k", type=int, default=5, help="recall@k")
+parser.add_argument("--multipliers", type=int, nargs="+", default=[4, 8, 16], help="重排候选倍数")
+parser.add_argument("--noise", type=float, default=0.75, help="查询噪声强度（相对单位向量）")
+args = parser.parse_args()
+
+rng = np.random.default_rng(42)
+
+print(f"{'model':<12}{'dim':>6}{'mode':>8}{'mult':>6}{'recall@' + str(args.k):>11}{'codes MB':>10}{'float MB':>10}{'ms/query':>10}")
+for model_choice in args.models:
+    db_path = f"backend/db/{DB_NAMES[model_choice]}.db"
+    try:
+        exact_index = NumpyVectorIndex(db_path)
+    except FileNotFoundError as e:
+        print(f"{model_choice:<12} 跳过: {e}")
+        continue
+
+    sample = rng.choice(len(exact_index), size=min(args.queries, len(exact_index)), replace=False)
+    base = np.asarray(exact_index.vectors[np.sort(sample)], dtype=np.float32)
+    noise = normalize_rows(rng.standard_normal(base.shape).astype(np.float32)) * args.noise
+    queries = normalize_rows(base + noise)
+
+    truth = [{idx for idx, _ in hits} for hits in exact_index.search(queries, args.k)]
+
+    settings = [("none", 1)] + [(mode, m) for mode in ("int8", "binary") for m in args.multipliers]
+    for quantization, multiplier in settings:
+        index = exact_index if quantization == "none" else NumpyVectorIndex(
+            db_path, quantization=quantization, rescore_multiplier=multiplier
+        )
+        start = time.perf_counter()
+        results = index.search(queries, args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        recall = np.mean([len(truth_set & {idx for idx, _ in hits}) / args.k
+                          for truth_set, hits in zip(truth, results)])
+        code_bytes, float_bytes = quantized_bytes(len(index), index.dimension, quantization)
+        print(f"{model_choice:<12}{index.dimension:>6}{quantization:>8}{multiplier:>6}{recall:>11.3f}"
+              f"{code_bytes / 1024 / 1024:>10.1f}{float_bytes / 1024 / 1024:>10.1f}{elapsed_ms:>10.3f}")
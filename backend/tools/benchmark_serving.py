@@ -0,0 +1,122 @@
+"""
+单进程与预先 fork 多进程模式的吞吐对比
+依次以不同的工作进程数启动 backend/main.py，等待 /readyz 就绪后用固定并发持续压测指定接口，
+输出每种模式的吞吐（请求/秒）和延迟分位数
+
+请求文本由术语表中随机抽取的术语拼接而成，并带上 X-Cache-Bypass 头，避免接口响应缓存影响结果；
+多进程模式需要 numpy 检索后端，对比时单进程模式应使用相同的后端
+
+用法（在项目根目录运行）:
+    python3 backend/tools/benchmark_serving.py --workers 1 2 4 --concurrency 32 --duration 60
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(BACKEND_DIR)
+from config.service_config import RESPONSE_CACHE_CONFIG
+
+parser = argparse.ArgumentParser(description="单进程与多进程服务吞吐对比")
+parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="要对比的工作进程数")
+parser.add_argument("--threads-per-worker", type=int, default=None, help="每个工作进程的算子内线程数，默认按 CPU 拓扑规划")
+parser.add_argument("--endpoint", default="/api/std", choices=["/api/std", "/api/ner"], help="压测接口")
+parser.add_argument("--concurrency", type=int, default=32, help="并发请求数")
+parser.add_argument("--duration", type=float, default=60, help="每种模式的压测时长（秒）")
+parser.add_argument("--warmup", type=int, default=20, help="正式压测前的预热请求数")
+parser.add_argument("--port", type=int, default=8800, help="压测使用的端口")
+parser.add_argument("--ready-timeout", type=float, default=900, help="等待服务就绪的最长时间（秒）")
+parser.add_argument("--file", default="万条金融标准术语.csv", help="金融术语 CSV 文件路径")
+args = parser.parse_args()
+
+terms = pd.read_csv(args.file, names=['term_name', 'term_type'], dtype=str, low_memory=False)['term_name'].dropna().tolist()
+rng = random.Random(42)
+
+
+def make_payload() -> dict:
+    """由 3 个随机术语拼成一段文本"""
+    text = f"The company reported {rng.choice(terms)}, {rng.choice(terms)} and {rng.choice(terms)} this quarter."
+    return {"text": text, "options": {"allFinancialTerms": True}, "termTypes": {"allFinancialTerms": True}}
+
+
+def start_server(workers: int) -> subprocess.Popen:
+    command = [sys.executable, "main.py", "--port", str(args.port), "--workers", str(workers)]
+    if args.threads_per_worker:
+        command += ["--threads-per-worker", str(args.threads_per_worker)]
+    # 放在独立的进程组中，结束时一起终止
+    return subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def stop_server(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_ready(process: subprocess.Popen, base_url: str):
+    deadline = time.time() + args.ready_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务启动失败，退出码 {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    raise TimeoutError("等待服务就绪超时")
+
+
+async def run_load(base_url: str):
+    headers = {RESPONSE_CACHE_CONFIG["bypass_header"]: "1"}
+    latencies = []
+    errors = 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        for _ in range(args.warmup):
+            await client.post(args.endpoint, json=make_payload(), headers=headers)
+
+        deadline = time.perf_counter() + args.duration
+
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(args.endpoint, json=make_payload(), headers=headers)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+cpu_count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+print(f"CPU 核心数: {cpu_count}，接口: {args.endpoint}，并发: {args.concurrency}，时长: {args.duration}s")
+print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+base_url = f"http://127.0.0.1:{args.port}"
+for workers in args.workers:
+    process = start_server(workers)
+    try:
+        wait_ready(process, base_url)
+        latencies, errors, elapsed = asyncio.run(run_load(base_url))
+    finally:
+        stop_server(process)
+    ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"{workers:>8}{len(latencies) / elapsed:>10.1f}{np.percentile(ms, 50):>10.1f}"
+          f"{np.percentile(ms, 95):>10.1f}{np.percentile(ms, 99):>10.1f}{errors:>8}")
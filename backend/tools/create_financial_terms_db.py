@@ -1,3 +1,27 @@
+"""
+构建金融术语 Milvus 集合
+默认删除并重建 financial_terms 集合，CSV 分块读取、嵌入和插入作为重叠执行的流水线阶段（utils/build_pipeline.py），
+批大小按实测嵌入吞吐自适应调整，结束时输出各阶段每秒处理的行数。
+全量构建把嵌入结果写入检查点（backend/db/<数据库名>.build.npy / .build.json），中断后重新运行时从上次完成的批继续，
+失败的批在本次运行中重试，仍失败时保留检查点并以非零状态退出；
+--sync 模式按行内容哈希与上次构建的清单（backend/db/<数据库名>.sync.json）比较，
+只嵌入新增或内容变化的行，删除已移除的行，行号变化但内容不变的行复用集合中已有的向量。
+--models 模式只解析一次术语 CSV，每个模型在独立的工作进程中并行构建各自的数据库，结束时输出一致性报告
+
+用法（在项目根目录运行）:
+    python3 backend/tools/create_financial_terms_db.py --model lightweight
+    python3 backend/tools/create_financial_terms_db.py --model lightweight --sync
+    python3 backend/tools/create_financial_terms_db.py --model lightweight --restart   # 忽略检查点重新构建
+    python3 backend/tools/create_financial_terms_db.py --models lightweight balanced best
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from pymilvus import MilvusClient, DataType, FieldSchema, CollectionSchema
 import pandas as pd
 from tqdm import tqdm
@@ -7,6 +31,15 @@ from sentence_transformers import SentenceTransformer
 import torch
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.index_sync import row_hash, load_manifest, save_manifest, plan_sync
+from utils.build_pipeline import (
+    BuildPipeline, AdaptiveBatchSize, iter_csv_chunks, iter_frame_chunks, filter_chunks, count_csv_rows,
+    log_pipeline_report
+)
+from utils.build_checkpoint import BuildCheckpoint, checkpointed_build, file_sha1
+from utils.cpu_topology import plan_topology, apply_topology
+
 load_dotenv()
 
 # 设置日志
@@ -16,168 +49,508 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # 选项1: BGE-M3 (2.27GB) - 最佳效果
 # 选项2: all-MiniLM-L6-v2 (90MB) - 轻量快速
 # 选项3: all-mpnet-base-v2 (420MB) - 平衡选择
+MODEL_CHOICES = {
+    "best": ("BAAI/bge-m3", "backend/db/financial_terms_bge_m3.db"),
+    "lightweight": ("sentence-transformers/all-MiniLM-L6-v2", "backend/db/financial_terms_minilm.db"),
+    "balanced": ("sentence-transformers/all-mpnet-base-v2", "backend/db/financial_terms_mpnet.db"),
+}
 
+# 默认模型，命令行 --model 优先（quick_setup.py / start_macos.py 通过改写这一行切换模型）
 model_choice = "lightweight"  # 可选: "best", "lightweight", "balanced"
 
-if model_choice == "best":
-    model_name = 'BAAI/bge-m3'
-elif model_choice == "lightweight":
-    model_name = 'sentence-transformers/all-MiniLM-L6-v2'
-else:  # balanced
-    model_name = 'sentence-transformers/all-mpnet-base-v2'
+collection_name = "financial_terms"
 
-# 创建SentenceTransformer嵌入函数
-device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
-embedding_model = SentenceTransformer(model_name, device=device)
+# Milvus 过滤表达式中每次列出的 term_id 数量
+FILTER_CHUNK_SIZE = 1000
 
-def embedding_function(texts):
-    """嵌入函数，将文本转换为向量"""
-    if isinstance(texts, str):
-        texts = [texts]
-    embeddings = embedding_model.encode(texts, convert_to_numpy=True)
-    return embeddings.tolist() if len(texts) > 1 else embeddings[0].tolist()
+# 示例查询 - 测试金融术语搜索
+TEST_QUERIES = ["investment", "bank", "loan", "stock", "bond"]
 
-print(f"使用嵌入模型: {model_name}")
 
-# 文件路径
-file_path = "万条金融标准术语.csv"
+def add_term_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """按行号生成 term_id（规则与 utils/term_catalog.py 一致），并计算内容哈希"""
+    chunk = chunk.copy()
+    chunk['term_id'] = [f"FIN_{idx:06d}" for idx in chunk.index]
+    chunk['hash'] = [row_hash(name, term_type) for name, term_type in zip(chunk['term_name'], chunk['term_type'])]
+    return chunk
 
-# 根据模型选择确定数据库路径
-if model_choice == "best":
-    db_path = "backend/db/financial_terms_bge_m3.db"
-elif model_choice == "lightweight":
-    db_path = "backend/db/financial_terms_minilm.db"
-else:  # balanced
-    db_path = "backend/db/financial_terms_mpnet.db"
 
-# 连接到 Milvus
-client = MilvusClient(db_path)
+def iter_term_chunks(path: str):
+    """分块读取术语 CSV，每块带 term_id 和内容哈希"""
+    for chunk in iter_csv_chunks(path):
+        yield add_term_columns(chunk)
 
-collection_name = "financial_terms"
 
-# 加载数据
-logging.info("Loading financial terms data from CSV")
-df = pd.read_csv(file_path, 
-                 names=['term_name', 'term_type'],  # 指定列名
-                 dtype=str, 
-                 low_memory=False,
-                 ).fillna("NA")
-
-logging.info(f"Loaded {len(df)} financial terms")
-
-# 获取向量维度（使用一个样本文档）
-sample_doc = "Sample Financial Term"
-sample_embedding = embedding_function(sample_doc)
-vector_dim = len(sample_embedding)
-logging.info(f"Vector dimension: {vector_dim}")
-
-# 构造Schema - 适配金融术语结构
-fields = [
-    FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-    FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=vector_dim), # BGE-m3 向量
-    FieldSchema(name="term_id", dtype=DataType.VARCHAR, max_length=50),  # 术语ID
-    FieldSchema(name="term_name", dtype=DataType.VARCHAR, max_length=200),  # 术语名称
-    FieldSchema(name="term_type", dtype=DataType.VARCHAR, max_length=20),  # 术语类型 (FINTERM)
-    FieldSchema(name="domain", dtype=DataType.VARCHAR, max_length=50),  # 金融领域
-    FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=50),  # 术语分类
-    FieldSchema(name="input_file", dtype=DataType.VARCHAR, max_length=500),
-]
-schema = CollectionSchema(fields, 
-                          "Financial Terms Collection", 
-                          enable_dynamic_field=True)
-
-# 如果集合存在，先删除
-if client.has_collection(collection_name):
-    client.drop_collection(collection_name)
-    logging.info(f"Dropped existing collection: {collection_name}")
-
-# 创建集合
-client.create_collection(
-    collection_name=collection_name,
-    schema=schema,
-)
-logging.info(f"Created new collection: {collection_name}")
-
-# 在创建集合后添加索引
-index_params = client.prepare_index_params()
-index_params.add_index(
-    field_name="vector",  # 指定要为哪个字段创建索引，这里是向量字段
-    index_type="AUTOINDEX",  # 使用自动索引类型，Milvus会根据数据特性选择最佳索引
-    metric_type="COSINE",  # 使用余弦相似度作为向量相似度度量方式
-    params={"nlist": 1024}  # 索引参数：nlist表示聚类中心的数量，值越大检索精度越高但速度越慢
-)
+def load_terms(path: str) -> pd.DataFrame:
+    """读取整个术语 CSV（增量同步需要与清单整体比较，多模型构建只解析一次）"""
+    logging.info("Loading financial terms data from CSV")
+    df = pd.concat(list(iter_term_chunks(path)))
+    logging.info(f"Loaded {len(df)} financial terms")
+    return df
 
-client.create_index(
-    collection_name=collection_name,
-    index_params=index_params
-)
-logging.info("Created vector index")
-
-# 批量处理
-batch_size = 1024
-
-for start_idx in tqdm(range(0, len(df), batch_size), desc="Processing financial terms batches"):
-    end_idx = min(start_idx + batch_size, len(df))
-    batch_df = df.iloc[start_idx:end_idx]
-
-    # 准备文档 - 金融术语
-    docs = []
-    for _, row in batch_df.iterrows():
-        # 使用术语名称作为文档内容
-        docs.append(row['term_name'])
-
-    # 生成嵌入
-    try:
-        embeddings = embedding_function(docs)
-        logging.info(f"Generated embeddings for batch {start_idx // batch_size + 1}")
-    except Exception as e:
-        logging.error(f"Error generating embeddings for batch {start_idx // batch_size + 1}: {e}")
-        continue
-
-    # 准备数据 - 金融术语
-    data = [
-        {
-            "vector": embeddings[idx],
-            "term_id": f"FIN_{start_idx + idx:06d}",  # 生成术语ID
-            "term_name": str(row['term_name']),
-            "term_type": str(row['term_type']),
-            "domain": "Finance",  # 统一设为金融领域
-            "category": "Standard",  # 标准术语
-            "input_file": file_path
-        } for idx, (_, row) in enumerate(batch_df.iterrows())
-    ]
-
-    # 插入数据 - 批量插入金融术语
-    try:
-        res = client.insert(
+
+def term_filter(term_ids) -> str:
+    """按 term_id 列表构造过滤表达式"""
+    return "term_id in [" + ", ".join(f'"{term_id}"' for term_id in term_ids) + "]"
+
+
+class QueueProgress:
+    """工作进程中代替 tqdm：把进度事件发给主进程，由主进程统一显示每个模型的进度条"""
+    def __init__(self, progress_queue, choice: str, total, initial: int = 0):
+        self.progress_queue = progress_queue
+        self.choice = choice
+        self.progress_queue.put(("start", choice, total, initial))
+
+    def update(self, rows: int):
+        self.progress_queue.put(("update", self.choice, rows))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FinancialTermsIndexBuilder:
+    """
+    单个嵌入模型的金融术语集合构建
+    术语默认从 CSV 分块读取；多模型构建时使用主进程已解析好的 DataFrame，不再重复读取和计算哈希
+    """
+    def __init__(self, choice: str, file_path: str, batch_size=None, restart: bool = False,
+                 terms: pd.DataFrame = None, source_sha1: str = None, progress_queue=None):
+        """
+        Args:
+            choice: 模型选择（MODEL_CHOICES 的键）
+            file_path: 金融术语 CSV 文件路径
+            batch_size: 固定的嵌入批大小，None 表示按实测吞吐自适应
+            restart: 忽略未完成构建的检查点
+            terms: 已解析的术语（带 term_id 和 hash 列），None 时从 CSV 读取
+            source_sha1: CSV 文件的 SHA-1，None 时自行计算
+            progress_queue: 向主进程报告进度的队列，None 时在本进程显示进度条
+        """
+        self.choice = choice
+        self.model_name, self.db_path = MODEL_CHOICES[choice]
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.restart = restart
+        self.terms = terms
+        self.source_sha1 = source_sha1
+        self.progress_queue = progress_queue
+
+        # 创建SentenceTransformer嵌入函数
+        device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+        self.embedding_model = SentenceTransformer(self.model_name, device=device)
+        print(f"使用嵌入模型: {self.model_name}")
+
+        # 连接到 Milvus
+        self.client = MilvusClient(self.db_path)
+
+        # 获取向量维度（使用一个样本文档）
+        self.vector_dim = len(self.embedding_function("Sample Financial Term"))
+        logging.info(f"Vector dimension: {self.vector_dim}")
+
+    def embedding_function(self, texts):
+        """嵌入函数，将文本转换为向量"""
+        if isinstance(texts, str):
+            texts = [texts]
+        embeddings = self.embedding_model.encode(texts, convert_to_numpy=True)
+        return embeddings.tolist() if len(texts) > 1 else embeddings[0].tolist()
+
+    def embed_batch(self, texts):
+        """批量嵌入，返回 float32 矩阵（直接交给 Milvus，不转换为 Python 列表）"""
+        return self.embedding_model.encode(texts, convert_to_numpy=True).astype(np.float32, copy=False)
+
+    def term_chunks(self):
+        """术语块迭代器：有已解析的术语时直接切分，否则分块读取 CSV"""
+        if self.terms is not None:
+            return iter_frame_chunks(self.terms)
+        return iter_term_chunks(self.file_path)
+
+    def progress(self, total, desc: str, initial: int = 0):
+        if self.progress_queue is not None:
+            return QueueProgress(self.progress_queue, self.choice, total, initial)
+        return tqdm(total=total, initial=initial, desc=desc, unit="rows")
+
+    def adaptive_batch_size(self) -> AdaptiveBatchSize:
+        return AdaptiveBatchSize(initial=self.batch_size, adaptive=self.batch_size is None)
+
+    def create_collection(self):
+        """删除并重新创建集合和向量索引"""
+        client = self.client
+        # 构造Schema - 适配金融术语结构
+        fields = [
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+            FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=self.vector_dim), # BGE-m3 向量
+            FieldSchema(name="term_id", dtype=DataType.VARCHAR, max_length=50),  # 术语ID
+            FieldSchema(name="term_name", dtype=DataType.VARCHAR, max_length=200),  # 术语名称
+            FieldSchema(name="term_type", dtype=DataType.VARCHAR, max_length=20),  # 术语类型 (FINTERM)
+            FieldSchema(name="domain", dtype=DataType.VARCHAR, max_length=50),  # 金融领域
+            FieldSchema(name="category", dtype=DataType.VARCHAR, max_length=50),  # 术语分类
+            FieldSchema(name="input_file", dtype=DataType.VARCHAR, max_length=500),
+        ]
+        schema = CollectionSchema(fields,
+                                  "Financial Terms Collection",
+                                  enable_dynamic_field=True)
+
+        # 如果集合存在，先删除
+        if client.has_collection(collection_name):
+            client.drop_collection(collection_name)
+            logging.info(f"Dropped existing collection: {collection_name}")
+
+        # 创建集合
+        client.create_collection(
+            collection_name=collection_name,
+            schema=schema,
+        )
+        logging.info(f"Created new collection: {collection_name}")
+
+        # 在创建集合后添加索引
+        index_params = client.prepare_index_params()
+        index_params.add_index(
+            field_name="vector",  # 指定要为哪个字段创建索引，这里是向量字段
+            index_type="AUTOINDEX",  # 使用自动索引类型，Milvus会根据数据特性选择最佳索引
+            metric_type="COSINE",  # 使用余弦相似度作为向量相似度度量方式
+            params={"nlist": 1024}  # 索引参数：nlist表示聚类中心的数量，值越大检索精度越高但速度越慢
+        )
+
+        client.create_index(
+            collection_name=collection_name,
+            index_params=index_params
+        )
+        logging.info("Created vector index")
+
+    def delete_rows(self, rows):
+        """按行号删除集合中的术语"""
+        term_ids = [f"FIN_{idx:06d}" for idx in rows]
+        for start_idx in range(0, len(term_ids), FILTER_CHUNK_SIZE):
+            self.client.delete(collection_name=collection_name,
+                               filter=term_filter(term_ids[start_idx:start_idx + FILTER_CHUNK_SIZE]))
+
+    def insert_rows(self, batch_df: pd.DataFrame, embeddings):
+        """插入一批术语行，embeddings 与 batch_df 逐行对应"""
+        # 准备数据 - 金融术语
+        data = [
+            {
+                "vector": embedding,
+                "term_id": term_id,
+                "term_name": str(term_name),
+                "term_type": str(term_type),
+                "domain": "Finance",  # 统一设为金融领域
+                "category": "Standard",  # 标准术语
+                "input_file": self.file_path
+            } for embedding, term_id, term_name, term_type in zip(
+                embeddings, batch_df['term_id'], batch_df['term_name'], batch_df['term_type'])
+        ]
+
+        # 插入数据 - 批量插入金融术语
+        self.client.insert(
             collection_name=collection_name,
             data=data
         )
-        logging.info(f"Inserted batch {start_idx // batch_size + 1}, result: {res}")
-    except Exception as e:
-        logging.error(f"Error inserting batch {start_idx // batch_size + 1}: {e}")
 
-logging.info("Financial terms insert process completed.")
+    def embed_and_insert(self, chunks, desc: str, total=None) -> dict:
+        """
+        通过构建流水线嵌入并插入术语行，使用术语名称作为文档内容
 
-# 示例查询 - 测试金融术语搜索
-test_queries = ["investment", "bank", "loan", "stock", "bond"]
-
-for query in test_queries:
-    query_embedding = embedding_function(query)
-
-    # 搜索余弦相似度最高的金融术语
-    search_result = client.search(
-        collection_name=collection_name,
-        data=[query_embedding],
-        limit=3,
-        output_fields=["term_name",
-                       "term_type",
-                       "domain",
-                       "category"
-                       ]
-    )
-    logging.info(f"Search result for '{query}': {[hit['entity']['term_name'] for hit in search_result[0]]}")
-
-# 统计信息
-stats = client.get_collection_stats(collection_name)
-logging.info(f"Collection stats: {stats}")
+        Args:
+            chunks: 带 term_id 和 hash 列的 DataFrame 块
+            desc: 进度条描述
+            total: 总行数（未知时为 None）
+
+        Returns:
+            成功写入的行的 term_id -> 内容哈希
+        """
+        written = {}
+
+        def insert(batch_df, vectors):
+            self.insert_rows(batch_df, vectors)
+            written.update(zip(batch_df['term_id'], batch_df['hash']))
+
+        with self.progress(total, desc) as progress:
+            pipeline = BuildPipeline(self.embed_batch, insert, batch_size=self.adaptive_batch_size(),
+                                     progress=progress.update)
+            report = pipeline.run(chunks)
+        log_pipeline_report(report)
+        return written
+
+    def full_build(self) -> bool:
+        """
+        删除并重建集合，嵌入全部术语；存在匹配的检查点时从检查点继续
+
+        Returns:
+            是否所有行都已写入
+        """
+        fingerprint = {
+            "source": self.source_sha1 or file_sha1(self.file_path),
+            "model": self.model_name,
+            "collection": collection_name
+        }
+        total_rows = len(self.terms) if self.terms is not None else count_csv_rows(self.file_path)
+        checkpoint = BuildCheckpoint.open(self.db_path, total_rows, self.vector_dim, fingerprint, restart=self.restart)
+        if checkpoint.resumed and not self.client.has_collection(collection_name):
+            logging.info("Checkpoint found but the collection is missing, starting over")
+            checkpoint = BuildCheckpoint.open(self.db_path, total_rows, self.vector_dim, fingerprint, restart=True)
+        if checkpoint.resumed:
+            logging.info(f"Resuming build from checkpoint: {int(checkpoint.inserted.sum())}/{total_rows} rows already inserted")
+        else:
+            self.create_collection()
+
+        with self.progress(total_rows, "Processing financial terms", initial=int(checkpoint.inserted.sum())) as progress:
+            report = checkpointed_build(checkpoint, self.term_chunks, self.embed_batch, self.insert_rows,
+                                        delete=self.delete_rows, batch_size=self.adaptive_batch_size(),
+                                        progress=progress.update)
+
+        # 清单只记录已写入的行，失败的行下次同步或续建时补齐
+        written = {}
+        for chunk in filter_chunks(self.term_chunks(), checkpoint.inserted):
+            written.update(zip(chunk['term_id'], chunk['hash']))
+        save_manifest(self.db_path, collection_name, self.model_name, self.vector_dim, written)
+        logging.info(f"Financial terms insert process completed: {len(written)}/{total_rows} rows written, "
+                     f"{report['reused_vectors']} rows inserted from checkpointed vectors.")
+        if report["failed_rows"]:
+            return False
+        checkpoint.remove()
+        return True
+
+    def fetch_vectors(self, term_ids) -> dict:
+        """从集合中读取指定 term_id 的向量"""
+        vectors = {}
+        for start_idx in range(0, len(term_ids), FILTER_CHUNK_SIZE):
+            chunk = term_ids[start_idx:start_idx + FILTER_CHUNK_SIZE]
+            for row in self.client.query(collection_name=collection_name, filter=term_filter(chunk),
+                                         output_fields=["term_id", "vector"]):
+                vectors[row["term_id"]] = row["vector"]
+        return vectors
+
+    def sync_build(self) -> bool:
+        """
+        按内容哈希增量同步集合，清单缺失、模型或维度变化、集合不存在时退回全量重建
+
+        Returns:
+            是否所有行都已同步
+        """
+        manifest = load_manifest(self.db_path)
+        if manifest is None or not self.client.has_collection(collection_name):
+            logging.info("No usable manifest or collection, falling back to a full rebuild")
+            return self.full_build()
+        if manifest["model"] != self.model_name or manifest["dimension"] != self.vector_dim:
+            logging.info(f"Manifest was built with {manifest['model']} ({manifest['dimension']} dims), "
+                         f"falling back to a full rebuild")
+            return self.full_build()
+
+        df = self.terms if self.terms is not None else load_terms(self.file_path)
+        old_hashes = manifest["hashes"]
+        new_hashes = dict(zip(df['term_id'], df['hash']))
+        plan = plan_sync(old_hashes, new_hashes)
+        logging.info(f"Sync plan: {len(plan['unchanged'])} unchanged, {len(plan['embed'])} to embed, "
+                     f"{len(plan['reuse'])} to re-insert with existing vectors, {len(plan['delete'])} to delete")
+
+        # 删除之前先读取要复用的向量（来源行可能也在删除列表中）
+        source_vectors = self.fetch_vectors(sorted({source for _, source in plan['reuse']}))
+
+        for start_idx in range(0, len(plan['delete']), FILTER_CHUNK_SIZE):
+            chunk = plan['delete'][start_idx:start_idx + FILTER_CHUNK_SIZE]
+            self.client.delete(collection_name=collection_name, filter=term_filter(chunk))
+        hashes = {term_id: old_hashes[term_id] for term_id in plan['unchanged']}
+
+        rows = df.set_index('term_id', drop=False)
+        reuse = [(term_id, source) for term_id, source in plan['reuse'] if source in source_vectors]
+        if len(reuse) < len(plan['reuse']):
+            # 清单中有但集合中缺失的向量，改为重新嵌入
+            missing = [term_id for term_id, source in plan['reuse'] if source not in source_vectors]
+            logging.warning(f"{len(missing)} vectors listed in the manifest are missing from the collection, re-embedding")
+            plan['embed'].extend(missing)
+        for start_idx in range(0, len(reuse), FILTER_CHUNK_SIZE):
+            batch = reuse[start_idx:start_idx + FILTER_CHUNK_SIZE]
+            batch_df = rows.loc[[term_id for term_id, _ in batch]]
+            try:
+                self.insert_rows(batch_df, [source_vectors[source] for _, source in batch])
+                hashes.update(zip(batch_df['term_id'], batch_df['hash']))
+            except Exception as e:
+                logging.error(f"Error re-inserting {len(batch_df)} rows with existing vectors: {e}")
+
+        embed_rows = df[df['term_id'].isin(set(plan['embed']))]
+        hashes.update(self.embed_and_insert(iter_frame_chunks(embed_rows), "Embedding new or changed financial terms",
+                                            total=len(embed_rows)))
+
+        # 写入失败的行不记入清单，下次同步时重试
+        save_manifest(self.db_path, collection_name, self.model_name, self.vector_dim, hashes)
+        logging.info(f"Financial terms sync completed: {len(hashes)}/{len(df)} rows in sync.")
+        return len(hashes) == len(df)
+
+    def collection_row_count(self) -> int:
+        """集合中的行数（count(*) 不含已删除的行，不支持时退回集合统计）"""
+        try:
+            result = self.client.query(collection_name=collection_name, filter="", output_fields=["count(*)"])
+            return int(result[0]["count(*)"])
+        except Exception:
+            return int(self.client.get_collection_stats(collection_name)["row_count"])
+
+    def summary(self, build_ok: bool, seconds: float) -> dict:
+        """构建结果概要，用于多模型构建的一致性报告"""
+        manifest = load_manifest(self.db_path) or {}
+        return {
+            "model": self.choice,
+            "model_name": self.model_name,
+            "db_path": self.db_path,
+            "dimension": self.vector_dim,
+            "manifest_dimension": manifest.get("dimension"),
+            "manifest_rows": manifest.get("count"),
+            "collection_rows": self.collection_row_count(),
+            "build_ok": build_ok,
+            "seconds": round(seconds, 1)
+        }
+
+    def run_test_queries(self):
+        for query in TEST_QUERIES:
+            query_embedding = self.embedding_function(query)
+
+            # 搜索余弦相似度最高的金融术语
+            search_result = self.client.search(
+                collection_name=collection_name,
+                data=[query_embedding],
+                limit=3,
+                output_fields=["term_name",
+                               "term_type",
+                               "domain",
+                               "category"
+                               ]
+            )
+            logging.info(f"Search result for '{query}': {[hit['entity']['term_name'] for hit in search_result[0]]}")
+
+        # 统计信息
+        stats = self.client.get_collection_stats(collection_name)
+        logging.info(f"Collection stats: {stats}")
+
+
+def build_model_worker(choice: str, options: dict, terms: pd.DataFrame, source_sha1: str,
+                       topology: dict, worker_id: int, progress_queue) -> dict:
+    """多模型构建的工作进程：按 CPU 拓扑限制本进程的线程数，然后构建一个模型的数据库"""
+    logging.basicConfig(level=logging.INFO, force=True,
+                        format=f'%(asctime)s - {choice} - %(levelname)s - %(message)s')
+    apply_topology(topology, worker_id=worker_id)
+    started = time.perf_counter()
+    builder = FinancialTermsIndexBuilder(choice, options["file"], batch_size=options["batch_size"],
+                                         restart=options["restart"], terms=terms, source_sha1=source_sha1,
+                                         progress_queue=progress_queue)
+    build_ok = builder.sync_build() if options["sync"] else builder.full_build()
+    return builder.summary(build_ok, time.perf_counter() - started)
+
+
+def build_models(choices, options: dict) -> bool:
+    """
+    单次解析、多模型并行构建
+
+    主进程只读取一次术语 CSV 并计算行哈希和文件 SHA-1，每个模型在独立的工作进程中构建各自的数据库
+    （CPU 按 plan_topology 在工作进程之间均分），主进程显示每个模型的进度，结束后检查各数据库的行数和向量维度
+
+    Args:
+        choices: 模型选择列表（MODEL_CHOICES 的键）
+        options: file / batch_size / sync / restart
+
+    Returns:
+        所有数据库是否构建完整且一致
+    """
+    terms = load_terms(options["file"])
+    source_sha1 = file_sha1(options["file"])
+    topology = plan_topology(workers=len(choices))
+    # torch 在 fork 出的子进程中不安全，工作进程使用 spawn 启动
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager()
+    progress_queue = manager.Queue()
+
+    bars = {}
+    results = {}
+    with ProcessPoolExecutor(max_workers=len(choices), mp_context=context) as pool:
+        futures = {
+            pool.submit(build_model_worker, choice, options, terms, source_sha1, topology, worker_id,
+                        progress_queue): choice
+            for worker_id, choice in enumerate(choices)
+        }
+        while True:
+            try:
+                event = progress_queue.get(timeout=0.2)
+            except queue.Empty:
+                if all(future.done() for future in futures):
+                    break
+                continue
+            if event[0] == "start":
+                _, choice, total, initial = event
+                if choice in bars:
+                    # 增量同步退回全量构建等情况下同一模型会开始新的阶段
+                    bars[choice].close()
+                bars[choice] = tqdm(total=total, initial=initial, desc=choice, unit="rows",
+                                    position=choices.index(choice))
+            else:
+                _, choice, rows = event
+                bars[choice].update(rows)
+        for bar in bars.values():
+            bar.close()
+        for future, choice in futures.items():
+            try:
+                results[choice] = future.result()
+            except Exception as e:
+                logging.error(f"Build for {choice} failed: {e}")
+                results[choice] = {"model": choice, "error": str(e)}
+    manager.shutdown()
+
+    return report_consistency(choices, results, len(terms))
+
+
+def report_consistency(choices, results: dict, expected_rows: int) -> bool:
+    """
+    输出多模型构建的一致性报告：集合和清单的行数与术语表一致，清单记录的向量维度与模型一致
+
+    Returns:
+        所有数据库是否一致
+    """
+    print(f"\n{'model':<12}{'dimension':>10}{'rows':>9}{'manifest':>10}{'seconds':>9}  status")
+    consistent = True
+    for choice in choices:
+        result = results[choice]
+        if "error" in result:
+            consistent = False
+            print(f"{choice:<12}{'-':>10}{'-':>9}{'-':>10}{'-':>9}  error: {result['error']}")
+            continue
+        problems = []
+        if not result["build_ok"]:
+            problems.append("failed rows")
+        if result["collection_rows"] != expected_rows:
+            problems.append(f"collection has {result['collection_rows']} rows")
+        if result["manifest_rows"] != expected_rows:
+            problems.append(f"manifest has {result['manifest_rows']} rows")
+        if result["manifest_dimension"] != result["dimension"]:
+            problems.append(f"manifest dimension {result['manifest_dimension']}")
+        consistent = consistent and not problems
+        print(f"{choice:<12}{result['dimension']:>10}{result['collection_rows']:>9}{str(result['manifest_rows']):>10}"
+              f"{result['seconds']:>9}  {'; '.join(problems) or 'ok'}")
+    print(f"expected rows: {expected_rows}, {'all databases consistent' if consistent else 'INCONSISTENT'}")
+    return consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建金融术语 Milvus 集合")
+    parser.add_argument("--model", choices=MODEL_CHOICES.keys(), default=model_choice, help="嵌入模型选择")
+    parser.add_argument("--models", nargs="+", choices=MODEL_CHOICES.keys(), default=None,
+                        help="并行构建多个模型的数据库（术语 CSV 只解析一次，每个模型一个工作进程）")
+    parser.add_argument("--file", default="万条金融标准术语.csv", help="金融术语 CSV 文件路径")
+    parser.add_argument("--batch-size", type=int, default=None, help="固定的嵌入批大小，默认按实测吞吐自适应")
+    parser.add_argument("--sync", action="store_true", help="增量同步：只嵌入新增或变化的行，删除已移除的行")
+    parser.add_argument("--restart", action="store_true", help="忽略未完成构建的检查点，重新开始全量构建")
+    args = parser.parse_args()
+
+    if args.models:
+        options = {"file": args.file, "batch_size": args.batch_size, "sync": args.sync, "restart": args.restart}
+        build_ok = build_models(list(dict.fromkeys(args.models)), options)
+    else:
+        builder = FinancialTermsIndexBuilder(args.model, args.file, batch_size=args.batch_size, restart=args.restart)
+        build_ok = builder.sync_build() if args.sync else builder.full_build()
+        builder.run_test_queries()
+
+    if not build_ok:
+        logging.error("Some financial terms were not written, re-run to retry them")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
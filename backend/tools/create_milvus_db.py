@@ -1,12 +1,18 @@
 from pymilvus import model
 from pymilvus import MilvusClient
-import pandas as pd
 from tqdm import tqdm
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 import torch    
 from pymilvus import MilvusClient, DataType, FieldSchema, CollectionSchema
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.build_pipeline import iter_csv_chunks, count_csv_rows
+from utils.build_checkpoint import BuildCheckpoint, checkpointed_build, file_sha1
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,6 +35,10 @@ embedding_function = model.dense.SentenceTransformerEmbeddingFunction(
         )
 # embedding_function = model.dense.OpenAIEmbeddingFunction(model_name='text-embedding-3-large')
 
+def embed_batch(texts):
+    """批量嵌入，返回 float32 矩阵（直接交给 Milvus，不转换为 Python 列表）"""
+    return np.asarray(embedding_function(texts), dtype=np.float32)
+
 # 文件路径
 file_path = "万条金融标准术语.csv"
 db_path = "backend/db/financial_terms_bge_m3.db"
@@ -38,14 +48,6 @@ client = MilvusClient(db_path)
 
 collection_name = "financial_terms"
 
-# 加载数据
-logging.info("Loading financial terms data from CSV")
-df = pd.read_csv(file_path,
-                 names=['term_name', 'term_type'],  # 指定列名
-                 dtype=str,
-                 low_memory=False,
-                 ).fillna("NA")
-
 # 获取向量维度（使用一个样本文档）
 sample_doc = "Sample Text"
 sample_embedding = embedding_function([sample_doc])[0]
@@ -66,6 +68,16 @@ schema = CollectionSchema(fields,
                           "Financial Terms Collection",
                           enable_dynamic_field=True)
 
+# 打开构建检查点；检查点对应的集合已被删除时（数据库文件被删除或集合被手动删除），
+# 检查点中已插入的行不复存在，忽略检查点重新构建
+logging.info("Loading financial terms data from CSV")
+total_rows = count_csv_rows(file_path)
+fingerprint = {"source": file_sha1(file_path), "model": model_name, "collection": collection_name}
+checkpoint = BuildCheckpoint.open(db_path, total_rows, vector_dim, fingerprint)
+if checkpoint.resumed and not client.has_collection(collection_name):
+    logging.info("Checkpoint found but the collection is missing, starting over")
+    checkpoint = BuildCheckpoint.open(db_path, total_rows, vector_dim, fingerprint, restart=True)
+
 # 如果集合不存在，创建集合
 if not client.has_collection(collection_name):
     client.create_collection(
@@ -89,50 +101,47 @@ client.create_index(
     index_params=index_params
 )
 
-# 批量处理
-batch_size = 1024
+# 流水线处理：分块读取 CSV、嵌入、插入三个阶段重叠执行，批大小按实测嵌入吞吐自适应；
+# 嵌入结果写入检查点，中断后重新运行时从上次完成的批继续
+def delete_rows(rows):
+    """按行号删除已插入的金融术语（清理中断时正在插入的批）"""
+    term_ids = [f"FIN_{idx:06d}" for idx in rows]
+    for start_idx in range(0, len(term_ids), 1000):
+        chunk = term_ids[start_idx:start_idx + 1000]
+        client.delete(collection_name=collection_name,
+                      filter="term_id in [" + ", ".join(f'"{term_id}"' for term_id in chunk) + "]")
 
-for start_idx in tqdm(range(0, len(df), batch_size), desc="Processing batches"):
-    end_idx = min(start_idx + batch_size, len(df))
-    batch_df = df.iloc[start_idx:end_idx]
 
-    # 准备文档 - 金融术语
-    docs = []
-    for _, row in batch_df.iterrows():
-        # 简单使用术语名称作为文档内容
-        docs.append(row['term_name'])
-
-    # 生成嵌入
-    try:
-        embeddings = embedding_function(docs)
-        logging.info(f"Generated embeddings for batch {start_idx // batch_size + 1}")
-    except Exception as e:
-        logging.error(f"Error generating embeddings for batch {start_idx // batch_size + 1}: {e}")
-        continue
-
-    # 准备数据 - 金融术语
+def insert_batch(batch_df, vectors):
+    """插入一批金融术语，term_id 按 CSV 行号生成"""
     data = [
         {
-            "vector": embeddings[idx],
-            "term_id": f"FIN_{start_idx + idx:06d}",  # 生成术语ID
-            "term_name": str(row['term_name']),
-            "term_type": str(row['term_type']),
+            "vector": vector,
+            "term_id": f"FIN_{idx:06d}",  # 生成术语ID
+            "term_name": str(term_name),
+            "term_type": str(term_type),
             "domain": "Finance",  # 统一设为金融领域
             "category": "Standard",  # 标准术语
             "input_file": file_path
-        } for idx, (_, row) in enumerate(batch_df.iterrows())
+        } for vector, idx, term_name, term_type in zip(
+            vectors, batch_df.index, batch_df['term_name'], batch_df['term_type'])
     ]
+    client.insert(
+        collection_name=collection_name,
+        data=data
+    )
 
-    # 插入数据 - 批量插入金融术语
-    try:
-        res = client.insert(
-            collection_name=collection_name,
-            data=data
-        )
-        logging.info(f"Inserted batch {start_idx // batch_size + 1}, result: {res}")
-    except Exception as e:
-        logging.error(f"Error inserting batch {start_idx // batch_size + 1}: {e}")
 
+if checkpoint.resumed:
+    logging.info(f"Resuming build from checkpoint: {int(checkpoint.inserted.sum())}/{total_rows} rows already inserted")
+with tqdm(total=total_rows, initial=int(checkpoint.inserted.sum()), desc="Processing financial terms", unit="rows") as progress:
+    report = checkpointed_build(checkpoint, lambda: iter_csv_chunks(file_path), embed_batch, insert_batch,
+                                delete=delete_rows, progress=progress.update)
+
+if report["failed_rows"]:
+    logging.error(f"{report['failed_rows']} financial terms were not inserted, re-run to retry them")
+    sys.exit(1)
+checkpoint.remove()
 logging.info("Financial terms insert process completed.")
 
 # 示例查询 - 测试金融术语搜索
@@ -1,106 +1,111 @@
 from pymilvus import model
 from pymilvus import MilvusClient
-import pandas as pd
 from tqdm import tqdm
 import logging
 from dotenv import load_dotenv
 load_dotenv()
 import torch    
 from pymilvus import MilvusClient, DataType, FieldSchema, CollectionSchema
-from neo4j import GraphDatabase
+import argparse
+import contextlib
 import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.build_pipeline import iter_csv_chunks, count_csv_rows, filter_chunks
+from utils.build_checkpoint import BuildCheckpoint, checkpointed_build, file_sha1
+from utils.graph_synonyms import GraphSynonymFetcher, SynonymSnapshot
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# 初始化 Neo4j 连接
-neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-neo4j_user = os.getenv("NEO4J_USER", "neo4j")
-neo4j_password = os.getenv("NEO4J_PASSWORD", "neo4j")  # 默认值，实际应该从.env读取
-neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+parser = argparse.ArgumentParser(description="构建带同义词的 SNOMED 概念 Milvus 集合")
+parser.add_argument("--synonym-snapshot", default=None,
+                    help="离线同义词快照（tools/export_synonym_snapshot.py 生成），指定时不连接 Neo4j")
+parser.add_argument("--restart", action="store_true", help="忽略未完成构建的检查点，删除集合重新构建")
+args = parser.parse_args()
 
-# 测试Neo4j连接和查询
-try:
-    with neo4j_driver.session() as session:
-        # 测试基本连接
-        result = session.run("MATCH (n) RETURN count(n) as count")
-        count = result.single()["count"]
-        logging.info(f"Successfully connected to Neo4j. Total nodes in database: {count}")
-        
-        # 测试ObjectConcept节点
-        result = session.run("MATCH (c:ObjectConcept) RETURN count(c) as count")
-        concept_count = result.single()["count"]
-        logging.info(f"Total ObjectConcept nodes: {concept_count}")
-        
-        # 检查ObjectConcept节点的属性
-        result = session.run("""
-            MATCH (c:ObjectConcept)
-            RETURN keys(c) as properties
-            LIMIT 1
-        """)
-        properties = result.single()["properties"]
-        logging.info(f"ObjectConcept node properties: {properties}")
-        
-        # 测试Description节点
-        result = session.run("MATCH (d:Description) RETURN count(d) as count")
-        desc_count = result.single()["count"]
-        logging.info(f"Total Description nodes: {desc_count}")
-        
-        # 测试HAS_DESCRIPTION关系
-        result = session.run("MATCH ()-[r:HAS_DESCRIPTION]->() RETURN count(r) as count")
-        rel_count = result.single()["count"]
-        logging.info(f"Total HAS_DESCRIPTION relationships: {rel_count}")
+
+def connect_neo4j():
+    """连接 Neo4j 并检查图中的概念和描述数据"""
+    from neo4j import GraphDatabase
+
+    # 初始化 Neo4j 连接
+    neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+    neo4j_password = os.getenv("NEO4J_PASSWORD", "neo4j")  # 默认值，实际应该从.env读取
+    neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+
+    # 测试Neo4j连接和查询
+    try:
+        with neo4j_driver.session() as session:
+            # 测试基本连接
+            result = session.run("MATCH (n) RETURN count(n) as count")
+            count = result.single()["count"]
+            logging.info(f"Successfully connected to Neo4j. Total nodes in database: {count}")
         
-        # 测试一个具体的概念
-        test_concept = "267036007"  # Dyspnea
-        result = session.run("""
-            MATCH (c:ObjectConcept {id: $id})-[:HAS_DESCRIPTION]->(d:Description)
-            RETURN c.id as concept_id, c.FSN as fsn, d.term as term
-        """, id=test_concept)
-        test_results = list(result)
-        logging.info(f"Test query results for concept {test_concept}:")
-        for record in test_results:
-            logging.info(f"  Concept: {record['concept_id']}, FSN: {record['fsn']}, Term: {record['term']}")
+            # 测试ObjectConcept节点
+            result = session.run("MATCH (c:ObjectConcept) RETURN count(c) as count")
+            concept_count = result.single()["count"]
+            logging.info(f"Total ObjectConcept nodes: {concept_count}")
         
-except Exception as e:
-    logging.error(f"Failed to connect to Neo4j: {e}")
-    raise
-
-def get_concept_descriptions(concept_id, concept_code):
-    with neo4j_driver.session() as session:
-        # 首先检查概念是否存在
-        concept_check = session.run("""
-            MATCH (c:ObjectConcept {id: $concept_code})
-            RETURN c.id as id, c.FSN as fsn
-        """, concept_code=concept_code)
-        concept = concept_check.single()
+            # 检查ObjectConcept节点的属性
+            result = session.run("""
+                MATCH (c:ObjectConcept)
+                RETURN keys(c) as properties
+                LIMIT 1
+            """)
+            properties = result.single()["properties"]
+            logging.info(f"ObjectConcept node properties: {properties}")
         
-        if not concept:
-            logging.warning(f"Concept {concept_id} (code: {concept_code}) not found in Neo4j")
-            return []
-            
-        logging.info(f"Found concept: {concept['id']} with FSN: {concept['fsn']}")
+            # 测试Description节点
+            result = session.run("MATCH (d:Description) RETURN count(d) as count")
+            desc_count = result.single()["count"]
+            logging.info(f"Total Description nodes: {desc_count}")
         
-        # 修改查询以获取所有描述
-        result = session.run("""
-            MATCH (c:ObjectConcept {id: $concept_code})-[:HAS_DESCRIPTION]->(d:Description)
-            RETURN d.term as term, d.descriptionType as type, d.active as active
-            ORDER BY d.descriptionType
-        """, concept_code=concept_code)
+            # 测试HAS_DESCRIPTION关系
+            result = session.run("MATCH ()-[r:HAS_DESCRIPTION]->() RETURN count(r) as count")
+            rel_count = result.single()["count"]
+            logging.info(f"Total HAS_DESCRIPTION relationships: {rel_count}")
         
-        # 获取所有结果
-        descriptions = [(record["term"], record["type"], record["active"]) for record in result]
+            # 测试一个具体的概念
+            test_concept = "267036007"  # Dyspnea
+            result = session.run("""
+                MATCH (c:ObjectConcept {id: $id})-[:HAS_DESCRIPTION]->(d:Description)
+                RETURN c.id as concept_id, c.FSN as fsn, d.term as term
+            """, id=test_concept)
+            test_results = list(result)
+            logging.info(f"Test query results for concept {test_concept}:")
+            for record in test_results:
+                logging.info(f"  Concept: {record['concept_id']}, FSN: {record['fsn']}, Term: {record['term']}")
         
-        # 添加日志
-        if descriptions:
-            logging.info(f"Found {len(descriptions)} descriptions for concept {concept['id']}:")
-            for term, type_, active in descriptions:
-                logging.info(f"  - Term: {term}, Type: {type_}, Active: {active}")
-        else:
-            logging.warning(f"No descriptions found for concept {concept['id']}")
-            
-        # 只返回术语文本
-        return [desc[0] for desc in descriptions]
+    except Exception as e:
+        logging.error(f"Failed to connect to Neo4j: {e}")
+        raise
+    return neo4j_driver
+
+
+neo4j_driver = None if args.synonym_snapshot else connect_neo4j()
+
+# 每次从 Neo4j 批量获取同义词的概念数
+SYNONYM_BATCH_ROWS = 1024
+
+
+def with_synonyms(chunks, fetcher):
+    """
+    为每块概念批量获取同义词并组合文档文本
+
+    在构建流水线的读取阶段执行，先于嵌入阶段准备好后续批的同义词
+    """
+    for chunk in chunks:
+        synonyms = fetcher.fetch(chunk['concept_code'])
+        chunk = chunk.copy()
+        chunk['synonyms'] = [" ".join(synonyms[code]) for code in chunk['concept_code']]
+        # 组合概念名称和同义词 - 这就好比是图数据库资源和普通文本资源的组合检索呀！！！！
+        chunk['document'] = [f"{name} {text}" if text else name
+                             for name, text in zip(chunk['concept_name'], chunk['synonyms'])]
+        yield chunk
 
 # 尝试加载运行时配置
 try:
@@ -120,6 +125,10 @@ embedding_function = model.dense.SentenceTransformerEmbeddingFunction(
         )
 # embedding_function = model.dense.OpenAIEmbeddingFunction(model_name='text-embedding-3-large')
 
+def embed_batch(texts):
+    """批量嵌入，返回 float32 矩阵（直接交给 Milvus，不转换为 Python 列表）"""
+    return np.asarray(embedding_function(texts), dtype=np.float32)
+
 # 文件路径
 file_path = "backend/data/SNOMED_3.csv"
 db_path = "backend/db/snomed_bge_m3.db"
@@ -129,23 +138,32 @@ client = MilvusClient(db_path)
 
 collection_name = "concepts_with_synonym"
 
-# 如果集合存在，先删除它
-if client.has_collection(collection_name):
-    logging.info(f"Dropping existing collection: {collection_name}")
-    client.drop_collection(collection_name)
-
-# 加载数据
-logging.info("Loading data from CSV")
-df = pd.read_csv(file_path, 
-                 dtype=str, 
-                low_memory=False,
-                 ).fillna("NA")
-
 # 获取向量维度（使用一个样本文档）
 sample_doc = "Sample Text"
 sample_embedding = embedding_function([sample_doc])[0]
 vector_dim = len(sample_embedding)
 
+# 打开构建检查点：上次构建未完成且集合仍在时从检查点继续，否则删除集合重新构建
+logging.info("Loading data from CSV")
+total_rows = count_csv_rows(file_path, names=None)
+fingerprint = {
+    "source": file_sha1(file_path),
+    "synonyms": file_sha1(args.synonym_snapshot) if args.synonym_snapshot else os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+    "model": model_name,
+    "collection": collection_name
+}
+checkpoint = BuildCheckpoint.open(db_path, total_rows, vector_dim, fingerprint, restart=args.restart)
+if checkpoint.resumed and not client.has_collection(collection_name):
+    logging.info("Checkpoint found but the collection is missing, starting over")
+    checkpoint = BuildCheckpoint.open(db_path, total_rows, vector_dim, fingerprint, restart=True)
+
+if checkpoint.resumed:
+    logging.info(f"Resuming build from checkpoint: {int(checkpoint.inserted.sum())}/{total_rows} rows already inserted")
+elif client.has_collection(collection_name):
+    # 如果集合存在，先删除它
+    logging.info(f"Dropping existing collection: {collection_name}")
+    client.drop_collection(collection_name)
+
 # 构造Schema
 fields = [
     FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
@@ -191,76 +209,65 @@ client.create_index(
     index_params=index_params
 )
 
-# 批量处理
-batch_size = 1024
-
-for start_idx in tqdm(range(0, len(df), batch_size), desc="Processing batches"):
-    end_idx = min(start_idx + batch_size, len(df))
-    batch_df = df.iloc[start_idx:end_idx]
+# 流水线处理：读取阶段按 SYNONYM_BATCH_ROWS 行一批从 Neo4j 获取同义词，嵌入和插入阶段与之重叠执行；
+# 嵌入结果写入检查点，中断后重新运行时从上次完成的批继续
+def delete_rows(rows):
+    """按行号删除已插入的概念（清理中断时正在插入的批）"""
+    mask = np.zeros(total_rows, dtype=bool)
+    mask[rows] = True
+    for chunk in filter_chunks(iter_csv_chunks(file_path, names=None), mask):
+        client.delete(collection_name=collection_name,
+                      filter="concept_id in [" + ", ".join(f'"{concept_id}"' for concept_id in chunk['concept_id']) + "]")
 
-    # 准备文档
-    docs = []
-    for _, row in batch_df.iterrows():
-        concept_id = row['concept_id']
-        concept_code = row['concept_code']
-        concept_name = row['concept_name']
-        
-        # 从Neo4j获取同义词
-        synonyms = get_concept_descriptions(concept_id, concept_code)
-        synonyms_text = " ".join(synonyms) if synonyms else ""
-        
-        # 组合概念名称和同义词 - 这就好比是图数据库资源和普通文本资源的组合检索呀！！！！
-        doc_parts = [concept_name]
-        if synonyms_text:
-            doc_parts.append(synonyms_text)
-            
-        docs.append(" ".join(doc_parts))
 
-    # 生成嵌入
-    try:
-        embeddings = embedding_function(docs)
-        logging.info(f"Generated embeddings for batch {start_idx // batch_size + 1}")
-    except Exception as e:
-        logging.error(f"Error generating embeddings for batch {start_idx // batch_size + 1}: {e}")
-        continue
-
-    # 准备数据
-    data = []
-    for idx, (_, row) in enumerate(batch_df.iterrows()):
-        concept_id = row['concept_id']
-        concept_code = row['concept_code']
-        synonyms = get_concept_descriptions(concept_id, concept_code)
-        synonyms_text = " ".join(synonyms) if synonyms else ""
-        
-        data.append({
-            "vector": embeddings[idx],
-            "concept_id": str(row['concept_id']),
-            "concept_name": str(row['concept_name']),
-            "domain_id": str(row['domain_id']),
-            "vocabulary_id": str(row['vocabulary_id']),
-            "concept_class_id": str(row['concept_class_id']),
-            "standard_concept": str(row['standard_concept']),
-            "concept_code": str(row['concept_code']),
-            "valid_start_date": str(row['valid_start_date']),
-            "valid_end_date": str(row['valid_end_date']),
-            "synonyms": synonyms_text,
+def insert_batch(batch_df, vectors):
+    """插入一批概念"""
+    data = [
+        {
+            "vector": vector,
+            "concept_id": str(row.concept_id),
+            "concept_name": str(row.concept_name),
+            "domain_id": str(row.domain_id),
+            "vocabulary_id": str(row.vocabulary_id),
+            "concept_class_id": str(row.concept_class_id),
+            "standard_concept": str(row.standard_concept),
+            "concept_code": str(row.concept_code),
+            "valid_start_date": str(row.valid_start_date),
+            "valid_end_date": str(row.valid_end_date),
+            "synonyms": row.synonyms,
             "input_file": file_path
-        })
+        } for vector, row in zip(vectors, batch_df.itertuples(index=False))
+    ]
+    # 插入数据 - 一批向量条目，即一批标准概念
+    client.insert(
+        collection_name=collection_name,
+        data=data
+    )
 
-    # 插入数据 - 1024个向量条目，即1024个金融术语（标准概念）
-    try:
-        res = client.insert(
-            collection_name=collection_name,
-            data=data
-        )
-        logging.info(f"Inserted batch {start_idx // batch_size + 1}, result: {res}")
-    except Exception as e:
-        logging.error(f"Error inserting batch {start_idx // batch_size + 1}: {e}")
 
-logging.info("Insert process completed.")
+with contextlib.ExitStack() as stack:
+    if args.synonym_snapshot:
+        # 离线快照：按概念编码直接查找，不需要 Neo4j
+        fetcher = SynonymSnapshot(args.synonym_snapshot)
+    else:
+        stack.callback(neo4j_driver.close)
+        fetcher = GraphSynonymFetcher(stack.enter_context(neo4j_driver.session()))
+    progress = stack.enter_context(tqdm(total=total_rows, initial=int(checkpoint.inserted.sum()),
+                                        desc="Processing concepts", unit="rows"))
+    # 已插入的行在获取同义词之前过滤掉，续建时不再查询它们的同义词
+    report = checkpointed_build(
+        checkpoint,
+        lambda: with_synonyms(filter_chunks(iter_csv_chunks(file_path, SYNONYM_BATCH_ROWS, names=None),
+                                            ~checkpoint.inserted), fetcher),
+        embed_batch, insert_batch, delete=delete_rows, progress=progress.update, text_column="document"
+    )
+logging.info(f"Synonym fetch: {fetcher.stats()}")
 
-# 关闭Neo4j连接
-neo4j_driver.close()
+if report["failed_rows"]:
+    logging.error(f"{report['failed_rows']} concepts were not inserted, re-run to retry them")
+    sys.exit(1)
+checkpoint.remove()
+logging.info("Insert process completed.")
 
 # 示例查询
 # query = "somatic hallucination"
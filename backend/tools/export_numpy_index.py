@@ -0,0 +1,85 @@
+"""
+导出金融术语的 NumPy 检索索引
+生成 backend/db/<数据库名>.npy（归一化 float32 向量）和 backend/db/<数据库名>.terms.json（术语元数据），
+供 StdService 的 numpy 后端在进程内做精确检索
+
+用法（在项目根目录运行）:
+    python3 backend/tools/export_numpy_index.py --model lightweight
+"""
+import argparse
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import torch
+from dotenv import load_dotenv
+from sentence_transformers import SentenceTransformer
+from tqdm import tqdm
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.numpy_index import save_index, NumpyVectorIndex
+
+load_dotenv()
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 模型选择与数据库名称，与 create_financial_terms_db.py 保持一致
+MODEL_CHOICES = {
+    "best": ("BAAI/bge-m3", "financial_terms_bge_m3"),
+    "lightweight": ("sentence-transformers/all-MiniLM-L6-v2", "financial_terms_minilm"),
+    "balanced": ("sentence-transformers/all-mpnet-base-v2", "financial_terms_mpnet"),
+}
+
+parser = argparse.ArgumentParser(description="导出金融术语 NumPy 检索索引")
+parser.add_argument("--model", choices=MODEL_CHOICES.keys(), default="lightweight", help="嵌入模型选择")
+parser.add_argument("--file", default="万条金融标准术语.csv", help="金融术语 CSV 文件路径")
+parser.add_argument("--batch-size", type=int, default=1024, help="嵌入批处理大小")
+args = parser.parse_args()
+
+model_name, db_name = MODEL_CHOICES[args.model]
+db_path = f"backend/db/{db_name}.db"
+
+device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+embedding_model = SentenceTransformer(model_name, device=device)
+logging.info(f"使用嵌入模型: {model_name}")
+
+# 加载数据
+df = pd.read_csv(args.file,
+                 names=['term_name', 'term_type'],
+                 dtype=str,
+                 low_memory=False,
+                 ).fillna("NA")
+logging.info(f"Loaded {len(df)} financial terms")
+
+# 术语元数据，term_id 规则与 Milvus 集合一致
+term_names = df['term_name'].tolist()
+term_types = df['term_type'].tolist()
+terms = [
+    {
+        "term_id": f"FIN_{idx:06d}",
+        "term_name": term_name,
+        "term_type": term_type,
+        "domain": "Finance",
+        "category": "Standard"
+    } for idx, (term_name, term_type) in enumerate(zip(term_names, term_types))
+]
+
+# 生成嵌入
+embeddings = []
+for start_idx in tqdm(range(0, len(term_names), args.batch_size), desc="Embedding financial terms"):
+    batch = term_names[start_idx:start_idx + args.batch_size]
+    embeddings.append(embedding_model.encode(batch, convert_to_numpy=True))
+
+vectors = np.concatenate(embeddings)
+save_index(db_path, vectors, terms, model_name)
+logging.info(f"Saved NumPy index for {len(terms)} terms ({vectors.shape[1]} dims)")
+
+# 示例查询 - 验证索引可用
+index = NumpyVectorIndex(db_path)
+test_queries = ["investment", "bank", "loan", "stock", "bond"]
+query_vectors = embedding_model.encode(test_queries, convert_to_numpy=True)
+for query, hits in zip(test_queries, index.search(query_vectors, 3)):
+    logging.info(f"Search result for '{query}': {[index.terms[idx]['term_name'] for idx, _ in hits]}")
@@ -0,0 +1,107 @@
+"""
+导出 ONNX Runtime 版本的嵌入模型，并测量与原模型向量的余弦偏差
+导出结果缓存在 backend/models/onnx/embeddings/<模型名>，已存在时跳过导出，只重新测量偏差；
+测得的偏差写入导出目录的 embedding_config.json
+
+偏差足够小时（平均余弦接近 1、top-k 检索结果基本一致）可以直接用现有的 Milvus / NumPy 索引，
+请求中设置 "embeddingOptions": {"provider": "onnx"} 即可，无需重建索引
+
+用法（在项目根目录运行）:
+    python3 backend/tools/export_onnx_embeddings.py --models lightweight balanced
+    python3 backend/tools/export_onnx_embeddings.py --models best --no-quantize
+"""
+import argparse
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sentence_transformers import SentenceTransformer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.onnx_embeddings import (
+    OnnxEmbeddings, export_onnx_embeddings, onnx_embedding_dir, read_embedding_config, write_embedding_config,
+    EMBEDDING_CONFIG_FILE, ONNX_MODEL_FILE, QUANTIZED_MODEL_FILE
+)
+from utils.numpy_index import NumpyVectorIndex, index_paths
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 模型选择与数据库名称，与 create_financial_terms_db.py 保持一致
+MODEL_CHOICES = {
+    "best": ("BAAI/bge-m3", "financial_terms_bge_m3"),
+    "lightweight": ("sentence-transformers/all-MiniLM-L6-v2", "financial_terms_minilm"),
+    "balanced": ("sentence-transformers/all-mpnet-base-v2", "financial_terms_mpnet"),
+}
+
+parser = argparse.ArgumentParser(description="导出 ONNX 嵌入模型并测量余弦偏差")
+parser.add_argument("--models", nargs="+", choices=MODEL_CHOICES.keys(), default=["lightweight"], help="嵌入模型选择")
+parser.add_argument("--output", default="backend/models/onnx/embeddings", help="导出根目录")
+parser.add_argument("--force", action="store_true", help="已存在导出结果时重新导出")
+parser.add_argument("--no-quantize", action="store_true", help="只导出 fp32 ONNX 模型，不做 int8 量化")
+parser.add_argument("--file", default="万条金融标准术语.csv", help="金融术语 CSV 文件路径（偏差测量的样本来源）")
+parser.add_argument("--samples", type=int, default=2000, help="测量偏差的术语数量")
+parser.add_argument("--k", type=int, default=5, help="检索结果一致率的 top-k")
+args = parser.parse_args()
+
+quantized = not args.no_quantize
+rng = np.random.default_rng(42)
+df = pd.read_csv(args.file, names=['term_name', 'term_type'], dtype=str, low_memory=False).fillna("NA")
+sample = df['term_name'].iloc[np.sort(rng.choice(len(df), size=min(args.samples, len(df)), replace=False))].tolist()
+
+print(f"{'model':<12}{'mode':>6}{'mean cos':>10}{'p1 cos':>10}{'min cos':>10}{'top' + str(args.k) + ' agree':>12}{'MB':>9}")
+for model_choice in args.models:
+    model_name, db_name = MODEL_CHOICES[model_choice]
+    onnx_dir = onnx_embedding_dir(model_name, args.output)
+    local_model_path = f"models/{model_name.replace('/', '_')}"
+    model_path = local_model_path if os.path.exists(local_model_path) else model_name
+    model_file = os.path.join(onnx_dir, QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+
+    # 导出（已有导出结果时跳过）
+    if args.force or not os.path.exists(model_file) or not os.path.exists(os.path.join(onnx_dir, EMBEDDING_CONFIG_FILE)):
+        export_onnx_embeddings(model_name, model_path, onnx_dir, quantize=quantized)
+    else:
+        logging.info(f"使用已有的导出结果: {model_file}")
+
+    # 原模型向量作为基准（与建库时的模型一致）
+    reference_model = SentenceTransformer(model_path, device="cpu")
+    reference = reference_model.encode(
+        sample, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+    )
+    # 早期导出按分词器上限截断，与原模型的 max_seq_length 不一致时修正
+    config = read_embedding_config(onnx_dir)
+    if reference_model.max_seq_length and config.get("max_length") != reference_model.max_seq_length:
+        logging.info(f"max_length {config.get('max_length')} -> {reference_model.max_seq_length}")
+        config["max_length"] = int(reference_model.max_seq_length)
+        write_embedding_config(onnx_dir, config)
+    candidate = np.asarray(OnnxEmbeddings(onnx_dir, quantized=quantized).embed_documents(sample), dtype=np.float32)
+    cosines = np.sum(reference * candidate, axis=1)
+
+    # 有 NumPy 索引时，比较两种向量的 top-k 检索结果
+    agreement = None
+    db_path = f"backend/db/{db_name}.db"
+    if os.path.exists(index_paths(db_path)[0]):
+        index = NumpyVectorIndex(db_path)
+        overlaps = [
+            len({idx for idx, _ in ref_hits} & {idx for idx, _ in onnx_hits}) / args.k
+            for ref_hits, onnx_hits in zip(index.search(reference, args.k), index.search(candidate, args.k))
+        ]
+        agreement = float(np.mean(overlaps))
+
+    drift = {
+        "quantized": quantized,
+        "samples": len(sample),
+        "mean_cosine": float(cosines.mean()),
+        "p1_cosine": float(np.percentile(cosines, 1)),
+        "min_cosine": float(cosines.min()),
+        f"top{args.k}_agreement": agreement
+    }
+    config = read_embedding_config(onnx_dir)
+    config["cosine_drift"] = drift
+    write_embedding_config(onnx_dir, config)
+
+    print(f"{model_choice:<12}{'int8' if quantized else 'fp32':>6}{drift['mean_cosine']:>10.4f}{drift['p1_cosine']:>10.4f}"
+          f"{drift['min_cosine']:>10.4f}{'n/a' if agreement is None else f'{agreement:.3f}':>12}"
+          f"{os.path.getsize(model_file) / 1024 / 1024:>9.1f}")
@@ -0,0 +1,149 @@
+"""
+导出 ONNX Runtime 版本的 NER 模型，并与 PyTorch 模型对比一致性、延迟和内存
+导出 token-classification 模型为 ONNX 并做动态 int8 量化，结果保存在 backend/models/onnx/ner，
+在 backend/config/service_config.py 中将 NER_BACKEND_CONFIG["backend"] 设为 "onnx" 即可使用
+
+用法（在项目根目录运行）:
+    python3 backend/tools/export_onnx_ner.py
+    python3 backend/tools/export_onnx_ner.py --model dslim/bert-base-NER --runs 50
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from transformers import pipeline
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.onnx_ner import export_onnx_ner, load_onnx_ner_pipeline, compare_ner_outputs, onnx_model_file
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 与 NERService 相同的模型查找顺序
+DEFAULT_MODELS = [
+    "backend/models/Financial-NER",
+    "models/bert-large-cased-finetuned-conll03-english",
+    "dbmdz/bert-large-cased-finetuned-conll03-english",
+]
+
+# 一致性检查和基准测试使用的示例文本
+SAMPLE_TEXTS = [
+    "JPMorgan Chase reports ROE increased to 15% in the third quarter.",
+    "Goldman Sachs and Morgan Stanley led the $2 billion IPO of Alibaba on the New York Stock Exchange.",
+    "The Federal Reserve raised the federal funds rate by 25 basis points, citing inflation in the United States.",
+    "BlackRock increased its stake in Apple Inc. while Vanguard trimmed holdings of Microsoft.",
+    "HSBC Holdings agreed to sell its Canadian unit to Royal Bank of Canada for C$13.5 billion.",
+    "Warren Buffett said Berkshire Hathaway would keep buying Occidental Petroleum shares.",
+    "The European Central Bank in Frankfurt left interest rates unchanged on Thursday.",
+    "Credit Suisse was acquired by UBS in a deal brokered by the Swiss National Bank.",
+    "Moody's downgraded the credit rating of ten regional banks including M&T Bank and Webster Financial.",
+    "Tesla shares fell 8% on Nasdaq after Elon Musk sold stock worth $3.6 billion.",
+]
+
+
+def rss_mb() -> float:
+    """当前进程的常驻内存（MB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # 非 Linux 系统使用峰值常驻内存近似
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+
+def dir_size_mb(path: str, suffixes) -> float:
+    """目录中指定后缀文件的总大小（MB）"""
+    if not os.path.isdir(path):
+        return float("nan")
+    return sum(
+        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith(suffixes)
+    ) / 1024 / 1024
+
+
+def benchmark(pipe, texts, runs: int):
+    """单条文本的延迟分布（毫秒）和整批吞吐（条/秒）"""
+    pipe(texts[:2])  # 预热
+    latencies = []
+    for _ in range(runs):
+        for text in texts:
+            started = time.perf_counter()
+            pipe(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    for _ in range(runs):
+        pipe(texts, batch_size=len(texts))
+    throughput = runs * len(texts) / (time.perf_counter() - started)
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), throughput
+
+
+parser = argparse.ArgumentParser(description="导出 ONNX int8 NER 模型并与 PyTorch 模型对比")
+parser.add_argument("--model", default=None, help="源模型目录或名称，默认与 NERService 的查找顺序一致")
+parser.add_argument("--output", default="backend/models/onnx/ner", help="ONNX 模型导出目录")
+parser.add_argument("--force", action="store_true", help="已存在导出结果时重新导出")
+parser.add_argument("--no-quantize", action="store_true", help="只导出 fp32 ONNX 模型，不做 int8 量化")
+parser.add_argument("--texts-file", default=None, help="一致性检查使用的文本文件（每行一条），默认使用内置示例")
+parser.add_argument("--min-agreement", type=float, default=0.95, help="实体一致率低于该值时以非零状态退出")
+parser.add_argument("--runs", type=int, default=20, help="基准测试轮数")
+parser.add_argument("--threads", type=int, default=None, help="PyTorch 和 ONNX Runtime 的算子内线程数")
+args = parser.parse_args()
+
+# 默认使用第一个存在的本地模型，都不存在时从 Hugging Face 下载
+model_path = args.model or next((path for path in DEFAULT_MODELS[:-1] if os.path.exists(path)), DEFAULT_MODELS[-1])
+quantized = not args.no_quantize
+if args.threads:
+    torch.set_num_threads(args.threads)
+
+# 导出（已有导出结果时跳过）
+if args.force or not os.path.exists(onnx_model_file(args.output, quantized)):
+    export_onnx_ner(model_path, args.output, quantize=quantized)
+else:
+    logging.info(f"使用已有的导出结果: {onnx_model_file(args.output, quantized)}")
+
+texts = SAMPLE_TEXTS
+if args.texts_file:
+    with open(args.texts_file, "r", encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+
+# 先加载 ONNX 模型再加载 PyTorch 模型，分别记录加载前后的常驻内存增量
+rss_before = rss_mb()
+onnx_pipe = load_onnx_ner_pipeline(args.output, quantized=quantized, num_threads=args.threads)
+onnx_pipe(texts[:1])
+onnx_rss = rss_mb() - rss_before
+
+rss_before = rss_mb()
+torch_pipe = pipeline("token-classification", model=model_path, aggregation_strategy='simple', device=-1)
+torch_pipe(texts[:1])
+torch_rss = rss_mb() - rss_before
+
+# 一致性检查
+parity = compare_ner_outputs(torch_pipe, onnx_pipe, texts)
+print(f"\n实体一致率: {parity['agreement']:.3f} "
+      f"(PyTorch {parity['reference_entities']} / ONNX {parity['candidate_entities']} / 一致 {parity['matched_entities']})")
+print(f"得分最大偏差: {parity['max_score_diff']:.4f}，偏差超过 0.05 的实体: {parity['score_mismatches']}")
+for mismatch in parity["mismatches"][:5]:
+    print(f"  不一致: {mismatch['text']}")
+    print(f"    仅 PyTorch: {mismatch['only_reference']}")
+    print(f"    仅 ONNX:    {mismatch['only_candidate']}")
+
+# 延迟与内存对比
+print(f"\n{'backend':<16}{'p50 ms':>10}{'p95 ms':>10}{'texts/s':>10}{'weights MB':>12}{'RSS +MB':>10}")
+rows = [
+    ("pytorch fp32", torch_pipe, dir_size_mb(model_path, (".bin", ".safetensors")), torch_rss),
+    (f"onnx {'int8' if quantized else 'fp32'}", onnx_pipe, os.path.getsize(onnx_model_file(args.output, quantized)) / 1024 / 1024, onnx_rss),
+]
+for name, pipe, weights_mb, rss in rows:
+    p50, p95, throughput = benchmark(pipe, texts, args.runs)
+    print(f"{name:<16}{p50:>10.1f}{p95:>10.1f}{throughput:>10.1f}{weights_mb:>12.1f}{rss:>10.1f}")
+
+if parity["agreement"] < args.min_agreement:
+    logging.error(f"实体一致率 {parity['agreement']:.3f} 低于阈值 {args.min_agreement}")
+    sys.exit(1)
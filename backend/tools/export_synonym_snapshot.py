@@ -0,0 +1,60 @@
+"""
+导出 SNOMED 概念同义词的离线快照
+从 Neo4j（ObjectConcept -[:HAS_DESCRIPTION]-> Description）或直接从 build.cypher 使用的 SNOMED CSV 生成
+backend/data/snomed_synonyms.npz，供 create_milvus_db_with_graph.py --synonym-snapshot 在不启动 Neo4j 的情况下构建索引
+
+用法（在项目根目录运行）:
+    python3 backend/tools/export_synonym_snapshot.py --source neo4j
+    python3 backend/tools/export_synonym_snapshot.py --source csv --descriptions descrip_new.csv --concepts concept_new.csv
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.graph_synonyms import (
+    SynonymSnapshot, save_synonym_snapshot, synonyms_from_description_csv, synonyms_from_neo4j
+)
+
+load_dotenv()
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+parser = argparse.ArgumentParser(description="导出 SNOMED 概念同义词的离线快照")
+parser.add_argument("--source", choices=["neo4j", "csv"], default="neo4j", help="数据来源")
+parser.add_argument("--descriptions", default="descrip_new.csv", help="描述 CSV（--source csv）")
+parser.add_argument("--concepts", default=None, help="概念 CSV（--source csv，可选，提供时只保留存在的概念）")
+parser.add_argument("--output", default="backend/data/snomed_synonyms.npz", help="快照输出路径")
+parser.add_argument("--check", nargs="*", default=["267036007"], help="导出后抽查的概念编码")
+args = parser.parse_args()
+
+started = time.perf_counter()
+if args.source == "neo4j":
+    from neo4j import GraphDatabase
+
+    neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+    neo4j_password = os.getenv("NEO4J_PASSWORD", "neo4j")
+    driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    with driver.session() as session:
+        metadata = save_synonym_snapshot(args.output, synonyms_from_neo4j(session), f"neo4j {neo4j_uri}")
+    driver.close()
+else:
+    source = os.path.basename(args.descriptions)
+    if args.concepts:
+        source += f" + {os.path.basename(args.concepts)}"
+    metadata = save_synonym_snapshot(
+        args.output, synonyms_from_description_csv(args.descriptions, args.concepts), f"csv {source}")
+
+logging.info(f"Saved {metadata['concepts']} concepts and {metadata['terms']} terms to {args.output} "
+             f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MB) in {time.perf_counter() - started:.1f}s")
+
+# 抽查
+snapshot = SynonymSnapshot(args.output)
+for code in args.check:
+    logging.info(f"{code}: {snapshot.get(code)}")
@@ -0,0 +1,65 @@
+"""
+API 服务启动导入耗时报告
+在子进程中以 python -X importtime 导入 backend/main.py，按模块和顶层包统计导入耗时，
+并报告导入后的常驻内存以及被提前导入的按需依赖（如 torch、boto3、langchain_openai）
+
+用法（在项目根目录运行）:
+    python3 backend/tools/import_time_report.py
+    python3 backend/tools/import_time_report.py --top 30 --fail-on-deferred
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(BACKEND_DIR)
+from utils.import_report import parse_importtime, direct_imports, summarize_by_package
+
+# 子进程：导入 main 后输出启动概要
+CHILD_CODE = (
+    "import time; started = time.perf_counter(); import main; "
+    "from utils.import_report import startup_report; import json; "
+    "print(json.dumps(startup_report(started)))"
+)
+
+parser = argparse.ArgumentParser(description="API 服务启动导入耗时报告")
+parser.add_argument("--module", default="main", help="要导入的模块")
+parser.add_argument("--top", type=int, default=20, help="显示耗时最多的前 N 项")
+parser.add_argument("--fail-on-deferred", action="store_true", help="有按需依赖在启动时被导入时以非零状态退出")
+args = parser.parse_args()
+
+result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", CHILD_CODE.replace("import main", f"import {args.module}")],
+    cwd=BACKEND_DIR,
+    capture_output=True,
+    text=True
+)
+if result.returncode != 0:
+    print(result.stderr[-4000:])
+    sys.exit(result.returncode)
+
+records = parse_importtime(result.stderr.splitlines())
+summary = json.loads(result.stdout.strip().splitlines()[-1])
+
+# 被导入模块直接导入的模块，即启动时每条 import 语句的累计耗时
+direct = direct_imports(records, args.module)
+print(f"\n{args.module} 直接导入的模块（累计耗时）:")
+print(f"{'module':<48}{'cumulative ms':>15}{'self ms':>10}")
+for record in sorted(direct, key=lambda x: x["cumulative_us"], reverse=True)[:args.top]:
+    print(f"{record['module']:<48}{record['cumulative_us'] / 1000:>15.1f}{record['self_us'] / 1000:>10.1f}")
+
+print("\n按顶层包汇总（模块自身耗时之和）:")
+print(f"{'package':<48}{'self ms':>15}{'modules':>10}")
+for package in summarize_by_package(records)[:args.top]:
+    print(f"{package['package']:<48}{package['self_us'] / 1000:>15.1f}{package['modules']:>10}")
+
+rss = f"{summary['rss_mb']:.0f} MB" if summary["rss_mb"] is not None else "未知"
+print(f"\n导入总耗时: {summary['import_seconds']:.2f} 秒，模块数: {summary['modules_loaded']}，常驻内存: {rss}")
+if summary["deferred_modules_loaded"]:
+    print(f"⚠️  启动时已导入的按需依赖: {', '.join(summary['deferred_modules_loaded'])}")
+    if args.fail_on_deferred:
+        sys.exit(1)
+else:
+    print("✅ 启动时未导入任何按需依赖")
@@ -0,0 +1,51 @@
+"""
+预热查询向量缓存
+把金融术语表和历史查询日志中的文本提前编码并写入磁盘缓存，服务重启后直接命中
+
+用法（在 backend 目录运行，与服务使用同一个缓存文件）:
+    python3 tools/prewarm_embedding_cache.py --terms ../万条金融标准术语.csv --query-log logs/std_queries.log
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.embedding_config import EmbeddingProvider, EmbeddingConfig
+from utils.embedding_factory import EmbeddingFactory
+from utils.embedding_cache import CachedEmbeddings
+
+# 尝试加载运行时配置
+try:
+    from config.runtime_config import DEFAULT_EMBEDDING_MODEL, DEFAULT_EMBEDDING_PROVIDER
+except ImportError:
+    # 如果没有配置文件，使用轻量模型作为默认
+    DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    DEFAULT_EMBEDDING_PROVIDER = "huggingface"
+
+# 设置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+parser = argparse.ArgumentParser(description="预热查询向量缓存")
+parser.add_argument("--provider", default=DEFAULT_EMBEDDING_PROVIDER, choices=[p.value for p in EmbeddingProvider])
+parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="嵌入模型名称")
+parser.add_argument("--terms", help="金融术语 CSV 文件路径")
+parser.add_argument("--query-log", help="查询日志路径，每行一个查询（纯文本或 JSON 行）")
+parser.add_argument("--batch-size", type=int, default=256, help="每次编码的文本数量")
+args = parser.parse_args()
+
+embedding_func = EmbeddingFactory.create_embedding_function(
+    EmbeddingConfig(provider=EmbeddingProvider(args.provider), model_name=args.model)
+)
+if not isinstance(embedding_func, CachedEmbeddings):
+    logging.error("查询向量缓存未启用，请检查 config/service_config.py 中的 EMBEDDING_CACHE_CONFIG")
+    sys.exit(1)
+
+if args.terms:
+    added = embedding_func.prewarm_from_terms(args.terms, args.batch_size)
+    logging.info(f"从术语表预热 {added} 条向量")
+if args.query_log:
+    added = embedding_func.prewarm_from_query_log(args.query_log, args.batch_size)
+    logging.info(f"从查询日志预热 {added} 条向量")
+
+logging.info(f"缓存状态: {embedding_func.cache.stats()}")
@@ -0,0 +1,114 @@
+import math
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.term_catalog import normalize_term
+
+
+def tokenize(text: str) -> List[str]:
+    """按规范化后的空白切分为词"""
+    return normalize_term(text).split()
+
+
+class BM25Index:
+    """
+    词级 BM25 倒排索引
+    倒排表以 CSR 形式保存在连续数组中：
+    postings_docs / postings_tf 按词依次存放，postings_offsets[i]:postings_offsets[i+1] 为第 i 个词的倒排段
+    """
+    def __init__(self, documents: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        """
+        构建索引
+
+        Args:
+            documents: 文档文本（术语名称），行号即文档编号
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(documents)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id, text in enumerate(documents):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for token, tf in Counter(tokens).items():
+                postings.setdefault(token, []).append((doc_id, tf))
+
+        self.vocabulary: Dict[str, int] = {}
+        offsets = [0]
+        docs: List[int] = []
+        tfs: List[int] = []
+        for term_id, (token, entries) in enumerate(postings.items()):
+            self.vocabulary[token] = term_id
+            docs.extend(doc_id for doc_id, _ in entries)
+            tfs.extend(tf for _, tf in entries)
+            offsets.append(len(docs))
+
+        self.postings_offsets = np.asarray(offsets, dtype=np.int64)
+        self.postings_docs = np.asarray(docs, dtype=np.int32)
+        self.postings_tf = np.asarray(tfs, dtype=np.float32)
+
+        doc_freq = np.diff(self.postings_offsets).astype(np.float32)
+        self.idf = np.log(1.0 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        # 预先计算每个文档的长度归一化项 k1 * (1 - b + b * |d| / avgdl)
+        self.length_norm = (k1 * (1.0 - b + b * doc_lengths / (avg_length or 1.0))).astype(np.float32)
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            limit: 返回结果的最大数量
+
+        Returns:
+            按得分降序排列的 (文档编号, BM25 得分)
+        """
+        term_ids = [self.vocabulary[token] for token in set(tokenize(query)) if token in self.vocabulary]
+        if not term_ids or limit <= 0:
+            return []
+
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + self.length_norm[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in candidates]
+
+    def memory_bytes(self) -> int:
+        """倒排数组占用的字节数"""
+        return int(self.postings_offsets.nbytes + self.postings_docs.nbytes + self.postings_tf.nbytes
+                   + self.idf.nbytes + self.length_norm.nbytes)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], weights: Sequence[float],
+                           k: int = 60) -> List[Tuple[str, float]]:
+    """
+    倒数排名融合 (RRF)
+
+    Args:
+        rankings: 每路检索按相关性排序的结果键列表
+        weights: 每路检索的权重
+        k: RRF 平滑常数
+
+    Returns:
+        按融合得分降序排列的 (结果键, 融合得分)
+    """
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.service_config import BUILD_PIPELINE_CONFIG
+from utils.build_pipeline import BuildPipeline, AdaptiveBatchSize, filter_chunks, iter_frame_chunks, log_pipeline_report
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_paths(db_path: str) -> Tuple[str, str]:
+    """
+    根据 Milvus 数据库路径推导检查点文件路径
+
+    Args:
+        db_path: Milvus 数据库路径，如 db/financial_terms_minilm.db
+
+    Returns:
+        (向量溢出文件路径, 检查点清单路径)，如 (db/financial_terms_minilm.build.npy, db/financial_terms_minilm.build.json)
+    """
+    base, _ = os.path.splitext(db_path)
+    return f"{base}.build.npy", f"{base}.build.json"
+
+
+def file_sha1(path: str) -> str:
+    """文件内容的 SHA-1，用于判断检查点对应的源文件是否变化"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def mask_to_ranges(mask: np.ndarray) -> List[List[int]]:
+    """布尔掩码转换为闭区间行号范围列表，如 [T, T, F, T] -> [[0, 1], [3, 3]]"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return [[int(start), int(end)] for start, end in zip(starts, ends)]
+
+
+def ranges_to_mask(ranges: List[List[int]], size: int) -> np.ndarray:
+    """闭区间行号范围列表转换为布尔掩码"""
+    mask = np.zeros(size, dtype=bool)
+    for start, end in ranges:
+        mask[start:end + 1] = True
+    return mask
+
+
+class BuildCheckpoint:
+    """
+    索引构建检查点
+
+    嵌入结果按行号写入内存映射的 .npy 溢出文件，清单（JSON）记录已嵌入、已插入和正在插入的行号范围。
+    构建中断后重新运行时跳过已插入的行，已嵌入但未插入的行直接使用溢出文件中的向量，
+    中断时正在插入的行先删除再重新插入，避免重复。
+    源文件、模型或维度变化时检查点作废，重新开始构建
+    """
+    def __init__(self, db_path: str, rows: int, dimension: int, fingerprint: Dict):
+        """
+        Args:
+            db_path: Milvus 数据库路径，用于推导检查点文件路径
+            rows: 源数据总行数
+            dimension: 向量维度
+            fingerprint: 检查点对应的构建参数（源文件哈希、模型、集合等），与已有清单不一致时不续建
+        """
+        self.vectors_path, self.manifest_path = checkpoint_paths(db_path)
+        self.rows = rows
+        self.dimension = dimension
+        self.fingerprint = fingerprint
+        self.embedded = np.zeros(rows, dtype=bool)
+        self.inserted = np.zeros(rows, dtype=bool)
+        self.inserting = np.zeros(rows, dtype=bool)
+        self.vectors: Optional[np.ndarray] = None
+        self.resumed = False
+
+    @classmethod
+    def open(cls, db_path: str, rows: int, dimension: int, fingerprint: Dict,
+             restart: bool = False) -> "BuildCheckpoint":
+        """
+        打开检查点：已有匹配的检查点时续建，否则创建新的溢出文件和清单
+
+        Args:
+            restart: 为 True 时忽略已有检查点
+        """
+        checkpoint = cls(db_path, rows, dimension, fingerprint)
+        if not restart and checkpoint._restore():
+            return checkpoint
+        os.makedirs(os.path.dirname(checkpoint.vectors_path) or ".", exist_ok=True)
+        checkpoint.vectors = np.lib.format.open_memmap(
+            checkpoint.vectors_path, mode="w+", dtype=np.float32, shape=(rows, dimension))
+        checkpoint.save()
+        return checkpoint
+
+    def _restore(self) -> bool:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+        except (OSError, ValueError):
+            return False
+        if (manifest.get("version") != CHECKPOINT_VERSION or manifest.get("fingerprint") != self.fingerprint
+                or vectors.shape != (self.rows, self.dimension)):
+            logger.info(f"检查点 {self.manifest_path} 与当前构建参数不一致，重新开始构建")
+            return False
+        self.vectors = vectors
+        self.embedded = ranges_to_mask(manifest["embedded"], self.rows)
+        self.inserted = ranges_to_mask(manifest["inserted"], self.rows)
+        self.inserting = ranges_to_mask(manifest["inserting"], self.rows)
+        self.resumed = True
+        return True
+
+    def save(self):
+        """刷新溢出文件并写入清单（先写临时文件再替换）"""
+        self.vectors.flush()
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION,
+                "fingerprint": self.fingerprint,
+                "rows": self.rows,
+                "dimension": self.dimension,
+                "embedded": mask_to_ranges(self.embedded),
+                "inserted": mask_to_ranges(self.inserted),
+                "inserting": mask_to_ranges(self.inserting),
+                "pending": mask_to_ranges(~self.inserted),
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def store(self, rows: np.ndarray, vectors: np.ndarray):
+        """写入一批嵌入结果并标记为已嵌入"""
+        self.vectors[rows] = vectors
+        self.embedded[rows] = True
+        self.save()
+
+    def begin_insert(self, rows: np.ndarray):
+        self.inserting[rows] = True
+        self.save()
+
+    def commit_insert(self, rows: np.ndarray):
+        self.inserting[rows] = False
+        self.inserted[rows] = True
+        self.save()
+
+    def clear_inserting(self):
+        self.inserting[:] = False
+        self.save()
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.inserted.all())
+
+    def remove(self):
+        """构建完成后删除溢出文件和清单"""
+        self.vectors = None
+        for path in (self.vectors_path, self.manifest_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def checkpointed_build(checkpoint: BuildCheckpoint,
+                       chunks: Callable[[], Iterable[pd.DataFrame]],
+                       embed: Callable[[List[str]], np.ndarray],
+                       insert: Callable[[pd.DataFrame, np.ndarray], None],
+                       delete: Optional[Callable[[np.ndarray], None]] = None,
+                       batch_size: Optional[AdaptiveBatchSize] = None,
+                       max_retries: Optional[int] = None,
+                       progress: Optional[Callable[[int], None]] = None,
+                       text_column: str = "term_name") -> Dict:
+    """
+    带检查点的索引构建
+
+    每轮先插入溢出文件中已嵌入但未插入的行，再用构建流水线嵌入并插入其余未完成的行；
+    嵌入或插入失败的行在下一轮重试，最多重试 max_retries 轮，仍失败的行保留在检查点中，下次运行时继续
+
+    Args:
+        checkpoint: 检查点
+        chunks: 每次调用返回一个按行号索引的 DataFrame 块迭代器（如 lambda: iter_csv_chunks(path)）
+        embed: 嵌入函数，输入文本列表，返回 float32 矩阵
+        insert: 插入函数，输入一批行和对应的向量矩阵
+        delete: 按行号删除已插入数据的函数，用于清理中断时正在插入的行；为 None 时不清理
+        batch_size: 批大小策略
+        max_retries: 失败行的重试轮数，默认为 BUILD_PIPELINE_CONFIG["max_retries"]
+        progress: 每插入一批后以该批行数调用
+        text_column: 用于嵌入的列
+
+    Returns:
+        构建报告：续建时已完成的行数、复用溢出向量的行数、每轮流水线报告、仍失败的行数和行号范围
+    """
+    max_retries = BUILD_PIPELINE_CONFIG["max_retries"] if max_retries is None else max_retries
+    batch_size = batch_size or AdaptiveBatchSize()
+    report = {
+        "resumed_rows": int(checkpoint.inserted.sum()),
+        "reused_vectors": 0,
+        "attempts": []
+    }
+
+    def insert_with_checkpoint(batch: pd.DataFrame, vectors: np.ndarray):
+        rows = batch.index.to_numpy()
+        checkpoint.store(rows, vectors)
+        checkpoint.begin_insert(rows)
+        insert(batch, vectors)
+        checkpoint.commit_insert(rows)
+
+    for attempt in range(max_retries + 1):
+        if checkpoint.inserting.any():
+            if delete is not None:
+                # 上次插入中断或失败的行可能已部分写入，先删除
+                delete(np.flatnonzero(checkpoint.inserting))
+            checkpoint.clear_inserting()
+
+        spilled = checkpoint.embedded & ~checkpoint.inserted
+        # 按当前批大小插入，一批失败不影响同一块中的其他行
+        spilled_batches = (batch for chunk in filter_chunks(chunks(), spilled)
+                           for batch in iter_frame_chunks(chunk, batch_size.size))
+        for batch in spilled_batches:
+            try:
+                insert_with_checkpoint(batch, np.asarray(checkpoint.vectors[batch.index.to_numpy()]))
+            except Exception as e:
+                logger.error(f"Insert failed for {len(batch)} spilled rows: {e}")
+                continue
+            report["reused_vectors"] += len(batch)
+            if progress is not None:
+                progress(len(batch))
+
+        pending = ~checkpoint.embedded
+        if pending.any():
+            pipeline = BuildPipeline(embed, insert_with_checkpoint, batch_size=batch_size, progress=progress,
+                                     text_column=text_column)
+            pipeline_report = pipeline.run(filter_chunks(chunks(), pending))
+            log_pipeline_report(pipeline_report)
+            report["attempts"].append(pipeline_report)
+
+        if checkpoint.complete:
+            break
+        if attempt < max_retries:
+            logger.warning(f"{int((~checkpoint.inserted).sum())} rows not inserted, retrying "
+                           f"({attempt + 1}/{max_retries})")
+
+    failed = ~checkpoint.inserted
+    report["failed_rows"] = int(failed.sum())
+    report["failed_ranges"] = mask_to_ranges(failed)
+    if report["failed_rows"]:
+        logger.error(f"{report['failed_rows']} rows failed after {max_retries} retries: {report['failed_ranges']}, "
+                     f"checkpoint kept at {checkpoint.manifest_path}, re-run to continue")
+    return report
@@ -0,0 +1,309 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.service_config import BUILD_PIPELINE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+# 金融术语 CSV 的列（文件无表头）
+TERM_COLUMNS = ['term_name', 'term_type']
+
+
+def iter_csv_chunks(path: str, chunk_rows: Optional[int] = None,
+                    names: Optional[List[str]] = TERM_COLUMNS) -> Iterator[pd.DataFrame]:
+    """
+    按块读取 CSV，默认为术语 CSV（term_name, term_type，无表头）
+
+    Args:
+        path: CSV 文件路径
+        chunk_rows: 每块行数，默认为 BUILD_PIPELINE_CONFIG["chunk_rows"]
+        names: 列名，为 None 时使用文件首行的表头
+
+    Returns:
+        DataFrame 迭代器，索引为行在文件中的行号（跨块连续，不含表头）
+    """
+    reader = pd.read_csv(path,
+                         names=names,
+                         dtype=str,
+                         chunksize=chunk_rows or BUILD_PIPELINE_CONFIG["chunk_rows"])
+    for chunk in reader:
+        yield chunk.fillna("NA")
+
+
+def count_csv_rows(path: str, names: Optional[List[str]] = TERM_COLUMNS) -> int:
+    """CSV 的行数（与 iter_csv_chunks 的行号范围一致，names 含义相同）"""
+    return sum(len(chunk) for chunk in iter_csv_chunks(path, names=names))
+
+
+def filter_chunks(chunks: Iterable[pd.DataFrame], mask: np.ndarray) -> Iterator[pd.DataFrame]:
+    """只保留 mask 中行号为 True 的行，跳过过滤后为空的块"""
+    for chunk in chunks:
+        selected = chunk[mask[chunk.index.to_numpy()]]
+        if len(selected):
+            yield selected
+
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """把已加载的 DataFrame 按块切分，供流水线使用"""
+    chunk_rows = chunk_rows or BUILD_PIPELINE_CONFIG["chunk_rows"]
+    for start_idx in range(0, len(df), chunk_rows):
+        yield df.iloc[start_idx:start_idx + chunk_rows]
+
+
+class AdaptiveBatchSize:
+    """
+    按实测嵌入吞吐调整批大小，使每批嵌入耗时接近目标值
+    每次调整最多翻倍或减半，结果取 minimum 的整数倍
+    """
+    def __init__(self, initial: Optional[int] = None, minimum: Optional[int] = None,
+                 maximum: Optional[int] = None, target_seconds: Optional[float] = None,
+                 adaptive: bool = True):
+        """
+        Args:
+            initial: 初始批大小
+            minimum: 最小批大小
+            maximum: 最大批大小
+            target_seconds: 每批嵌入的目标耗时（秒）
+            adaptive: 为 False 时始终使用初始批大小
+        """
+        self.minimum = minimum or BUILD_PIPELINE_CONFIG["min_batch_size"]
+        self.maximum = maximum or BUILD_PIPELINE_CONFIG["max_batch_size"]
+        self.target_seconds = target_seconds or BUILD_PIPELINE_CONFIG["target_batch_seconds"]
+        self.size = initial or BUILD_PIPELINE_CONFIG["initial_batch_size"]
+        self.adaptive = adaptive
+        self.rows_per_second: Optional[float] = None
+
+    def record(self, rows: int, seconds: float):
+        """记录一批嵌入的行数和耗时，更新下一批的大小"""
+        if not self.adaptive or rows == 0 or seconds <= 0:
+            return
+        rate = rows / seconds
+        # 指数平滑，避免单批波动导致批大小来回跳动
+        self.rows_per_second = rate if self.rows_per_second is None else 0.5 * rate + 0.5 * self.rows_per_second
+        size = int(self.rows_per_second * self.target_seconds) // self.minimum * self.minimum
+        size = max(self.size // 2, min(self.size * 2, size))
+        self.size = max(self.minimum, min(self.maximum, size))
+
+
+class StageStats:
+    """流水线单个阶段的行数和耗时（只统计处理时间，不含等待队列的时间）"""
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def add(self, rows: int, seconds: float):
+        self.rows += rows
+        self.batches += 1
+        self.seconds += seconds
+
+    def report(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds > 0 else None
+        }
+
+
+class BuildPipeline:
+    """
+    索引构建流水线：读取 -> 嵌入 -> 插入
+
+    读取和嵌入各在一个线程中运行，插入在调用线程中运行，阶段之间用有界队列连接；
+    嵌入模型计算时会释放 GIL，因此嵌入下一批与插入上一批可以重叠执行。
+    批大小由 AdaptiveBatchSize 按实测嵌入吞吐调整，读取阶段按当前批大小把 CSV 块重新切分为批。
+    嵌入或插入失败的批会记录在结果的 failed 中，不影响其他批
+    """
+    def __init__(self, embed: Callable[[List[str]], np.ndarray],
+                 insert: Callable[[pd.DataFrame, np.ndarray], None],
+                 text_column: str = "term_name",
+                 batch_size: Optional[AdaptiveBatchSize] = None,
+                 queue_size: Optional[int] = None,
+                 progress: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            embed: 嵌入函数，输入文本列表，返回 (行数, 维度) 的 float32 矩阵
+            insert: 插入函数，输入一批行和对应的向量矩阵
+            text_column: 用于嵌入的列
+            batch_size: 批大小策略，默认按 BUILD_PIPELINE_CONFIG 自适应
+            queue_size: 阶段之间队列的最大批数
+            progress: 每插入一批后以该批行数调用（如 tqdm.update）
+        """
+        self.embed = embed
+        self.insert = insert
+        self.text_column = text_column
+        self.batch_size = batch_size or AdaptiveBatchSize()
+        self.queue_size = queue_size or BUILD_PIPELINE_CONFIG["queue_size"]
+        self.progress = progress
+        self.stats = {name: StageStats(name) for name in ("read", "embed", "insert")}
+        self.failed: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread_error: Optional[BaseException] = None
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """放入队列，流水线已停止时放弃并返回 False"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue):
+        """从队列取出一项，流水线已停止时返回结束标记"""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _record_failure(self, stage: str, batch: pd.DataFrame, error: Exception):
+        start, end = int(batch.index[0]), int(batch.index[-1])
+        logger.error(f"{stage} failed for rows {start}-{end}: {error}")
+        self.failed.append({"stage": stage, "start": start, "end": end, "rows": len(batch), "error": str(error)})
+
+    def _guarded(self, stage: Callable, *args):
+        """运行阶段线程，记录逐批处理之外的意外异常（包括 BaseException）并停止流水线"""
+        try:
+            stage(*args)
+        except BaseException as e:
+            logger.error(f"{threading.current_thread().name} stopped unexpectedly: {e!r}")
+            self._thread_error = e
+            self._stop.set()
+
+    def _read(self, chunks: Iterable[pd.DataFrame], output: queue.Queue):
+        """读取阶段：按当前批大小把 CSV 块切分为批"""
+        buffer = None
+        try:
+            started = time.perf_counter()
+            for chunk in chunks:
+                buffer = chunk if buffer is None or buffer.empty else pd.concat([buffer, chunk])
+                while len(buffer) >= self.batch_size.size:
+                    size = self.batch_size.size
+                    batch, buffer = buffer.iloc[:size], buffer.iloc[size:]
+                    self.stats["read"].add(len(batch), time.perf_counter() - started)
+                    if not self._put(output, batch):
+                        return
+                    started = time.perf_counter()
+            if buffer is not None and not buffer.empty:
+                self.stats["read"].add(len(buffer), time.perf_counter() - started)
+                self._put(output, buffer)
+        except Exception as e:
+            # 读取失败时无法继续，交给调用线程抛出
+            self._put(output, e)
+        finally:
+            self._put(output, _DONE)
+
+    def _embed(self, source: queue.Queue, output: queue.Queue):
+        """嵌入阶段"""
+        while True:
+            batch = self._get(source)
+            if batch is _DONE or isinstance(batch, Exception):
+                self._put(output, batch)
+                if batch is _DONE:
+                    return
+                continue
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.embed(batch[self.text_column].tolist()), dtype=np.float32)
+            except Exception as e:
+                self._record_failure("embed", batch, e)
+                continue
+            seconds = time.perf_counter() - started
+            self.stats["embed"].add(len(batch), seconds)
+            self.batch_size.record(len(batch), seconds)
+            if not self._put(output, (batch, vectors)):
+                return
+
+    def run(self, chunks: Iterable[pd.DataFrame]) -> Dict:
+        """
+        运行流水线直到所有块处理完成
+
+        Args:
+            chunks: DataFrame 块的迭代器（iter_csv_chunks / iter_frame_chunks）
+
+        Returns:
+            各阶段的行数、耗时和每秒行数，总耗时，最终批大小，以及失败的批
+
+        Raises:
+            Exception: 读取阶段的异常，或读取 / 嵌入线程在逐批处理之外的意外异常
+        """
+        read_queue = queue.Queue(maxsize=self.queue_size)
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._guarded, args=(self._read, chunks, read_queue),
+                             name="build-read", daemon=True),
+            threading.Thread(target=self._guarded, args=(self._embed, read_queue, embed_queue),
+                             name="build-embed", daemon=True),
+        ]
+        embed_thread = threads[1]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                try:
+                    item = embed_queue.get(timeout=0.1)
+                except queue.Empty:
+                    # 嵌入线程意外退出时不会再放入结束标记，抛出其异常而不是一直等待
+                    if self._thread_error is not None:
+                        raise self._thread_error
+                    if not embed_thread.is_alive():
+                        raise RuntimeError("build-embed thread exited without finishing the pipeline")
+                    continue
+                if item is _DONE:
+                    if self._thread_error is not None:
+                        raise self._thread_error
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch, vectors = item
+                insert_started = time.perf_counter()
+                try:
+                    self.insert(batch, vectors)
+                except Exception as e:
+                    self._record_failure("insert", batch, e)
+                    continue
+                self.stats["insert"].add(len(batch), time.perf_counter() - insert_started)
+                if self.progress is not None:
+                    self.progress(len(batch))
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.perf_counter() - started
+        report = {name: stats.report() for name, stats in self.stats.items()}
+        report.update({
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.stats["insert"].rows / elapsed, 1) if elapsed > 0 else None,
+            "final_batch_size": self.batch_size.size,
+            "failed": self.failed
+        })
+        return report
+
+
+def log_pipeline_report(report: Dict):
+    """输出各阶段的吞吐"""
+    for name in ("read", "embed", "insert"):
+        stage = report[name]
+        logger.info(f"{name:>6}: {stage['rows']} rows in {stage['batches']} batches, "
+                    f"{stage['seconds']:.1f}s busy, {stage['rows_per_second']} rows/s")
+    logger.info(f"overall: {report['insert']['rows']} rows in {report['seconds']:.1f}s "
+                f"({report['rows_per_second']} rows/s), final batch size {report['final_batch_size']}, "
+                f"{len(report['failed'])} failed batches")
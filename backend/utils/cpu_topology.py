@@ -0,0 +1,176 @@
+import logging
+import math
+import os
+import platform
+import sys
+from typing import Dict, List, Optional
+
+from config.service_config import CPU_TOPOLOGY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 当前进程已应用的线程配置，供 /api/config 报告
+_applied: Optional[Dict] = None
+
+
+def available_cpus() -> List[int]:
+    """当前进程允许使用的逻辑 CPU 编号（Linux 上考虑 taskset / cpuset 限制）"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_core_cpus(cpus: List[int]) -> List[int]:
+    """
+    每个物理核心只保留一个逻辑 CPU（去掉超线程的兄弟线程）
+
+    Linux 上读取 /sys/devices/system/cpu/cpuN/topology，无法读取时返回原列表
+    """
+    seen = set()
+    primary = []
+    for cpu in cpus:
+        topology_dir = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology_dir, "physical_package_id")) as f:
+                package_id = f.read().strip()
+            with open(os.path.join(topology_dir, "core_id")) as f:
+                core_id = f.read().strip()
+        except OSError:
+            return cpus
+        if (package_id, core_id) not in seen:
+            seen.add((package_id, core_id))
+            primary.append(cpu)
+    return primary
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """容器的 CPU 配额（核心数），未设置配额或不在 Linux 上时返回 None"""
+    try:
+        # cgroup v2: "<quota> <period>" 或 "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def plan_topology(workers: int = 1, threads_per_worker: Optional[int] = None) -> Dict:
+    """
+    根据 CPU 拓扑和 CPU_TOPOLOGY_CONFIG 规划每个工作进程的线程数和绑定的核心
+
+    Args:
+        workers: 工作进程数
+        threads_per_worker: 每个工作进程的算子内线程数，默认按可用核心数平均分配
+
+    Returns:
+        线程规划，worker_cpus 为每个工作进程可绑定的逻辑 CPU 列表
+    """
+    cpus = available_cpus()
+    cores = physical_core_cpus(cpus) if CPU_TOPOLOGY_CONFIG["use_physical_cores"] else cpus
+    cpu_limit = cgroup_cpu_limit()
+    usable = len(cores)
+    if cpu_limit is not None:
+        usable = min(usable, max(1, math.floor(cpu_limit)))
+    usable = max(1, usable - CPU_TOPOLOGY_CONFIG["reserve_cores"])
+
+    intra_op_threads = threads_per_worker or CPU_TOPOLOGY_CONFIG["intra_op_threads"] or max(1, usable // workers)
+    # 每个工作进程分配连续的一组核心，核心不足时循环分配
+    worker_cpus = []
+    for worker_id in range(workers):
+        start = (worker_id * intra_op_threads) % len(cores)
+        worker_cpus.append((cores[start:] + cores[:start])[:intra_op_threads])
+    return {
+        "platform": platform.system(),
+        "logical_cpus": len(cpus),
+        "physical_cores": len(physical_core_cpus(cpus)),
+        "cgroup_cpu_limit": cpu_limit,
+        "usable_cores": usable,
+        "workers": workers,
+        "intra_op_threads": intra_op_threads,
+        "inter_op_threads": CPU_TOPOLOGY_CONFIG["inter_op_threads"],
+        # 多进程时每个进程的分词并行会与其他进程争用核心
+        "tokenizers_parallelism": CPU_TOPOLOGY_CONFIG["tokenizers_parallelism"] and workers == 1,
+        "pin_cores": CPU_TOPOLOGY_CONFIG["pin_cores"] and hasattr(os, "sched_setaffinity"),
+        "worker_cpus": worker_cpus,
+    }
+
+
+def apply_topology(plan: Dict, worker_id: int = 0, intra_op_threads: Optional[int] = None) -> Dict:
+    """
+    在当前进程中应用线程规划
+
+    设置 OMP / MKL / OpenBLAS 线程数和分词并行的环境变量（torch 尚未导入时在导入时生效），
+    torch 已导入时直接设置算子内 / 算子间线程数，并按配置把进程绑定到规划的核心
+
+    Args:
+        plan: plan_topology 的结果
+        worker_id: 工作进程编号，用于选择绑定的核心
+        intra_op_threads: 覆盖规划中的算子内线程数（如多进程模式的父进程加载模型时使用 1）
+
+    Returns:
+        实际应用的配置
+    """
+    global _applied
+    threads = intra_op_threads or plan["intra_op_threads"]
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if plan["tokenizers_parallelism"] else "false"
+
+    pinned = None
+    if plan["pin_cores"] and intra_op_threads is None:
+        pinned = plan["worker_cpus"][worker_id % len(plan["worker_cpus"])]
+        try:
+            os.sched_setaffinity(0, pinned)
+        except OSError as e:
+            logger.warning(f"绑定核心失败: {e}")
+            pinned = None
+
+    _applied = {
+        **plan,
+        "pid": os.getpid(),
+        "worker_id": worker_id,
+        "applied_intra_op_threads": threads,
+        "pinned_cpus": pinned,
+    }
+    if "torch" in sys.modules:
+        configure_torch()
+    logger.info(
+        f"应用 CPU 线程配置: 进程 {os.getpid()} 算子内线程 {threads}，算子间线程 {plan['inter_op_threads']}，"
+        f"绑定核心 {pinned if pinned is not None else '不绑定'}"
+    )
+    return _applied
+
+
+def configure_torch():
+    """按已应用的线程配置设置 torch（在 torch 首次导入后调用）"""
+    if _applied is None or "torch" not in sys.modules:
+        return
+    torch = sys.modules["torch"]
+    torch.set_num_threads(_applied["applied_intra_op_threads"])
+    try:
+        # 算子间线程池只能在首次并行计算之前设置一次
+        torch.set_interop_threads(_applied["inter_op_threads"])
+    except RuntimeError:
+        pass
+    _applied["torch_threads"] = torch.get_num_threads()
+
+
+def applied_intra_op_threads() -> Optional[int]:
+    """当前进程的算子内线程数，未应用规划时返回 None（ONNX Runtime 等在创建会话时使用）"""
+    return _applied["applied_intra_op_threads"] if _applied is not None else None
+
+
+def applied_topology() -> Optional[Dict]:
+    """当前进程已应用的线程配置"""
+    return dict(_applied) if _applied is not None else None
@@ -0,0 +1,317 @@
+import csv
+import json
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.service_config import EMBEDDING_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+def normalize_text(text: str) -> str:
+    """缓存键使用的文本规范化：NFKC 并折叠空白，不改变大小写（部分模型区分大小写）"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """
+    两级查询向量缓存
+    第一级为进程内有界 LRU（float32 数组），第二级为 SQLite 磁盘存储（进程重启后仍然有效），
+    键为 (模型名称, 规范化文本)。
+    锁只保护内存 LRU 和统计，SQLite 读写在锁外进行，每个线程使用自己的连接
+    """
+    # 单条 SQL 中 IN (...) 列出的文本数量（低于 SQLite 默认的 999 个参数上限）
+    DISK_LOOKUP_CHUNK = 500
+
+    def __init__(self, memory_size: int = 10000, disk_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            memory_size: 内存 LRU 最多保存的向量数量
+            disk_path: SQLite 文件路径，为 None 时只使用内存缓存
+        """
+        self.memory_size = memory_size
+        self.disk_path = disk_path
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[CacheKey, np.ndarray]" = OrderedDict()
+        self._local = threading.local()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._connection()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """当前线程的 SQLite 连接，首次使用时打开并确保表存在"""
+        if not self.disk_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text))"
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def reopen_after_fork(self):
+        """子进程中重新创建锁和 SQLite 连接（SQLite 连接不能跨 fork 使用）"""
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _read_disk(self, model: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """按文本批量读取磁盘缓存，每 DISK_LOOKUP_CHUNK 个文本一条查询"""
+        conn = self._connection()
+        found = {}
+        for start in range(0, len(texts), self.DISK_LOOKUP_CHUNK):
+            chunk = texts[start:start + self.DISK_LOOKUP_CHUNK]
+            rows = conn.execute(
+                f"SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({', '.join('?' * len(chunk))})",
+                (model, *chunk)
+            ).fetchall()
+            for text, blob in rows:
+                found[text] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def get_many(self, model: str, texts: List[str], record_stats: bool = True) -> List[Optional[np.ndarray]]:
+        """
+        批量查询缓存
+
+        Args:
+            model: 模型名称
+            texts: 已规范化的文本列表
+            record_stats: 是否计入命中统计（预热时不计入）
+
+        Returns:
+            与 texts 一一对应的 float32 向量（只读，调用方不应修改），未命中的位置为 None
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        disk_lookup = []
+
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = (model, text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                else:
+                    disk_lookup.append(i)
+            if record_stats:
+                self.memory_hits += len(texts) - len(disk_lookup)
+
+        if not disk_lookup:
+            return results
+
+        found = {}
+        if self.disk_path:
+            found = self._read_disk(model, list(dict.fromkeys(texts[i] for i in disk_lookup)))
+        for i in disk_lookup:
+            results[i] = found.get(texts[i])
+
+        with self._lock:
+            for text, vector in found.items():
+                self._remember((model, text), vector)
+            if record_stats:
+                disk_hits = sum(1 for i in disk_lookup if results[i] is not None)
+                self.disk_hits += disk_hits
+                self.misses += len(disk_lookup) - disk_hits
+
+        return results
+
+    def put_many(self, model: str, texts: List[str], vectors: Iterable):
+        """
+        批量写入缓存（同时写入内存和磁盘）
+
+        Args:
+            model: 模型名称
+            texts: 已规范化的文本列表
+            vectors: 与 texts 一一对应的向量
+        """
+        arrays = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+        with self._lock:
+            for text, vector in zip(texts, arrays):
+                self._remember((model, text), vector)
+        conn = self._connection()
+        if conn is not None:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text, vector) VALUES (?, ?, ?)",
+                [(model, text, vector.tobytes()) for text, vector in zip(texts, arrays)]
+            )
+            conn.commit()
+
+    def _remember(self, key: CacheKey, vector: np.ndarray):
+        """写入内存 LRU 并淘汰超出容量的条目（调用方需持有锁）"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """返回命中统计"""
+        disk_entries = None
+        conn = self._connection()
+        if conn is not None:
+            disk_entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size,
+                "memory_bytes": sum(vector.nbytes for vector in self._memory.values()),
+                "disk_entries": disk_entries,
+                "disk_path": self.disk_path
+            }
+
+
+class CachedEmbeddings:
+    """
+    带缓存的嵌入函数包装
+    与 LangChain Embeddings 接口一致（embed_query / embed_documents），只对未命中的文本调用底层模型。
+    规范化文本只用作缓存键，未命中时把调用方的原始文本交给模型，向量与建索引时的编码一致
+    """
+    def __init__(self, embeddings, model_name: str, cache: EmbeddingCache):
+        """
+        Args:
+            embeddings: 底层嵌入函数
+            model_name: 模型名称，作为缓存键的一部分
+            cache: 共享的向量缓存
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_query(self, text: str) -> List[float]:
+        """获取单个查询的向量，优先读取缓存"""
+        key = normalize_text(text)
+        cached = self.cache.get_many(self.model_name, [key])[0]
+        if cached is not None:
+            return cached.tolist()
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, [key], [vector])
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """批量获取向量，未命中的文本在一次调用中统一计算"""
+        keys = [normalize_text(text) for text in texts]
+        results = self.cache.get_many(self.model_name, keys)
+
+        # 同一缓存键的多个原始文本只计算第一个
+        missing: Dict[str, str] = {}
+        for text, key, vector in zip(texts, keys, results):
+            if vector is None:
+                missing.setdefault(key, text)
+        computed = {}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(self.model_name, list(missing), vectors)
+            computed = dict(zip(missing, vectors))
+
+        # 缓存中为 float32 数组，返回给 LangChain 调用方时转换为列表
+        return [vector.tolist() if vector is not None else computed[key]
+                for key, vector in zip(keys, results)]
+
+    def close(self):
+        """释放底层嵌入函数（共享模型的引用）"""
+        if hasattr(self.embeddings, "close"):
+            self.embeddings.close()
+
+    def prewarm(self, texts: Iterable[str], batch_size: int = 256) -> int:
+        """
+        预热缓存：计算并写入尚未缓存的文本向量
+
+        Args:
+            texts: 待预热的文本
+            batch_size: 每次调用底层模型的文本数量
+
+        Returns:
+            新写入缓存的向量数量
+        """
+        originals: Dict[str, str] = {}
+        for text in texts:
+            if text and text.strip():
+                originals.setdefault(normalize_text(text), text)
+        keys = list(originals)
+        added = 0
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            cached = self.cache.get_many(self.model_name, batch, record_stats=False)
+            missing = [key for key, vector in zip(batch, cached) if vector is None]
+            if missing:
+                vectors = self.embeddings.embed_documents([originals[key] for key in missing])
+                self.cache.put_many(self.model_name, missing, vectors)
+                added += len(missing)
+        return added
+
+    def prewarm_from_terms(self, csv_path: str, batch_size: int = 256) -> int:
+        """从金融术语 CSV（term_name, term_type，无表头）预热缓存"""
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            terms = [row[0] for row in csv.reader(f) if row]
+        return self.prewarm(terms, batch_size)
+
+    def prewarm_from_query_log(self, log_path: str, batch_size: int = 256) -> int:
+        """
+        从查询日志预热缓存
+        日志每行一个查询，支持纯文本或包含 "text"/"query" 字段的 JSON 行
+        """
+        queries = []
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    try:
+                        record = json.loads(line)
+                        line = record.get("text") or record.get("query") or ""
+                    except json.JSONDecodeError:
+                        pass
+                queries.append(line)
+        return self.prewarm(queries, batch_size)
+
+
+_shared_cache: Optional[EmbeddingCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """获取进程级共享的向量缓存"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache(
+                memory_size=EMBEDDING_CACHE_CONFIG["memory_size"],
+                disk_path=EMBEDDING_CACHE_CONFIG["disk_path"]
+            )
+        return _shared_cache
+
+
+def _reopen_shared_cache_after_fork():
+    global _shared_cache_lock
+    _shared_cache_lock = threading.Lock()
+    if _shared_cache is not None:
+        _shared_cache.reopen_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_shared_cache_after_fork)
@@ -6,9 +6,11 @@ class EmbeddingProvider(Enum):
     BEDROCK = "bedrock"
     OPENAI = "openai"
     HUGGINGFACE = "huggingface"
+    ONNX = "onnx"
 
 @dataclass
 class EmbeddingConfig:
     provider: EmbeddingProvider
     model_name: str  # 直接使用字符串，而不是枚举
     aws_region: Optional[str] = None
+    use_cache: bool = True  # 是否使用查询向量缓存（还需 EMBEDDING_CACHE_CONFIG["enabled"] 开启）
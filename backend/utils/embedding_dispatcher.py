@@ -0,0 +1,150 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.micro_batcher import MicroBatcher
+from config.service_config import EMBEDDING_BATCHING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DispatcherKey = Tuple[str, str]
+
+
+class _DispatcherEntry:
+    """单个模型的共享嵌入函数、批处理调度器和引用计数"""
+    def __init__(self):
+        self.embeddings = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.batch_queries = False
+        self.error: Optional[Exception] = None
+        self.ref_count = 0
+        self.ready = threading.Event()
+
+
+_entries: Dict[DispatcherKey, _DispatcherEntry] = {}
+_entries_lock = threading.Lock()
+
+
+def symmetric_query_encoding(embeddings) -> bool:
+    """
+    查询与文档是否使用相同的编码（embed_query(text) 与 embed_documents([text])[0] 一致）
+
+    嵌入函数可以用 symmetric_queries 属性声明；langchain_huggingface.HuggingFaceEmbeddings
+    未设置 query_encode_kwargs 时两者相同。带查询指令或前缀的实现（HuggingFaceBgeEmbeddings、
+    InstructEmbeddings 等）以及无法确认的提供商视为不对称
+    """
+    declared = getattr(embeddings, "symmetric_queries", None)
+    if declared is not None:
+        return bool(declared)
+    if type(embeddings).__name__ == "HuggingFaceEmbeddings":
+        return not getattr(embeddings, "query_encode_kwargs", None)
+    return False
+
+
+def acquire_embeddings(key: DispatcherKey, create: Callable[[], Any]) -> "BatchedEmbeddings":
+    """
+    获取指定模型的共享嵌入函数并增加引用计数，使用完毕后调用返回对象的 close
+
+    同一模型只调用一次 create 加载模型，所有调用方（不同接口、不同 StdService 实例）共用该模型和它的批处理调度器；
+    最后一个引用释放后关闭调度器并移除条目，模型随之释放
+
+    Args:
+        key: (provider, model_name)
+        create: 创建底层嵌入函数的函数，只在该模型尚未加载时调用
+
+    Returns:
+        共享调度器上的嵌入函数包装
+
+    Raises:
+        Exception: 模型加载失败时抛出原始异常
+    """
+    with _entries_lock:
+        entry = _entries.get(key)
+        creator = entry is None
+        if creator:
+            entry = _DispatcherEntry()
+            _entries[key] = entry
+        entry.ref_count += 1
+
+    if creator:
+        # 在锁外加载模型，避免阻塞其他模型的获取
+        try:
+            entry.embeddings = create()
+            entry.batcher = MicroBatcher(
+                entry.embeddings.embed_documents,
+                max_batch_size=EMBEDDING_BATCHING_CONFIG["max_batch_size"],
+                max_wait_ms=EMBEDDING_BATCHING_CONFIG["max_wait_ms"],
+                name=f"embedding:{key[1]}"
+            )
+            entry.batch_queries = symmetric_query_encoding(entry.embeddings)
+        except Exception as e:
+            entry.error = e
+            with _entries_lock:
+                if _entries.get(key) is entry:
+                    del _entries[key]
+        finally:
+            entry.ready.set()
+    else:
+        entry.ready.wait()
+
+    if entry.error is not None:
+        raise entry.error
+    return BatchedEmbeddings(key, entry)
+
+
+def _release(key: DispatcherKey, entry: _DispatcherEntry):
+    with _entries_lock:
+        entry.ref_count -= 1
+        if entry.ref_count > 0 or _entries.get(key) is not entry:
+            return
+        del _entries[key]
+    entry.batcher.close()
+    logger.info(f"Released shared embedding model {key[0]}:{key[1]}")
+
+
+def dispatcher_stats() -> Dict:
+    """各模型调度器的引用数、队列深度和批大小分布"""
+    with _entries_lock:
+        entries = {key: entry for key, entry in _entries.items() if entry.batcher is not None}
+        refs = {key: entry.ref_count for key, entry in entries.items()}
+    return {
+        f"{provider}:{model}": dict(entry.batcher.stats(), ref_count=refs[(provider, model)],
+                                    batch_queries=entry.batch_queries)
+        for (provider, model), entry in entries.items()
+    }
+
+
+class BatchedEmbeddings:
+    """
+    跨请求合并的嵌入函数包装
+    与 LangChain Embeddings 接口一致，所有文本都提交到该模型的共享调度器，
+    并发的短查询在一个短等待窗口内合并为一次前向计算。
+    查询只在编码与文档一致时合并（symmetric_query_encoding），否则直接调用底层模型的 embed_query
+    """
+    def __init__(self, key: DispatcherKey, entry: _DispatcherEntry):
+        """
+        Args:
+            key: (provider, model_name)
+            entry: acquire_embeddings 获取的共享条目
+        """
+        self.key = key
+        self._entry = entry
+        self.embeddings = entry.embeddings
+        self.batcher = entry.batcher
+        self._closed = False
+
+    def embed_query(self, text: str) -> List[float]:
+        if not self._entry.batch_queries:
+            return self.embeddings.embed_query(text)
+        return self.batcher(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # 逐条提交后统一等待，调度器会把它们与其他请求的文本合并
+        futures = [self.batcher.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """释放对共享模型的引用（重复调用无效）"""
+        if not self._closed:
+            self._closed = True
+            _release(self.key, self._entry)
@@ -1,16 +1,38 @@
 import dotenv
 dotenv.load_dotenv()
-from langchain_community.embeddings import BedrockEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import OpenAIEmbeddings
-import boto3
 import os
 from utils.embedding_config import EmbeddingProvider, EmbeddingConfig
+from utils.embedding_cache import CachedEmbeddings, get_embedding_cache
+from utils.embedding_dispatcher import acquire_embeddings
+from utils.onnx_embeddings import OnnxEmbeddings, onnx_embedding_dir
+from utils.cpu_topology import configure_torch, applied_intra_op_threads
+from config.service_config import EMBEDDING_CACHE_CONFIG, EMBEDDING_BATCHING_CONFIG, ONNX_EMBEDDING_CONFIG
 
 class EmbeddingFactory:
     @staticmethod
     def create_embedding_function(config: EmbeddingConfig):
+        if EMBEDDING_BATCHING_CONFIG["enabled"]:
+            # 同一模型只加载一次，并合并所有调用方的并发嵌入请求；不再使用时调用 close 释放引用
+            embedding_func = acquire_embeddings(
+                (config.provider.value, config.model_name),
+                lambda: EmbeddingFactory._create_provider_function(config)
+            )
+        else:
+            embedding_func = EmbeddingFactory._create_provider_function(config)
+        if config.use_cache and EMBEDDING_CACHE_CONFIG["enabled"]:
+            # 按 (模型名称, 规范化文本) 缓存查询向量；ONNX 向量与原模型有微小偏差，单独缓存
+            cache_name = config.model_name
+            if config.provider == EmbeddingProvider.ONNX:
+                cache_name = f"{config.model_name}@onnx"
+            return CachedEmbeddings(embedding_func, cache_name, get_embedding_cache())
+        return embedding_func
+
+    @staticmethod
+    def _create_provider_function(config: EmbeddingConfig):
+        # 各提供商的依赖只在首次使用时导入，未使用的提供商不占用启动时间和内存
         if config.provider == EmbeddingProvider.BEDROCK:
+            import boto3
+            from langchain_community.embeddings import BedrockEmbeddings
             bedrock_client = boto3.client(
                 service_name='bedrock-runtime',
                 region_name=config.aws_region,
@@ -23,22 +45,35 @@ class EmbeddingFactory:
             )
             
         elif config.provider == EmbeddingProvider.OPENAI:
+            from langchain_openai import OpenAIEmbeddings
             return OpenAIEmbeddings(
                 model=config.model_name,
                 openai_api_key=os.getenv('OPENAI_API_KEY')
             )
             
         elif config.provider == EmbeddingProvider.HUGGINGFACE:
+            from langchain_huggingface import HuggingFaceEmbeddings
             # 尝试使用本地模型
-            import os
             local_model_path = f"../models/{config.model_name.replace('/', '_')}"
             if os.path.exists(local_model_path):
-                return HuggingFaceEmbeddings(
+                embeddings = HuggingFaceEmbeddings(
                     model_name=local_model_path
                 )
             else:
-                return HuggingFaceEmbeddings(
+                embeddings = HuggingFaceEmbeddings(
                     model_name=config.model_name
                 )
+            # 按启动时应用的 CPU 线程配置设置 torch
+            configure_torch()
+            return embeddings
+            
+        elif config.provider == EmbeddingProvider.ONNX:
+            # 使用导出的 ONNX（可选 int8 量化）模型，池化与归一化方式与原模型一致
+            return OnnxEmbeddings(
+                onnx_embedding_dir(config.model_name, ONNX_EMBEDDING_CONFIG["root_dir"]),
+                quantized=ONNX_EMBEDDING_CONFIG["quantized"],
+                batch_size=ONNX_EMBEDDING_CONFIG["batch_size"],
+                num_threads=applied_intra_op_threads()
+            )
             
         raise ValueError(f"Unsupported embedding provider: {config.provider}")
\ No newline at end of file
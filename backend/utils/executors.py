@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from config.service_config import STAGE_EXECUTOR_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class StageExecutor:
+    """
+    单个处理阶段的有界执行器
+    同步任务在专用线程池中运行，并用信号量限制同时进入该阶段的请求数量，
+    使不同阶段（如 CPU 推理与 LLM 调用）互不阻塞事件循环，也互不排队
+    """
+    def __init__(self, name: str, max_workers: int, max_concurrency: int):
+        """
+        Args:
+            name: 阶段名称
+            max_workers: 线程池大小
+            max_concurrency: 同时进入该阶段的最大请求数（超出的请求在事件循环中等待，不占用线程）
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-stage")
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # 在事件循环内创建信号量，避免绑定到错误的事件循环
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """在该阶段的线程池中运行同步函数并等待结果"""
+        semaphore = self._get_semaphore()
+        admitted = False
+        with self._lock:
+            self.waiting += 1
+        try:
+            async with semaphore:
+                with self._lock:
+                    self.waiting -= 1
+                    self.running += 1
+                admitted = True
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+                finally:
+                    with self._lock:
+                        self.running -= 1
+                        self.completed += 1
+        finally:
+            # 在进入阶段之前被取消时，修正等待计数
+            if not admitted:
+                with self._lock:
+                    self.waiting -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_concurrency": self.max_concurrency,
+                "waiting": self.waiting,
+                "running": self.running,
+                "completed": self.completed
+            }
+
+
+_executors: Dict[str, StageExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(stage: str) -> StageExecutor:
+    """获取指定阶段的共享执行器（阶段配置见 STAGE_EXECUTOR_CONFIG）"""
+    with _executors_lock:
+        if stage not in _executors:
+            config = STAGE_EXECUTOR_CONFIG[stage]
+            _executors[stage] = StageExecutor(stage, config["max_workers"], config["max_concurrency"])
+            logger.info(f"创建 {stage} 阶段执行器: {config}")
+        return _executors[stage]
+
+
+async def run_in_stage(stage: str, func: Callable, *args, **kwargs):
+    """在指定阶段的执行器中运行同步函数"""
+    return await get_executor(stage).run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict:
+    """所有已创建阶段的运行状态"""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.stats() for executor in executors}
+
+
+def shutdown_executors():
+    """关闭所有阶段执行器"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+def _reset_executors_after_fork():
+    # 父进程的线程池在子进程中没有可用的线程，子进程按需重新创建
+    global _executors_lock
+    _executors_lock = threading.Lock()
+    _executors.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executors_after_fork)
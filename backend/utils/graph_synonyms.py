@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 一次查询取回一批概念的全部描述；概念存在但没有描述时 terms 为空列表，概念不存在时不返回该行
+BATCH_SYNONYM_QUERY = """
+UNWIND $codes AS code
+MATCH (c:ObjectConcept {id: code})
+OPTIONAL MATCH (c)-[:HAS_DESCRIPTION]->(d:Description)
+WITH code, d
+ORDER BY d.descriptionType
+RETURN code, collect(d.term) AS terms
+"""
+
+# 导出全部概念的描述，用于生成离线同义词快照
+ALL_SYNONYMS_QUERY = """
+MATCH (c:ObjectConcept)
+OPTIONAL MATCH (c)-[:HAS_DESCRIPTION]->(d:Description)
+WITH c.id AS code, d
+ORDER BY d.descriptionType
+RETURN code, collect(d.term) AS terms
+"""
+
+SNAPSHOT_VERSION = 1
+
+
+class GraphSynonymFetcher:
+    """
+    按批从 Neo4j 获取概念同义词（HAS_DESCRIPTION 关联的 Description.term）
+
+    一批概念编码只执行一次 UNWIND 查询，所有批共用同一个 session；
+    结果按概念编码缓存，同一概念在文档构建和写入阶段、以及后续批中重复出现时不再查询
+    """
+    def __init__(self, session):
+        """
+        Args:
+            session: Neo4j session（或提供相同 run(query, **params) 接口的替代对象，如测试用的内存图）
+        """
+        self.session = session
+        self._cache: Dict[str, List[str]] = {}
+        self.missing = set()
+        self.queries = 0
+        self.cache_hits = 0
+
+    def fetch(self, codes: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        获取一批概念的同义词
+
+        Args:
+            codes: 概念编码（ObjectConcept.id），可重复
+
+        Returns:
+            概念编码 -> 同义词列表（按 descriptionType 排序），图中不存在的概念为空列表
+        """
+        codes = list(dict.fromkeys(codes))
+        pending = [code for code in codes if code not in self._cache]
+        self.cache_hits += len(codes) - len(pending)
+        if pending:
+            self.queries += 1
+            found = {record["code"]: list(record["terms"]) for record in self.session.run(BATCH_SYNONYM_QUERY, codes=pending)}
+            missing = [code for code in pending if code not in found]
+            if missing:
+                logger.warning(f"{len(missing)} concepts not found in Neo4j, e.g. {missing[:5]}")
+                self.missing.update(missing)
+            for code in pending:
+                self._cache[code] = found.get(code, [])
+        return {code: self._cache[code] for code in codes}
+
+    def stats(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "concepts": len(self._cache),
+            "missing": len(self.missing),
+            "cache_hits": self.cache_hits
+        }
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """把字符串列表编码为 UTF-8 字节串拼接的 uint8 数组和 len+1 个字节偏移"""
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def synonyms_from_neo4j(session) -> Iterator[Tuple[str, List[str]]]:
+    """从 Neo4j 逐个读取 (概念编码, 同义词列表)，同义词顺序与 GraphSynonymFetcher 一致"""
+    for record in session.run(ALL_SYNONYMS_QUERY):
+        yield record["code"], list(record["terms"])
+
+
+def synonyms_from_description_csv(descriptions_path: str,
+                                  concepts_path: Optional[str] = None) -> Iterator[Tuple[str, List[str]]]:
+    """
+    直接从 tools/build.cypher 导入的 SNOMED CSV 生成 (概念编码, 同义词列表)，无需启动 Neo4j
+
+    Args:
+        descriptions_path: 描述文件（descrip_new.csv，使用 sctid / term / descriptionType 列）
+        concepts_path: 概念文件（concept_new.csv，使用 id 列）；提供时与图中一样只保留存在的概念，
+            没有描述的概念对应空列表
+    """
+    descriptions = pd.read_csv(descriptions_path, usecols=["sctid", "term", "descriptionType"], dtype=str)
+    descriptions = descriptions.dropna(subset=["sctid", "term"])
+    # 与图查询的 ORDER BY d.descriptionType 一致（空值排在最后，同类型保持文件顺序）
+    descriptions = descriptions.sort_values("descriptionType", kind="stable", na_position="last")
+    grouped = descriptions.groupby("sctid", sort=False)["term"].agg(list)
+
+    if concepts_path is None:
+        yield from grouped.items()
+        return
+    concept_ids = pd.read_csv(concepts_path, usecols=["id"], dtype=str)["id"].dropna()
+    for code in concept_ids:
+        yield code, grouped.get(code, [])
+
+
+def save_synonym_snapshot(path: str, synonyms: Iterable[Tuple[str, List[str]]], source: str) -> Dict:
+    """
+    保存离线同义词快照（npz 列式存储）
+
+    - codes / code_offsets: 概念编码（UTF-8 拼接及偏移）
+    - concept_offsets: 第 i 个概念的同义词为第 concept_offsets[i] 到 concept_offsets[i+1] 个术语
+    - terms / term_offsets: 全部同义词（UTF-8 拼接及偏移）
+
+    Args:
+        path: 输出文件路径（.npz）
+        synonyms: (概念编码, 同义词列表) 迭代器
+        source: 数据来源说明，写入元数据
+
+    Returns:
+        快照元数据
+    """
+    codes, terms, counts = [], [], []
+    for code, concept_terms in synonyms:
+        codes.append(str(code))
+        terms.extend(concept_terms)
+        counts.append(len(concept_terms))
+
+    concept_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=concept_offsets[1:])
+    code_blob, code_offsets = _pack_strings(codes)
+    term_blob, term_offsets = _pack_strings(terms)
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "source": source,
+        "concepts": len(codes),
+        "terms": len(terms),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, codes=code_blob, code_offsets=code_offsets, concept_offsets=concept_offsets,
+                        terms=term_blob, term_offsets=term_offsets, metadata=np.array(json.dumps(metadata)))
+    return metadata
+
+
+class SynonymSnapshot:
+    """
+    离线同义词快照（save_synonym_snapshot 生成）
+    概念编码在加载时建立哈希索引，按编码 O(1) 查找；提供与 GraphSynonymFetcher 相同的 fetch 接口
+    """
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 快照文件路径
+
+        Raises:
+            ValueError: 快照版本不兼容时
+        """
+        with np.load(path, allow_pickle=False) as data:
+            self.metadata = json.loads(str(data["metadata"]))
+            if self.metadata.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"不支持的同义词快照版本: {self.metadata.get('version')}")
+            code_blob = data["codes"].tobytes()
+            code_offsets = data["code_offsets"]
+            self._concept_offsets = data["concept_offsets"]
+            self._terms = data["terms"].tobytes()
+            self._term_offsets = data["term_offsets"]
+
+        self._index = {
+            code_blob[start:end].decode("utf-8"): idx
+            for idx, (start, end) in enumerate(zip(code_offsets[:-1].tolist(), code_offsets[1:].tolist()))
+        }
+        self.missing = set()
+        logger.info(f"Loaded synonym snapshot {path}: {self.metadata['concepts']} concepts, "
+                    f"{self.metadata['terms']} terms ({self.metadata['source']})")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, code: str) -> Optional[List[str]]:
+        """单个概念的同义词，快照中不存在时返回 None"""
+        idx = self._index.get(code)
+        if idx is None:
+            return None
+        first, last = int(self._concept_offsets[idx]), int(self._concept_offsets[idx + 1])
+        offsets = self._term_offsets[first:last + 1].tolist()
+        return [self._terms[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def fetch(self, codes: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        获取一批概念的同义词
+
+        Returns:
+            概念编码 -> 同义词列表，快照中不存在的概念为空列表
+        """
+        result = {}
+        missing = []
+        for code in codes:
+            if code in result:
+                continue
+            terms = self.get(code)
+            if terms is None:
+                missing.append(code)
+                terms = []
+            result[code] = terms
+        if missing:
+            logger.warning(f"{len(missing)} concepts not found in the synonym snapshot, e.g. {missing[:5]}")
+            self.missing.update(missing)
+        return result
+
+    def stats(self) -> Dict:
+        return {"concepts": len(self), "missing": len(self.missing)}
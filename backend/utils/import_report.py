@@ -0,0 +1,116 @@
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 按需导入的重量级依赖，启动后仍出现在 sys.modules 中说明被提前导入了
+DEFERRED_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "langchain_openai",
+    "langchain_community",
+    "langchain_aws",
+    "boto3",
+    "openai",
+    "pymilvus",
+    "onnxruntime",
+    "optimum",
+]
+
+# python -X importtime 的输出行: "import time:       self [us] |  cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def current_rss_mb() -> Optional[float]:
+    """当前进程的常驻内存（MB），无法获取时返回 None"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        # 非 Linux 系统使用峰值常驻内存近似
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+    except ImportError:
+        return None
+
+
+def startup_report(started: float) -> Dict:
+    """
+    启动导入阶段的概要
+
+    Args:
+        started: 开始导入时的 time.perf_counter()
+
+    Returns:
+        导入耗时、常驻内存、已加载模块数以及已被导入的按需依赖
+    """
+    return {
+        "import_seconds": round(time.perf_counter() - started, 3),
+        "rss_mb": current_rss_mb(),
+        "modules_loaded": len(sys.modules),
+        "deferred_modules_loaded": [name for name in DEFERRED_MODULES if name in sys.modules]
+    }
+
+
+def parse_importtime(lines: Iterable[str]) -> List[Dict]:
+    """
+    解析 python -X importtime 的输出
+
+    Returns:
+        每个模块的 {module, self_us, cumulative_us, depth}，depth 为导入嵌套层级（0 为顶层导入）
+    """
+    records = []
+    for line in lines:
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2
+            })
+    return records
+
+
+def direct_imports(records: List[Dict], module: str) -> List[Dict]:
+    """
+    指定顶层模块直接导入的模块（importtime 先输出子模块，再输出导入它们的父模块）
+
+    Returns:
+        在 module 之前、上一个顶层导入之后输出的 depth 为 1 的记录
+    """
+    children = []
+    for record in records:
+        if record["depth"] == 0:
+            if record["module"] == module:
+                return children
+            children = []
+        elif record["depth"] == 1:
+            children.append(record)
+    return []
+
+
+def summarize_by_package(records: List[Dict]) -> List[Dict]:
+    """按顶层包汇总导入耗时（各模块自身耗时之和），按耗时降序排列"""
+    totals = defaultdict(lambda: {"self_us": 0, "modules": 0})
+    for record in records:
+        package = record["module"].split(".")[0]
+        totals[package]["self_us"] += record["self_us"]
+        totals[package]["modules"] += 1
+    return sorted(
+        ({"package": package, **values} for package, values in totals.items()),
+        key=lambda x: x["self_us"],
+        reverse=True
+    )
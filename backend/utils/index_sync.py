@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def row_hash(*values: str) -> str:
+    """术语行的内容哈希（各字段以 \\x1f 连接后取 SHA-1 的前 16 位）"""
+    return hashlib.sha1("\x1f".join(values).encode("utf-8")).hexdigest()[:16]
+
+
+def manifest_path(db_path: str) -> str:
+    """
+    根据 Milvus 数据库路径推导哈希清单路径
+
+    Args:
+        db_path: Milvus 数据库路径，如 db/financial_terms_minilm.db
+
+    Returns:
+        清单文件路径，如 db/financial_terms_minilm.sync.json
+    """
+    base, _ = os.path.splitext(db_path)
+    return f"{base}.sync.json"
+
+
+def load_manifest(db_path: str) -> Optional[Dict]:
+    """读取哈希清单，不存在或格式不兼容时返回 None"""
+    path = manifest_path(db_path)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.info(f"未读取到哈希清单 {path}: {e}")
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.info(f"哈希清单版本不兼容: {manifest.get('version')}")
+        return None
+    return manifest
+
+
+def save_manifest(db_path: str, collection_name: str, model_name: str, vector_dim: int, hashes: Dict[str, str]):
+    """
+    写入哈希清单（先写临时文件再替换，避免中断时留下不完整的清单）
+
+    Args:
+        db_path: Milvus 数据库路径
+        collection_name: 集合名称
+        model_name: 生成向量所用的嵌入模型名称
+        vector_dim: 向量维度
+        hashes: term_id -> 内容哈希
+    """
+    path = manifest_path(db_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": MANIFEST_VERSION,
+            "collection": collection_name,
+            "model": model_name,
+            "dimension": vector_dim,
+            "count": len(hashes),
+            "hashes": hashes
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def plan_sync(old_hashes: Dict[str, str], new_hashes: Dict[str, str]) -> Dict[str, List]:
+    """
+    比较集合中已有的行与当前术语表，得出增量同步计划
+
+    term_id 由行号生成，在术语表中间插入或删除行会使后续行的 term_id 变化；
+    这类行内容不变，可以复用原 term_id 下已有的向量，无需重新嵌入
+
+    Args:
+        old_hashes: 集合中已有行的 term_id -> 内容哈希（来自哈希清单）
+        new_hashes: 当前术语表的 term_id -> 内容哈希
+
+    Returns:
+        同步计划:
+            - unchanged: 无需改动的 term_id
+            - delete: 需要从集合中删除的 term_id（已移除或内容已变化的行）
+            - reuse: [(term_id, 提供向量的原 term_id)]，内容在集合中已存在的行
+            - embed: 需要重新嵌入的 term_id（新增或内容变化的行）
+    """
+    # 每个内容哈希在集合中对应的一个 term_id，用于复用向量
+    existing_by_hash = {}
+    for term_id, content_hash in old_hashes.items():
+        existing_by_hash.setdefault(content_hash, term_id)
+
+    plan = {"unchanged": [], "delete": [], "reuse": [], "embed": []}
+    for term_id, content_hash in new_hashes.items():
+        old_hash = old_hashes.get(term_id)
+        if old_hash == content_hash:
+            plan["unchanged"].append(term_id)
+            continue
+        if old_hash is not None:
+            plan["delete"].append(term_id)
+        if content_hash in existing_by_hash:
+            plan["reuse"].append((term_id, existing_by_hash[content_hash]))
+        else:
+            plan["embed"].append(term_id)
+
+    plan["delete"].extend(term_id for term_id in old_hashes if term_id not in new_hashes)
+    return plan
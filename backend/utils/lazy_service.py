@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    延迟加载的服务实例
+    首次使用时才构造（或在启动时由后台线程预加载），构造后用一次示例推理预热；
+    加载期间的调用会等待同一次加载完成，加载失败时下次调用重新尝试
+    """
+    def __init__(self, name: str, factory: Callable[[], Any], warmup: Optional[Callable[[Any], Any]] = None,
+                 release: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            name: 服务名称，用于日志和就绪状态
+            factory: 构造服务实例的函数
+            warmup: 预热函数，参数为服务实例（如执行一次示例推理），为 None 时不预热
+            release: 预热失败时归还已构造实例的函数（如 StdServiceRegistry.release），为 None 时直接丢弃
+        """
+        self.name = name
+        self.factory = factory
+        self.warmup = warmup
+        self.release = release
+        self.state = "pending"  # pending / loading / ready / failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._instance = None
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self) -> Any:
+        """
+        获取服务实例，未加载时在当前线程加载（阻塞调用，不要在事件循环中直接调用）
+
+        Raises:
+            RuntimeError: 加载失败时
+        """
+        if self.state == "ready":
+            return self._instance
+        self._load()
+        if self.state != "ready":
+            raise RuntimeError(f"{self.name} 服务加载失败: {self.error}")
+        return self._instance
+
+    def get_if_ready(self) -> Optional[Any]:
+        """已加载时返回服务实例，否则返回 None（不触发加载）"""
+        return self._instance if self.state == "ready" else None
+
+    def start_background(self):
+        """在后台线程中加载并预热，不阻塞调用方"""
+        if self.state in ("pending", "failed"):
+            threading.Thread(target=self._load, name=f"{self.name}-loader", daemon=True).start()
+
+    def _load(self):
+        with self._lock:
+            if self.state == "ready":
+                return
+            if self.state == "loading":
+                owner = False
+            else:
+                owner = True
+                self.state = "loading"
+                self._loaded.clear()
+        if not owner:
+            # 其他线程正在加载，等待其完成
+            self._loaded.wait()
+            return
+
+        started = time.perf_counter()
+        logger.info(f"开始加载 {self.name} 服务")
+        instance = None
+        try:
+            instance = self.factory()
+            if self.warmup is not None:
+                self.warmup(instance)
+        except Exception as e:
+            if instance is not None and self.release is not None:
+                # 预热失败：归还实例，下次重试时重新获取，避免每次失败都多占一个引用
+                try:
+                    self.release(instance)
+                except Exception as release_error:
+                    logger.warning(f"{self.name} 服务实例归还失败: {release_error}")
+            logger.error(f"{self.name} 服务加载失败: {e}")
+            with self._lock:
+                self.state = "failed"
+                self.error = str(e)
+            self._loaded.set()
+            return
+
+        with self._lock:
+            self._instance = instance
+            self.load_seconds = time.perf_counter() - started
+            self.error = None
+            self.state = "ready"
+        self._loaded.set()
+        logger.info(f"{self.name} 服务已就绪，用时 {self.load_seconds:.1f} 秒")
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+import os
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 所有调度器，fork 后在子进程中重启后台线程
+_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+
+class MicroBatcher:
+    """
+    动态微批处理调度器
+    合并并发提交的请求：攒够 max_batch_size 个或等待超过 max_wait_ms 后，
+    在后台线程中调用一次 batch_fn 处理整批，再把结果分发回各调用方的 Future
+    """
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0, name: str = "batcher"):
+        """
+        Args:
+            batch_fn: 批处理函数，输入列表，返回与输入一一对应的结果列表
+            max_batch_size: 每批最大请求数
+            max_wait_ms: 收到第一个请求后最多等待的毫秒数
+            name: 调度器名称，用于日志和线程名
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_size_histogram: Dict[int, int] = {}
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._total_wait = 0.0
+        self._max_queue_depth = 0
+        self._closed = False
+        self._start_worker()
+        _batchers.add(self)
+
+    def _start_worker(self):
+        self._worker = threading.Thread(target=self._run, name=f"{self.name}-worker", daemon=True)
+        self._worker.start()
+
+    def restart_after_fork(self):
+        """
+        子进程中重建队列、锁和后台线程
+        fork 只复制调用线程，父进程中的后台线程在子进程中不存在，未完成的请求属于父进程，直接丢弃
+        """
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        if not self._closed:
+            self._start_worker()
+
+    def submit(self, item: Any) -> Future:
+        """提交一个请求，返回可等待结果的 Future"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} 已关闭")
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """提交请求并阻塞等待结果"""
+        return self.submit(item).result()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+            self._process(batch)
+
+    def _process(self, batch: List[tuple]):
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} 批处理结果数量 ({len(results)}) 与请求数量 ({len(items)}) 不一致")
+        except Exception as e:
+            logger.error(f"{self.name} 批处理失败: {e}")
+            with self._stats_lock:
+                self._errors += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+        bucket = 1
+        while bucket < len(batch):
+            bucket *= 2
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._total_wait += sum(started - submitted for _, _, submitted in batch)
+            self._batch_size_histogram[bucket] = self._batch_size_histogram.get(bucket, 0) + 1
+
+    def stats(self) -> Dict:
+        """
+        返回调度状态
+
+        - queue_depth / max_queue_depth: 当前及历史最大排队数
+        - batch_size_histogram: 批大小分布，键为不小于批大小的 2 的幂
+        - avg_batch_size / avg_queue_wait_ms: 平均批大小和平均排队时间
+        """
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "avg_queue_wait_ms": self._total_wait * 1000 / self._items if self._items else 0.0,
+                "batch_size_histogram": {
+                    f"<={size}": count for size, count in sorted(self._batch_size_histogram.items())
+                }
+            }
+
+    def close(self):
+        """停止后台线程（已提交的请求处理完后退出）"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+
+
+def _restart_batchers_after_fork():
+    for batcher in list(_batchers):
+        batcher.restart_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_batchers_after_fork)
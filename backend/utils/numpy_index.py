@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from utils.quantization import Int8Quantizer, binary_codes, hamming_distances, top_k_smallest, quantized_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def index_paths(db_path: str) -> Tuple[str, str]:
+    """
+    根据 Milvus 数据库路径推导 NumPy 索引文件路径
+
+    Args:
+        db_path: Milvus 数据库路径，如 db/financial_terms_minilm.db
+
+    Returns:
+        (向量文件路径, 术语元数据文件路径)，如 (db/financial_terms_minilm.npy, db/financial_terms_minilm.terms.json)
+    """
+    base, _ = os.path.splitext(db_path)
+    return f"{base}.npy", f"{base}.terms.json"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """对向量按行做 L2 归一化，返回连续的 float32 矩阵"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def save_index(db_path: str, vectors: np.ndarray, terms: List[Dict], model_name: str):
+    """
+    保存 NumPy 索引文件
+
+    Args:
+        db_path: 对应的 Milvus 数据库路径，用于推导索引文件路径
+        vectors: 术语向量矩阵，形状为 (术语数量, 维度)
+        terms: 与向量逐行对应的术语信息
+        model_name: 生成向量所用的嵌入模型名称
+    """
+    vectors_path, metadata_path = index_paths(db_path)
+    os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+
+    np.save(vectors_path, normalize_rows(vectors))
+    with open(metadata_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "count": len(terms),
+            "dimension": int(vectors.shape[1]),
+            "terms": terms
+        }, f, ensure_ascii=False)
+
+
+class NumpyVectorIndex:
+    """
+    进程内精确向量检索
+    术语向量以归一化的 float32 矩阵存储在内存映射的 .npy 文件中，
+    一次矩阵乘法计算余弦相似度，再用 argpartition 取 top-k
+
+    可选的压缩表示（quantization）:
+    - int8: 标量量化，内存为 float32 的 1/4
+    - binary: 1-bit 符号编码，按汉明距离预筛选，内存为 float32 的 1/32
+    压缩模式下先用编码选出 limit * rescore_multiplier 个候选，再读取对应行的 float 向量精确重排
+    """
+    def __init__(self, db_path: str, mmap: bool = True, quantization: str = "none",
+                 rescore_multiplier: int = 8):
+        """
+        加载 NumPy 索引
+
+        Args:
+            db_path: 对应的 Milvus 数据库路径，用于推导索引文件路径
+            mmap: 是否以内存映射方式加载向量矩阵
+            quantization: 向量压缩方式 (none/int8/binary)
+            rescore_multiplier: 压缩模式下候选数量相对 limit 的倍数
+
+        Raises:
+            FileNotFoundError: 索引文件不存在时
+            ValueError: 向量数量与术语元数据不一致或压缩方式不支持时
+        """
+        if quantization not in ("none", "int8", "binary"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.vectors_path, self.metadata_path = index_paths(db_path)
+        if not os.path.exists(self.vectors_path) or not os.path.exists(self.metadata_path):
+            raise FileNotFoundError(
+                f"NumPy 索引不存在: {self.vectors_path}，请先运行 'python3 backend/tools/export_numpy_index.py'"
+            )
+
+        self.vectors = np.load(self.vectors_path, mmap_mode="r" if mmap else None)
+        with open(self.metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        self.model_name = metadata.get("model")
+        self.terms = metadata["terms"]
+
+        if self.vectors.shape[0] != len(self.terms):
+            raise ValueError(
+                f"向量数量 ({self.vectors.shape[0]}) 与术语数量 ({len(self.terms)}) 不一致"
+            )
+
+        self.quantization = quantization
+        self.rescore_multiplier = rescore_multiplier
+        self.quantizer = None
+        self.codes = None
+        if quantization == "int8":
+            self.quantizer = Int8Quantizer.fit(self.vectors)
+            self.codes = self.quantizer.encode(self.vectors)
+        elif quantization == "binary":
+            self.codes = binary_codes(self.vectors)
+
+        code_bytes, float_bytes = quantized_bytes(len(self.terms), self.dimension, quantization)
+        logger.info(
+            f"成功加载 NumPy 索引: {self.vectors_path} ({len(self.terms)} 条, {self.dimension} 维, "
+            f"压缩方式 {quantization}, 常驻编码 {code_bytes / 1024 / 1024:.1f} MB / float32 {float_bytes / 1024 / 1024:.1f} MB)"
+        )
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def search(self, query_vectors: Sequence[Sequence[float]], limit: int) -> List[List[Tuple[int, float]]]:
+        """
+        对一组查询向量做余弦相似度 top-k 检索（压缩模式下为预筛选 + float 重排）
+
+        Args:
+            query_vectors: 查询向量列表
+            limit: 每个查询返回结果的最大数量
+
+        Returns:
+            与查询顺序一一对应的结果列表，每项为按相似度降序排列的 (行号, 相似度)
+        """
+        if len(query_vectors) == 0:
+            return []
+
+        queries = normalize_rows(np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1))
+        k = min(limit, len(self.terms))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.quantization == "none":
+            scores = queries @ self.vectors.T
+            # argpartition 只做部分排序，再对 top-k 精确排序
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            return self._sorted_hits(top, np.take_along_axis(scores, top, axis=1))
+
+        # 压缩编码预筛选候选
+        num_candidates = min(k * self.rescore_multiplier, len(self.terms))
+        if self.quantization == "int8":
+            candidates = top_k_smallest(-self.quantizer.scores(self.codes, queries), num_candidates)
+        else:
+            candidates = top_k_smallest(hamming_distances(self.codes, np.packbits(queries > 0, axis=1)), num_candidates)
+
+        # 读取候选行的 float 向量精确重排
+        results = []
+        for query, row_candidates in zip(queries, candidates):
+            row_candidates = np.sort(row_candidates)
+            exact = np.asarray(self.vectors[row_candidates], dtype=np.float32) @ query
+            top = np.argpartition(-exact, k - 1)[:k]
+            results.extend(self._sorted_hits(row_candidates[top][None, :], exact[top][None, :]))
+        return results
+
+    @staticmethod
+    def _sorted_hits(indices: np.ndarray, scores: np.ndarray) -> List[List[Tuple[int, float]]]:
+        """按得分降序整理每个查询的 (行号, 相似度)"""
+        order = np.argsort(-scores, axis=1)
+        indices = np.take_along_axis(indices, order, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        return [
+            [(int(idx), float(score)) for idx, score in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(indices, scores)
+        ]
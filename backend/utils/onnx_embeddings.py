@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 导出目录中的文件名
+ONNX_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+EMBEDDING_CONFIG_FILE = "embedding_config.json"
+
+# 各模型的池化方式，与 sentence-transformers 的模型配置一致
+POOLING_MODES = {
+    "sentence-transformers/all-MiniLM-L6-v2": "mean",
+    "sentence-transformers/all-mpnet-base-v2": "mean",
+    "BAAI/bge-m3": "cls",
+}
+
+
+def onnx_embedding_dir(model_name: str, root: str = "models/onnx/embeddings") -> str:
+    """模型对应的 ONNX 导出目录，命名规则与 ../models 下的本地模型一致"""
+    return os.path.join(root, model_name.replace('/', '_'))
+
+
+def read_pooling_mode(model_path: str, model_name: str) -> str:
+    """
+    读取模型的池化方式
+
+    优先读取 sentence-transformers 模型目录中的 1_Pooling/config.json，否则使用 POOLING_MODES，默认为 mean
+    """
+    pooling_config = os.path.join(model_path, "1_Pooling", "config.json")
+    if os.path.exists(pooling_config):
+        with open(pooling_config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("pooling_mode_cls_token"):
+            return "cls"
+        if config.get("pooling_mode_mean_tokens"):
+            return "mean"
+    return POOLING_MODES.get(model_name, "mean")
+
+
+def read_max_seq_length(model_path: str) -> Optional[int]:
+    """
+    读取 sentence-transformers 模型的截断长度（max_seq_length，MiniLM 为 256，mpnet 为 384）
+
+    优先读取本地模型目录中的 sentence_bert_config.json，否则加载 SentenceTransformer 读取；
+    都无法读取时返回 None
+    """
+    st_config = os.path.join(model_path, "sentence_bert_config.json")
+    if os.path.exists(st_config):
+        with open(st_config, "r", encoding="utf-8") as f:
+            max_seq_length = json.load(f).get("max_seq_length")
+        if max_seq_length:
+            return int(max_seq_length)
+    try:
+        from sentence_transformers import SentenceTransformer
+        max_seq_length = SentenceTransformer(model_path, device="cpu").max_seq_length
+    except Exception as e:
+        logger.warning(f"无法读取 {model_path} 的 max_seq_length: {e}")
+        return None
+    return int(max_seq_length) if max_seq_length else None
+
+
+def export_onnx_embeddings(model_name: str, model_path: str, onnx_dir: str, quantize: bool = True,
+                           max_length: Optional[int] = None) -> Dict:
+    """
+    将嵌入模型的 Transformer 部分导出为 ONNX，并可选做动态 int8 量化
+
+    池化和归一化在 OnnxEmbeddings 中用 NumPy 完成，导出目录中的 embedding_config.json 记录这些设置
+
+    Args:
+        model_name: 模型名称，如 sentence-transformers/all-MiniLM-L6-v2
+        model_path: 本地模型目录或 Hugging Face 模型名称
+        onnx_dir: 导出目录
+        quantize: 是否做动态 int8 量化
+        max_length: 分词的最大长度，默认与 sentence-transformers 模型的 max_seq_length 一致，
+            使 ONNX 向量与建库时的向量按相同长度截断
+
+    Returns:
+        写入 embedding_config.json 的配置
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    logger.info(f"导出 ONNX 嵌入模型: {model_path} -> {onnx_dir}")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_path, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.save_pretrained(onnx_dir)
+    tokenizer.save_pretrained(onnx_dir)
+
+    if quantize:
+        # 动态量化：只量化权重，不需要校准数据
+        quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=ONNX_MODEL_FILE)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+        quantizer.quantize(save_dir=onnx_dir, quantization_config=qconfig)
+        logger.info(f"动态 int8 量化完成: {os.path.join(onnx_dir, QUANTIZED_MODEL_FILE)}")
+
+    if max_length is None:
+        max_length = read_max_seq_length(model_path) or 512
+    config = {
+        "model": model_name,
+        "pooling": read_pooling_mode(model_path, model_name),
+        "normalize": True,
+        "max_length": min(max_length, tokenizer.model_max_length),
+        "quantized": quantize
+    }
+    write_embedding_config(onnx_dir, config)
+    return config
+
+
+def read_embedding_config(onnx_dir: str) -> Dict:
+    """读取导出目录中的 embedding_config.json"""
+    with open(os.path.join(onnx_dir, EMBEDDING_CONFIG_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_embedding_config(onnx_dir: str, config: Dict):
+    """写入导出目录中的 embedding_config.json"""
+    with open(os.path.join(onnx_dir, EMBEDDING_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+class OnnxEmbeddings:
+    """
+    基于 ONNX Runtime 的句向量模型
+    与 LangChain Embeddings 接口一致，分词后由 ONNX Runtime 计算 token 向量，
+    再按模型原本的方式池化（MiniLM / mpnet 为 mean，bge-m3 为 CLS）并做 L2 归一化
+    """
+    # 查询与文档编码相同，查询可与文档合并批处理
+    symmetric_queries = True
+
+    def __init__(self, onnx_dir: str, quantized: Optional[bool] = None, batch_size: int = 32,
+                 num_threads: Optional[int] = None):
+        """
+        Args:
+            onnx_dir: export_onnx_embeddings 的导出目录
+            quantized: 是否加载 int8 量化模型，默认与导出时的设置一致
+            batch_size: 每次前向计算的文本数
+            num_threads: ONNX Runtime 的算子内线程数，默认由 ONNX Runtime 决定
+
+        Raises:
+            FileNotFoundError: 导出的模型文件不存在时
+        """
+        config_path = os.path.join(onnx_dir, EMBEDDING_CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(
+                f"ONNX 嵌入模型不存在: {onnx_dir}，请先运行 'python3 backend/tools/export_onnx_embeddings.py'"
+            )
+        self.config = read_embedding_config(onnx_dir)
+        if quantized is None:
+            quantized = self.config.get("quantized", True)
+        model_file = os.path.join(onnx_dir, QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(f"ONNX 嵌入模型文件不存在: {model_file}")
+
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            model_file, sess_options=session_options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        self.pooling = self.config["pooling"]
+        self.normalize = self.config.get("normalize", True)
+        self.max_length = self.config.get("max_length", 512)
+        self.batch_size = batch_size
+        logger.info(f"使用 ONNX Runtime 嵌入模型: {model_file} (池化 {self.pooling})")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """对一批文本做前向计算、池化和归一化"""
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        inputs = {name: np.asarray(value, dtype=np.int64) for name, value in encoded.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        if self.pooling == "cls":
+            embeddings = token_embeddings[:, 0]
+        else:
+            # mean 池化只统计非填充 token
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [self._encode(texts[start:start + self.batch_size]) for start in range(0, len(texts), self.batch_size)]
+        return np.concatenate(batches).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,129 @@
+import logging
+import os
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 导出目录中的模型文件名
+ONNX_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+
+def onnx_model_file(onnx_dir: str, quantized: bool = True) -> str:
+    """导出目录中对应的 ONNX 模型文件路径"""
+    return os.path.join(onnx_dir, QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+
+
+def export_onnx_ner(model_path: str, onnx_dir: str, quantize: bool = True) -> str:
+    """
+    将 token-classification 模型导出为 ONNX，并可选做动态 int8 量化
+
+    Args:
+        model_path: 本地模型目录或 Hugging Face 模型名称
+        onnx_dir: 导出目录
+        quantize: 是否做动态 int8 量化（权重 int8，激活在运行时量化）
+
+    Returns:
+        可供 load_onnx_ner_pipeline 加载的模型文件路径
+    """
+    from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    logger.info(f"导出 ONNX NER 模型: {model_path} -> {onnx_dir}")
+    model = ORTModelForTokenClassification.from_pretrained(model_path, export=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model.save_pretrained(onnx_dir)
+    tokenizer.save_pretrained(onnx_dir)
+
+    if not quantize:
+        return onnx_model_file(onnx_dir, quantized=False)
+
+    # 动态量化：只量化权重，不需要校准数据；AVX2 指令集配置在各类 x86 CPU 上都可用
+    quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=ONNX_MODEL_FILE)
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=True)
+    quantizer.quantize(save_dir=onnx_dir, quantization_config=qconfig)
+    logger.info(f"动态 int8 量化完成: {onnx_model_file(onnx_dir)}")
+    return onnx_model_file(onnx_dir)
+
+
+def load_onnx_ner_pipeline(onnx_dir: str, quantized: bool = True, num_threads: Optional[int] = None):
+    """
+    使用 ONNX Runtime 加载导出的 NER 模型
+
+    返回的是 transformers 的 token-classification pipeline，分词与 aggregation_strategy='simple'
+    的实体聚合逻辑与 PyTorch 版本完全相同，只有前向计算由 ONNX Runtime 完成
+
+    Args:
+        onnx_dir: export_onnx_ner 的导出目录
+        quantized: 是否加载 int8 量化模型
+        num_threads: ONNX Runtime 的算子内线程数，默认由 ONNX Runtime 决定
+
+    Raises:
+        FileNotFoundError: 导出的模型文件不存在时
+    """
+    model_file = onnx_model_file(onnx_dir, quantized)
+    if not os.path.exists(model_file):
+        raise FileNotFoundError(
+            f"ONNX NER 模型不存在: {model_file}，请先运行 'python3 backend/tools/export_onnx_ner.py'"
+        )
+
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForTokenClassification
+    from transformers import AutoTokenizer, pipeline
+
+    session_options = onnxruntime.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+    model = ORTModelForTokenClassification.from_pretrained(
+        onnx_dir,
+        file_name=os.path.basename(model_file),
+        provider="CPUExecutionProvider",
+        session_options=session_options
+    )
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+    logger.info(f"使用 ONNX Runtime NER 模型: {model_file}")
+    return pipeline("token-classification", model=model, tokenizer=tokenizer, aggregation_strategy='simple')
+
+
+def compare_ner_outputs(reference_pipe, candidate_pipe, texts: List[str], score_tolerance: float = 0.05) -> Dict:
+    """
+    比较两个 NER pipeline 在同一组文本上的实体输出
+
+    实体按 (entity_group, start, end) 对齐，得分差超过 score_tolerance 的对齐实体单独计数
+
+    Returns:
+        agreement（对齐实体数 / 两边实体并集数）、各自实体数、得分最大偏差及不一致的样例
+    """
+    reference_total = candidate_total = matched = score_mismatches = 0
+    max_score_diff = 0.0
+    mismatches = []
+    for text, reference, candidate in zip(texts, reference_pipe(texts), candidate_pipe(texts)):
+        reference_spans = {(e['entity_group'], e['start'], e['end']): float(e['score']) for e in reference}
+        candidate_spans = {(e['entity_group'], e['start'], e['end']): float(e['score']) for e in candidate}
+        common = reference_spans.keys() & candidate_spans.keys()
+        reference_total += len(reference_spans)
+        candidate_total += len(candidate_spans)
+        matched += len(common)
+        for span in common:
+            diff = abs(reference_spans[span] - candidate_spans[span])
+            max_score_diff = max(max_score_diff, diff)
+            if diff > score_tolerance:
+                score_mismatches += 1
+        if len(common) != len(reference_spans) or len(common) != len(candidate_spans):
+            mismatches.append({
+                "text": text,
+                "only_reference": sorted(reference_spans.keys() - common),
+                "only_candidate": sorted(candidate_spans.keys() - common)
+            })
+
+    union = reference_total + candidate_total - matched
+    return {
+        "agreement": matched / union if union else 1.0,
+        "reference_entities": reference_total,
+        "candidate_entities": candidate_total,
+        "matched_entities": matched,
+        "score_mismatches": score_mismatches,
+        "max_score_diff": max_score_diff,
+        "mismatches": mismatches
+    }
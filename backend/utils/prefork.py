@@ -0,0 +1,113 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+
+from utils.cpu_topology import plan_topology, apply_topology
+
+logger = logging.getLogger(__name__)
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    """创建所有工作进程共享的监听 socket"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, worker_id: int, plan: Dict, log_level: str):
+    """子进程：按线程规划设置线程数（及绑定核心）后在共享 socket 上运行 uvicorn"""
+    import uvicorn
+
+    # 恢复默认信号处理，由 uvicorn 安装自己的优雅退出处理
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    apply_topology(plan, worker_id=worker_id)
+    logger.info(f"工作进程 {worker_id} (pid {os.getpid()}) 启动，算子内线程数 {plan['intra_op_threads']}")
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def serve_prefork(app, host: str, port: int, workers: int, preload: Callable[[], None],
+                  threads_per_worker: Optional[int] = None, log_level: str = "info"):
+    """
+    预先 fork 的多进程服务
+
+    父进程先调用 preload 加载并预热模型，再 fork 出 workers 个工作进程共享同一个监听 socket；
+    模型权重在 fork 后以写时复制的方式共享，不会在每个工作进程中重复加载。
+    工作进程异常退出时由父进程重新 fork（仍然共享已加载的模型）
+
+    Args:
+        app: ASGI 应用
+        host: 监听地址
+        port: 监听端口
+        workers: 工作进程数
+        preload: 在父进程中加载模型的函数
+        threads_per_worker: 每个工作进程的算子内线程数，默认由 plan_topology 按可用核心数分配
+        log_level: uvicorn 日志级别
+
+    Raises:
+        RuntimeError: 当前平台不支持 fork 时
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("当前平台不支持 fork，请使用单进程模式")
+    plan = plan_topology(workers, threads_per_worker)
+
+    # 父进程加载和预热模型时只使用单线程：OpenMP（libgomp）线程池和 tokenizers 的并行分词都不能跨 fork 使用，
+    # 父进程中一旦启动多线程计算，子进程中的推理可能卡死
+    apply_topology(plan, intra_op_threads=1)
+    started = time.perf_counter()
+    preload()
+    logger.info(f"父进程模型加载完成，用时 {time.perf_counter() - started:.1f} 秒")
+
+    sock = _bind_socket(host, port)
+    children: Dict[int, int] = {}  # pid -> worker_id
+    shutting_down = False
+
+    def spawn(worker_id: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, worker_id, plan, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = worker_id
+
+    def stop(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker_id in range(workers):
+        spawn(worker_id)
+    logger.info(f"已启动 {workers} 个工作进程，监听 http://{host}:{port}，每个进程 {plan['intra_op_threads']} 个算子内线程")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_id = children.pop(pid, None)
+        if worker_id is not None and not shutting_down:
+            logger.warning(f"工作进程 {worker_id} (pid {pid}) 退出 (状态 {status})，重新启动")
+            time.sleep(1)  # 避免启动即崩溃时反复 fork
+            spawn(worker_id)
+
+    sock.close()
+    logger.info("所有工作进程已退出")
@@ -0,0 +1,102 @@
+from typing import Tuple
+
+import numpy as np
+
+# 每个字节中 1 的个数，用于计算汉明距离
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Int8Quantizer:
+    """
+    int8 标量量化
+    每个维度按该维度的最大绝对值缩放到 [-127, 127]，内存为 float32 的 1/4
+    """
+    def __init__(self, scale: np.ndarray):
+        """
+        Args:
+            scale: 每个维度的缩放系数，形状为 (维度,)
+        """
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, chunk_size: int = 8192) -> "Int8Quantizer":
+        """按块扫描向量矩阵，计算每个维度的缩放系数"""
+        max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            np.maximum(max_abs, np.abs(chunk).max(axis=0), out=max_abs)
+        max_abs[max_abs == 0] = 1.0
+        return cls(max_abs / 127.0)
+
+    def encode(self, vectors: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """将向量编码为 int8"""
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, vectors.shape[0], chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            codes[start:start + chunk_size] = np.clip(np.rint(chunk / self.scale), -127, 127)
+        return codes
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+        """近似内积：codes * scale 与查询向量的点积（按块转换，避免生成完整的 float32 矩阵）"""
+        scaled = np.asarray(queries, dtype=np.float32) * self.scale
+        scores = np.empty((scaled.shape[0], codes.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], chunk_size):
+            chunk = codes[start:start + chunk_size].astype(np.float32)
+            scores[:, start:start + chunk_size] = scaled @ chunk.T
+        return scores
+
+
+def binary_codes(vectors: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    """
+    1-bit 二值编码：按符号取位并打包，内存为 float32 的 1/32
+
+    Returns:
+        形状为 (数量, ceil(维度 / 8)) 的 uint8 矩阵
+    """
+    packed = []
+    for start in range(0, vectors.shape[0], chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        packed.append(np.packbits(chunk > 0, axis=1))
+    return np.concatenate(packed) if packed else np.empty((0, (vectors.shape[1] + 7) // 8), dtype=np.uint8)
+
+
+def hamming_distances(codes: np.ndarray, query_codes: np.ndarray) -> np.ndarray:
+    """
+    计算查询编码与所有编码之间的汉明距离
+
+    Args:
+        codes: 二值编码矩阵 (数量, 字节数)
+        query_codes: 查询编码矩阵 (查询数, 字节数)
+
+    Returns:
+        形状为 (查询数, 数量) 的距离矩阵
+    """
+    # NumPy 2.0+ 提供原生的 popcount，旧版本使用查表
+    bitwise_count = getattr(np, "bitwise_count", None)
+    distances = np.empty((query_codes.shape[0], codes.shape[0]), dtype=np.uint16)
+    for i, query in enumerate(query_codes):
+        xor = np.bitwise_xor(codes, query)
+        bits = bitwise_count(xor) if bitwise_count is not None else _POPCOUNT[xor]
+        distances[i] = bits.sum(axis=1, dtype=np.uint16)
+    return distances
+
+
+def top_k_smallest(values: np.ndarray, k: int) -> np.ndarray:
+    """每行取最小的 k 个值的列号（不保证顺序）"""
+    k = min(k, values.shape[1])
+    return np.argpartition(values, k - 1, axis=1)[:, :k]
+
+
+def quantized_bytes(num_vectors: int, dimension: int, quantization: str) -> Tuple[int, int]:
+    """
+    估算常驻内存中的编码大小
+
+    Returns:
+        (编码字节数, float32 原始向量字节数)
+    """
+    float_bytes = num_vectors * dimension * 4
+    if quantization == "int8":
+        return num_vectors * dimension, float_bytes
+    if quantization == "binary":
+        return num_vectors * ((dimension + 7) // 8), float_bytes
+    return float_bytes, float_bytes
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def content_hash(payload: Dict) -> str:
+    """对请求内容做稳定的 SHA-256 哈希（键排序后序列化）"""
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def index_version(paths: Iterable[str]) -> str:
+    """
+    根据索引文件的修改时间和大小生成版本号，索引重建后缓存自动失效
+
+    Args:
+        paths: 索引相关文件路径（数据库文件、术语表等），不存在的文件记为 missing
+    """
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    接口响应缓存
+    保存序列化后的响应体，按内容哈希索引，支持 TTL 过期和按条目数的 LRU 淘汰
+    """
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 600):
+        """
+        Args:
+            max_entries: 最多缓存的响应数量
+            ttl_seconds: 响应的有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取未过期的响应体，未命中时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, body: bytes):
+        """写入响应体并淘汰超出容量的最久未使用条目"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """返回命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
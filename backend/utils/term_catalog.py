@@ -0,0 +1,147 @@
+import csv
+import logging
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 标点折叠规则：& 视为 and；+ 保留（评级中 A+ 与 A 含义不同）；
+# 词尾的 - 保留（A- / B3/B-），词内的 - 视为空格（A-Share 与 A Share 等价）
+_AMPERSAND = re.compile(r"&")
+_INNER_HYPHEN = re.compile(r"-(?=[^\s/\-])")
+_PUNCTUATION = re.compile(r"[^\w\s+\-]")
+_PARENTHETICAL = re.compile(r"^(.*?)\s*\((.+)\)$")
+_ACRONYM_SUFFIX = re.compile(r"^(.*\S)\s+-\s*([^\s]+)$")
+
+_catalog_cache: Dict[str, List[Dict]] = {}
+_catalog_lock = threading.Lock()
+
+
+def normalize_term(text: str) -> str:
+    """
+    术语规范化：NFKC、大小写折叠、标点和空白折叠
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        规范化后的文本，如 "A-Share" -> "a share"，"A+/A1" -> "a+ a1"
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().replace("\\", "")
+    text = _AMPERSAND.sub(" and ", text)
+    text = _INNER_HYPHEN.sub(" ", text)
+    text = _PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+
+def term_variants(term_name: str) -> List[str]:
+    """
+    生成术语的别名写法
+
+    - 斜杠分隔的评级类术语: "A+/A1" -> ["A+", "A1"]
+    - 结尾括号中的别名: "D-Mark (Deutsche Mark)" -> ["D-Mark", "Deutsche Mark"]
+    - 结尾的缩写: "Advance/Decline Line - A/D" -> ["Advance/Decline Line", "A/D"]
+    """
+    name = term_name.replace("\\", "").strip()
+    variants = []
+
+    if "/" in name and not any(ch.isspace() for ch in name):
+        variants.extend(part for part in name.split("/") if part)
+
+    match = _PARENTHETICAL.match(name)
+    if match:
+        variants.extend([match.group(1), match.group(2)])
+
+    match = _ACRONYM_SUFFIX.match(name)
+    if match:
+        variants.extend([match.group(1), match.group(2)])
+
+    return [variant for variant in variants if variant.strip()]
+
+
+def load_terms(csv_path: str) -> List[Dict]:
+    """
+    读取金融术语 CSV（term_name, term_type，无表头），结果按路径缓存
+    term_id 规则与 tools/create_financial_terms_db.py 写入 Milvus 的一致
+
+    Args:
+        csv_path: 术语 CSV 文件路径
+
+    Returns:
+        术语信息列表，每项包含 term_id, term_name, term_type, domain, category
+    """
+    with _catalog_lock:
+        if csv_path not in _catalog_cache:
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                rows = [row for row in csv.reader(f) if row]
+            _catalog_cache[csv_path] = [
+                {
+                    "term_id": f"FIN_{idx:06d}",
+                    "term_name": row[0] or "NA",
+                    "term_type": row[1] if len(row) > 1 and row[1] else "NA",
+                    "domain": "Finance",
+                    "category": "Standard"
+                } for idx, row in enumerate(rows)
+            ]
+            logger.info(f"Loaded {len(_catalog_cache[csv_path])} financial terms from {csv_path}")
+        return _catalog_cache[csv_path]
+
+
+class TermLexicon:
+    """
+    术语名称哈希索引
+    依次按原文精确匹配、规范化匹配、别名匹配查找术语，命中时无需向量检索
+    """
+    def __init__(self, terms: List[Dict]):
+        """
+        构建索引
+
+        Args:
+            terms: 术语信息列表（load_terms 的返回值）
+        """
+        self.terms = terms
+        self._exact: Dict[str, List[int]] = {}
+        self._normalized: Dict[str, List[int]] = {}
+        self._variants: Dict[str, List[int]] = {}
+
+        for idx, term in enumerate(terms):
+            name = term["term_name"]
+            self._exact.setdefault(name.strip(), []).append(idx)
+            self._normalized.setdefault(normalize_term(name), []).append(idx)
+
+        # 别名不覆盖已有的术语名称
+        for idx, term in enumerate(terms):
+            for variant in term_variants(term["term_name"]):
+                key = normalize_term(variant)
+                if key and key not in self._normalized:
+                    self._variants.setdefault(key, []).append(idx)
+
+    def lookup(self, query: str) -> Tuple[Optional[str], List[Dict]]:
+        """
+        查找与查询匹配的术语
+
+        Args:
+            query: 查询文本
+
+        Returns:
+            (匹配方式, 术语列表)，匹配方式为 exact / normalized / variant，未命中时为 (None, [])
+        """
+        indices = self._exact.get(query.strip())
+        if indices:
+            return "exact", [self.terms[idx] for idx in indices]
+
+        key = normalize_term(query)
+        indices = self._normalized.get(key)
+        if indices:
+            return "normalized", [self.terms[idx] for idx in indices]
+
+        indices = self._variants.get(key)
+        if indices:
+            return "variant", [self.terms[idx] for idx in indices]
+
+        return None, []
+
+    def __len__(self) -> int:
+        return len(self.terms)
@@ -65,6 +65,795 @@ def test_backend_services():
         print(f"❌ 后端服务测试失败: {e}")
         return False
 
+def test_onnx_ner_parity():
+    """测试 ONNX int8 NER 模型与 PyTorch 模型的实体一致性（需先运行 backend/tools/export_onnx_ner.py）"""
+    print("\n🔍 测试 ONNX NER 模型一致性...")
+
+    try:
+        from config.service_config import NER_BACKEND_CONFIG
+        from utils.onnx_ner import load_onnx_ner_pipeline, compare_ner_outputs, onnx_model_file
+
+        onnx_dir = os.path.join("backend", NER_BACKEND_CONFIG["onnx_dir"])
+        if not os.path.exists(onnx_model_file(onnx_dir, NER_BACKEND_CONFIG["quantized"])):
+            print("⏭️  未导出 ONNX NER 模型，跳过")
+            return True
+
+        from transformers import pipeline
+        local_model = "models/bert-large-cased-finetuned-conll03-english"
+        torch_pipe = pipeline("token-classification",
+                              model=local_model if os.path.exists(local_model) else "dbmdz/bert-large-cased-finetuned-conll03-english",
+                              aggregation_strategy='simple',
+                              device=-1)
+        onnx_pipe = load_onnx_ner_pipeline(onnx_dir, quantized=NER_BACKEND_CONFIG["quantized"])
+
+        texts = [
+            "JPMorgan Chase reports ROE increased to 15%",
+            "Goldman Sachs and Morgan Stanley led the IPO of Alibaba on the New York Stock Exchange",
+            "The Federal Reserve raised interest rates by 25 basis points",
+        ]
+        parity = compare_ner_outputs(torch_pipe, onnx_pipe, texts)
+        print(f"实体一致率: {parity['agreement']:.3f}，得分最大偏差: {parity['max_score_diff']:.4f}")
+        if parity["agreement"] < 0.95:
+            print("❌ ONNX NER 模型与 PyTorch 模型输出不一致")
+            return False
+
+        print("✅ ONNX NER 模型与 PyTorch 模型输出一致")
+        return True
+
+    except Exception as e:
+        print(f"❌ ONNX NER 一致性测试失败: {e}")
+        return False
+
+def test_graph_synonym_fetch():
+    """用内存中的替代图测试按批获取同义词（一批概念一次查询，结果缓存复用）"""
+    print("\n🔍 测试图数据库同义词批量获取...")
+
+    try:
+        from utils.graph_synonyms import GraphSynonymFetcher
+
+        class StandInGraphSession:
+            """模拟 Neo4j session：按 UNWIND $codes 返回每个存在的概念及其描述"""
+            def __init__(self, descriptions):
+                self.descriptions = descriptions
+                self.calls = []
+
+            def run(self, query, codes):
+                self.calls.append(list(codes))
+                return [{"code": code, "terms": self.descriptions[code]} for code in codes if code in self.descriptions]
+
+        session = StandInGraphSession({
+            "267036007": ["Dyspnea", "Breathlessness", "SOB - Shortness of breath"],
+            "22298006": ["Myocardial infarction", "Heart attack"],
+            "386661006": [],
+        })
+        fetcher = GraphSynonymFetcher(session)
+
+        batch = ["267036007", "22298006", "267036007", "386661006", "999999999"]
+        synonyms = fetcher.fetch(batch)
+        assert synonyms["267036007"] == ["Dyspnea", "Breathlessness", "SOB - Shortness of breath"]
+        assert synonyms["386661006"] == [] and synonyms["999999999"] == []
+        assert session.calls == [["267036007", "22298006", "386661006", "999999999"]], session.calls
+
+        # 同一批再次获取（构建写入数据时）及后续批中的已知概念都不再查询
+        fetcher.fetch(batch)
+        fetcher.fetch(["22298006", "73211009"])
+        assert session.calls[1:] == [["73211009"]], session.calls
+        assert fetcher.missing == {"999999999", "73211009"}
+
+        print(f"✅ 同义词批量获取正常: {fetcher.stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 同义词批量获取测试失败: {e}")
+        return False
+
+def test_synonym_snapshot():
+    """测试离线同义词快照的保存、加载和按编码查找"""
+    print("\n🔍 测试离线同义词快照...")
+
+    try:
+        import tempfile
+        from utils.graph_synonyms import SynonymSnapshot, save_synonym_snapshot
+
+        synonyms = [
+            ("267036007", ["Dyspnea", "Breathlessness", "SOB - Shortness of breath"]),
+            ("386661006", []),
+            ("22298006", ["Myocardial infarction", "Infarctus du myocarde é"]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "synonyms.npz")
+            metadata = save_synonym_snapshot(path, synonyms, "test")
+            snapshot = SynonymSnapshot(path)
+
+        assert metadata["concepts"] == 3 and metadata["terms"] == 5
+        for code, terms in synonyms:
+            assert snapshot.get(code) == terms, code
+        assert snapshot.get("999999999") is None
+        assert snapshot.fetch(["22298006", "999999999"]) == {"22298006": synonyms[2][1], "999999999": []}
+
+        print(f"✅ 离线同义词快照正常: {snapshot.stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 离线同义词快照测试失败: {e}")
+        return False
+
+def test_std_registry():
+    """用替代服务测试标准化服务注册表的共享、引用计数和空闲淘汰（不加载模型）"""
+    print("\n🔍 测试标准化服务注册表...")
+
+    try:
+        import services.std_registry as std_registry_module
+        from services.std_registry import StdServiceRegistry
+
+        closed = []
+
+        class StandInStdService:
+            """记录构造参数和关闭状态的替代服务"""
+            def __init__(self, provider, model, db_path, collection_name, backend):
+                if model == "broken-model":
+                    raise RuntimeError("model not found")
+                self.model = model
+
+            def close(self):
+                closed.append(self.model)
+
+        original = std_registry_module.StdService
+        std_registry_module.StdService = StandInStdService
+        try:
+            registry = StdServiceRegistry(max_size=1)
+            first = registry.acquire(provider="huggingface", model="model-a", backend="numpy")
+            second = registry.acquire(provider="huggingface", model="model-a", backend="numpy")
+            assert first is second and registry.stats()["entries"][0]["ref_count"] == 2
+
+            # 正在使用的实例即使超出容量也不淘汰
+            other = registry.acquire(provider="huggingface", model="model-b", backend="numpy")
+            assert registry.stats()["size"] == 2 and closed == []
+
+            registry.release(first)
+            registry.release(second)
+            assert closed == ["model-a"], closed
+            registry.release(other)
+            assert registry.stats()["size"] == 1 and closed == ["model-a"]
+
+            with registry.lease(provider="huggingface", model="model-c", backend="numpy") as service:
+                assert service.model == "model-c"
+            assert closed == ["model-a", "model-b"], closed
+
+            # 初始化失败的条目不留在注册表中
+            try:
+                registry.acquire(provider="huggingface", model="broken-model", backend="numpy")
+                raise AssertionError("broken-model should fail")
+            except RuntimeError:
+                pass
+            assert [entry["model"] for entry in registry.stats()["entries"]] == ["model-c"]
+        finally:
+            std_registry_module.StdService = original
+
+        print(f"✅ 标准化服务注册表正常: {registry.stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 标准化服务注册表测试失败: {e}")
+        return False
+
+def test_numpy_index_rescoring():
+    """测试 NumPy 精确检索，以及 int8 / binary 压缩预筛选后 float 重排的结果"""
+    print("\n🔍 测试 NumPy 索引与压缩重排...")
+
+    try:
+        import tempfile
+        import numpy as np
+        from utils.numpy_index import NumpyVectorIndex, save_index
+
+        rng = np.random.default_rng(7)
+        vectors = rng.standard_normal((500, 32)).astype(np.float32)
+        terms = [{"term_id": f"FIN_{idx:06d}", "term_name": f"term {idx}"} for idx in range(len(vectors))]
+        queries = vectors[:20] + 0.05 * rng.standard_normal((20, 32)).astype(np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "financial_terms_test.db")
+            save_index(db_path, vectors, terms, "test-model")
+            exact = NumpyVectorIndex(db_path, quantization="none").search(queries, 5)
+            for quantization in ("int8", "binary"):
+                index = NumpyVectorIndex(db_path, quantization=quantization, rescore_multiplier=8)
+                results = index.search(queries, 5)
+                for query_idx, (hits, exact_hits) in enumerate(zip(results, exact)):
+                    # 重排后的得分是精确的余弦相似度，且按降序排列
+                    assert hits[0][0] == query_idx, (quantization, query_idx, hits[0])
+                    scores = [score for _, score in hits]
+                    assert scores == sorted(scores, reverse=True)
+                    exact_scores = dict(exact_hits)
+                    for row, score in hits:
+                        if row in exact_scores:
+                            assert abs(exact_scores[row] - score) < 1e-5
+                    if quantization == "int8":
+                        assert [row for row, _ in hits] == [row for row, _ in exact_hits], (query_idx, hits, exact_hits)
+
+            assert NumpyVectorIndex(db_path).search([], 5) == []
+
+        print("✅ NumPy 索引与压缩重排正常")
+        return True
+
+    except Exception as e:
+        print(f"❌ NumPy 索引与压缩重排测试失败: {e}")
+        return False
+
+def test_term_lexicon():
+    """测试术语规范化、别名生成和精确 / 规范化 / 别名三级匹配"""
+    print("\n🔍 测试术语快速匹配...")
+
+    try:
+        from utils.term_catalog import TermLexicon, normalize_term, term_variants
+
+        assert normalize_term("A-Share") == "a share"
+        assert normalize_term("  Mergers &  Acquisitions ") == "mergers and acquisitions"
+        assert normalize_term("A+/A1") == "a+ a1"
+        assert normalize_term("B3/B-") == "b3 b-"
+        assert normalize_term("ＥＴＦ") == "etf"
+
+        assert term_variants("A+/A1") == ["A+", "A1"]
+        assert term_variants("D-Mark (Deutsche Mark)") == ["D-Mark", "Deutsche Mark"]
+        assert term_variants("Advance/Decline Line - A/D") == ["Advance/Decline Line", "A/D"]
+        assert term_variants("Bond") == []
+
+        terms = [
+            {"term_id": "FIN_000000", "term_name": "A-Share"},
+            {"term_id": "FIN_000001", "term_name": "D-Mark (Deutsche Mark)"},
+            {"term_id": "FIN_000002", "term_name": "A+/A1"},
+            {"term_id": "FIN_000003", "term_name": "Deutsche Mark"},
+        ]
+        lexicon = TermLexicon(terms)
+        assert lexicon.lookup("A-Share") == ("exact", [terms[0]])
+        assert lexicon.lookup("a share") == ("normalized", [terms[0]])
+        assert lexicon.lookup("d-mark") == ("variant", [terms[1]])
+        assert lexicon.lookup("A1") == ("variant", [terms[2]])
+        # 别名不覆盖已有的术语名称
+        assert lexicon.lookup("deutsche mark") == ("normalized", [terms[3]])
+        assert lexicon.lookup("treasury bill") == (None, [])
+
+        print(f"✅ 术语快速匹配正常: {len(lexicon)} 个术语")
+        return True
+
+    except Exception as e:
+        print(f"❌ 术语快速匹配测试失败: {e}")
+        return False
+
+def test_bm25_fusion():
+    """测试 BM25 倒排检索和倒数排名融合"""
+    print("\n🔍 测试 BM25 检索与 RRF 融合...")
+
+    try:
+        from utils.bm25_index import BM25Index, reciprocal_rank_fusion
+
+        documents = [
+            "Treasury Bond",
+            "Corporate Bond Yield",
+            "Bond Yield",
+            "Dividend Yield",
+            "Stock Split",
+        ]
+        index = BM25Index(documents)
+        hits = index.search("bond yield", limit=3)
+        # 两个词都命中且更短的文档排在最前
+        assert [doc_id for doc_id, _ in hits][:2] == [2, 1] and len(hits) == 3, hits
+        assert all(score > 0 for _, score in hits)
+        assert index.search("BOND-yield", limit=1)[0][0] == 2
+        assert index.search("swaption", limit=5) == []
+        assert index.search("bond", limit=0) == []
+        assert len(index.search("yield", limit=10)) == 3
+
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], [1.0, 1.0], k=60)
+        assert [key for key, _ in fused] == ["b", "a", "d", "c"], fused
+        assert abs(dict(fused)["b"] - (1 / 62 + 1 / 61)) < 1e-12
+        # 权重为 0 的一路不影响排序
+        weighted = reciprocal_rank_fusion([["a", "b"], ["b", "a"]], [1.0, 0.0])
+        assert [key for key, _ in weighted] == ["a", "b"]
+
+        print(f"✅ BM25 检索与 RRF 融合正常: {index.memory_bytes()} 字节")
+        return True
+
+    except Exception as e:
+        print(f"❌ BM25 检索与 RRF 融合测试失败: {e}")
+        return False
+
+def test_response_cache():
+    """测试接口响应缓存的 TTL 过期、LRU 淘汰和缓存键"""
+    print("\n🔍 测试接口响应缓存...")
+
+    try:
+        import tempfile
+        import time
+        from utils.response_cache import ResponseCache, content_hash, index_version
+
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        assert cache.get("a") == b"1"
+        cache.put("c", b"3")  # 淘汰最久未使用的 b
+        assert cache.get("b") is None and cache.get("a") == b"1" and cache.get("c") == b"3"
+
+        short_lived = ResponseCache(max_entries=10, ttl_seconds=0.05)
+        short_lived.put("a", b"1")
+        time.sleep(0.1)
+        assert short_lived.get("a") is None and short_lived.stats()["entries"] == 0
+
+        stats = cache.stats()
+        assert stats["hits"] == 3 and stats["misses"] == 1, stats
+
+        # 缓存键与字段顺序无关，内容不同则不同
+        assert content_hash({"text": "bond", "options": {"a": 1, "b": 2}}) == \
+            content_hash({"options": {"b": 2, "a": 1}, "text": "bond"})
+        assert content_hash({"text": "bond"}) != content_hash({"text": "Bond"})
+
+        # 索引文件变化后版本号随之变化
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "index.db")
+            missing_version = index_version([path])
+            with open(path, "w") as f:
+                f.write("v1")
+            first_version = index_version([path])
+            with open(path, "a") as f:
+                f.write("v2")
+            assert len({missing_version, first_version, index_version([path])}) == 3
+
+        print(f"✅ 接口响应缓存正常: {stats}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 接口响应缓存测试失败: {e}")
+        return False
+
+def test_index_sync_plan():
+    """测试按内容哈希比较得出的增量同步计划（新增、删除、修改、行号移动）"""
+    print("\n🔍 测试增量同步计划...")
+
+    try:
+        from utils.index_sync import plan_sync, row_hash
+
+        def hashes(names):
+            return {f"FIN_{idx:06d}": row_hash(name, "FINTERM") for idx, name in enumerate(names)}
+
+        old = hashes(["Bond", "Stock", "Yield"])
+
+        # 末尾追加：只嵌入新行
+        plan = plan_sync(old, hashes(["Bond", "Stock", "Yield", "Swap"]))
+        assert plan == {"unchanged": ["FIN_000000", "FIN_000001", "FIN_000002"], "delete": [], "reuse": [],
+                        "embed": ["FIN_000003"]}, plan
+
+        # 中间插入：后续行的 term_id 变化，但内容已存在，复用原向量
+        plan = plan_sync(old, hashes(["Bond", "Swap", "Stock", "Yield"]))
+        assert plan["unchanged"] == ["FIN_000000"]
+        assert plan["embed"] == ["FIN_000001"]
+        assert plan["reuse"] == [("FIN_000002", "FIN_000001"), ("FIN_000003", "FIN_000002")]
+        assert sorted(plan["delete"]) == ["FIN_000001", "FIN_000002"]
+
+        # 删除末尾行、修改中间行
+        plan = plan_sync(old, hashes(["Bond", "Stocks"]))
+        assert plan["embed"] == ["FIN_000001"] and plan["reuse"] == []
+        assert sorted(plan["delete"]) == ["FIN_000001", "FIN_000002"]
+
+        # 行哈希区分字段边界：("a b", "c") 与 ("a", "b c") 不是同一行
+        assert row_hash("a b", "c") != row_hash("a", "b c")
+
+        print("✅ 增量同步计划正常")
+        return True
+
+    except Exception as e:
+        print(f"❌ 增量同步计划测试失败: {e}")
+        return False
+
+def test_build_checkpoint():
+    """测试带检查点的索引构建：失败批的重试、部分写入的清理，以及重新运行时复用已嵌入的向量"""
+    print("\n🔍 测试索引构建检查点...")
+
+    try:
+        import tempfile
+        import numpy as np
+        import pandas as pd
+        from utils.build_checkpoint import BuildCheckpoint, checkpointed_build
+        from utils.build_pipeline import AdaptiveBatchSize, iter_frame_chunks
+
+        df = pd.DataFrame({"term_name": [f"term {idx}" for idx in range(50)]})
+        collection = {}
+        embedded = []
+        insert_calls = {"count": 0}
+
+        def embed(texts):
+            embedded.extend(texts)
+            return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+        def insert(batch, vectors, dead_row=None):
+            insert_calls["count"] += 1
+            rows = batch.index.tolist()
+            if dead_row in rows:
+                raise RuntimeError("insert failed")
+            if 20 in rows and insert_calls["count"] == 3:
+                # 只写入一部分后失败，重试前应先删除
+                collection.update({row: vectors[i] for i, row in enumerate(rows[:3])})
+                raise RuntimeError("partial insert")
+            for i, row in enumerate(rows):
+                assert row not in collection, f"duplicate row {row}"
+                collection[row] = vectors[i]
+
+        def delete(rows):
+            for row in rows:
+                collection.pop(int(row), None)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "financial_terms_test.db")
+            fingerprint = {"source": "test", "model": "test-model"}
+
+            # 第一次运行：第 40 行所在的批始终插入失败，保留检查点
+            checkpoint = BuildCheckpoint.open(db_path, len(df), 2, fingerprint)
+            report = checkpointed_build(checkpoint, lambda: iter_frame_chunks(df), embed,
+                                        lambda batch, vectors: insert(batch, vectors, dead_row=40),
+                                        delete=delete, batch_size=AdaptiveBatchSize(initial=10, adaptive=False),
+                                        max_retries=1)
+            assert report["failed_rows"] == 10 and report["failed_ranges"] == [[40, 49]], report
+            assert sorted(collection) == list(range(40)), sorted(collection)
+            assert len(embedded) == 50 and not checkpoint.complete
+
+            # 重新运行：从检查点续建，已嵌入的行直接使用溢出文件中的向量
+            embedded.clear()
+            checkpoint = BuildCheckpoint.open(db_path, len(df), 2, fingerprint)
+            assert checkpoint.resumed and int(checkpoint.inserted.sum()) == 40
+            report = checkpointed_build(checkpoint, lambda: iter_frame_chunks(df), embed, insert,
+                                        delete=delete, batch_size=AdaptiveBatchSize(initial=10, adaptive=False))
+            assert report["failed_rows"] == 0 and report["reused_vectors"] == 10, report
+            assert embedded == [] and sorted(collection) == list(range(50))
+            assert np.allclose(collection[45], [len("term 45"), 1.0])
+            checkpoint.remove()
+
+            # 构建参数变化时不续建
+            assert not BuildCheckpoint.open(db_path, len(df), 2, {"source": "changed"}).resumed
+
+        print("✅ 索引构建检查点正常")
+        return True
+
+    except Exception as e:
+        print(f"❌ 索引构建检查点测试失败: {e}")
+        return False
+
+def test_micro_batcher():
+    """测试微批处理调度器的请求合并、批大小上限、结果分发和异常传递"""
+    print("\n🔍 测试微批处理调度器...")
+
+    try:
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from utils.micro_batcher import MicroBatcher
+
+        batches = []
+        release = threading.Event()
+
+        def run_batch(items):
+            release.wait(5)
+            batches.append(list(items))
+            if "bad" in items:
+                raise ValueError("bad input")
+            return [item.upper() for item in items]
+
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=200, name="test")
+        try:
+            # 第一批处理期间排队的请求合并处理，每批不超过 max_batch_size
+            futures = [batcher.submit(f"t{idx}") for idx in range(9)]
+            release.set()
+            assert [future.result(timeout=5) for future in futures] == [f"T{idx}" for idx in range(9)]
+            assert all(len(batch) <= 4 for batch in batches) and len(batches) < 9, batches
+
+            # 并发调用者各自拿到自己的结果
+            batches.clear()
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(batcher, ["a", "b", "c", "d"]))
+            assert results == ["A", "B", "C", "D"] and len(batches) < 4, batches
+
+            # 批处理失败时同批的所有请求都收到异常，调度器继续可用
+            failing = [batcher.submit("ok"), batcher.submit("bad")]
+            for future in failing:
+                try:
+                    future.result(timeout=5)
+                    raise AssertionError("batch error should propagate")
+                except ValueError:
+                    pass
+            assert batcher("next") == "NEXT"
+
+            stats = batcher.stats()
+            assert stats["errors"] == 1 and stats["items"] == 14, stats
+        finally:
+            batcher.close()
+
+        print(f"✅ 微批处理调度器正常: {stats['batch_size_histogram']}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 微批处理调度器测试失败: {e}")
+        return False
+
+def test_embedding_cache():
+    """测试查询向量缓存的 LRU 命中、SQLite 持久化、按模型隔离的缓存键，以及未命中时使用原始文本计算"""
+    print("\n🔍 测试查询向量缓存...")
+
+    try:
+        import tempfile
+        import numpy as np
+        from utils.embedding_cache import EmbeddingCache, CachedEmbeddings
+
+        class CountingEmbeddings:
+            """按文本长度生成向量并记录收到的文本"""
+            def __init__(self, scale):
+                self.scale = scale
+                self.seen = []
+
+            def embed_query(self, text):
+                self.seen.append(text)
+                return [len(text) * self.scale, 1.0]
+
+            def embed_documents(self, texts):
+                return [self.embed_query(text) for text in texts]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            disk_path = os.path.join(tmp_dir, "embeddings.sqlite")
+            model_a = CountingEmbeddings(1.0)
+            cached_a = CachedEmbeddings(model_a, "model-a", EmbeddingCache(memory_size=2, disk_path=disk_path))
+
+            # 全角文本规范化后作为缓存键，但交给模型的是原始文本
+            assert cached_a.embed_query("ＡＢＳ") == [3.0, 1.0] and model_a.seen == ["ＡＢＳ"]
+            assert cached_a.embed_query("ABS") == [3.0, 1.0] and model_a.seen == ["ＡＢＳ"]
+            assert cached_a.cache.stats()["memory_hits"] == 1
+
+            # 批量查询只计算未命中的文本，重复文本只计算一次
+            vectors = cached_a.embed_documents(["bond", "ABS", "bond  ", "swap"])
+            assert vectors == [[4.0, 1.0], [3.0, 1.0], [4.0, 1.0], [4.0, 1.0]]
+            assert model_a.seen == ["ＡＢＳ", "bond", "swap"], model_a.seen
+
+            # 内存 LRU 容量为 2，被淘汰的向量从 SQLite 读回
+            assert len(cached_a.cache._memory) == 2
+            stats_before = cached_a.cache.stats()
+            assert cached_a.embed_query("ABS") == [3.0, 1.0]
+            assert cached_a.cache.stats()["disk_hits"] == stats_before["disk_hits"] + 1
+
+            # 新的缓存实例（相当于进程重启）直接从 SQLite 命中，向量为 float32
+            reopened = EmbeddingCache(memory_size=2, disk_path=disk_path)
+            vector = reopened.get_many("model-a", ["swap"])[0]
+            assert vector.dtype == np.float32 and vector.tolist() == [4.0, 1.0]
+
+            # 相同文本在不同模型下不共享缓存
+            model_b = CountingEmbeddings(10.0)
+            cached_b = CachedEmbeddings(model_b, "model-b", reopened)
+            assert cached_b.embed_query("swap") == [40.0, 1.0] and model_b.seen == ["swap"]
+            assert reopened.get_many("model-a", ["swap"])[0].tolist() == [4.0, 1.0]
+            stats = reopened.stats()
+            assert stats["disk_entries"] == 4, stats
+
+        print(f"✅ 查询向量缓存正常: {stats['disk_entries']} 条磁盘缓存")
+        return True
+
+    except Exception as e:
+        print(f"❌ 查询向量缓存测试失败: {e}")
+        return False
+
+def test_long_document_ner():
+    """用分词器和模型的替代实现测试长文档滑动窗口：窗口边界、重叠、实体位置映射和跨窗口去重"""
+    print("\n🔍 测试长文档滑动窗口实体识别...")
+
+    try:
+        import re
+        import threading
+        from services import ner_service as ner_module
+        from services.ner_service import NERService
+
+        class StandInTokenizer:
+            """单词和标点各为一个 token，"ACME-Bank" 切分为相连的三个 token"""
+            model_max_length = 512
+
+            def num_special_tokens_to_add(self):
+                return 2
+
+            def __call__(self, text, **kwargs):
+                return {"offset_mapping": [match.span() for match in re.finditer(r"\w+|[^\w\s]", text)]}
+
+        class StandInPipe:
+            """把每个 "ACME" 或 "ACME-Bank" 识别为 ORG，位置相对于输入文本"""
+            tokenizer = StandInTokenizer()
+
+            def __init__(self):
+                self.inputs = []
+
+            def __call__(self, texts, batch_size=None):
+                self.inputs.extend(texts)
+                return [[{"entity_group": "ORG", "word": match.group(), "start": match.start(), "end": match.end(),
+                          "score": 0.9} for match in re.finditer(r"ACME(-Bank)?", text)] for text in texts]
+
+        words = []
+        for idx in range(60):
+            words.append("ACME-Bank" if idx % 7 == 3 else "ACME" if idx % 11 == 5 else f"word{idx}")
+        text = " ".join(words)
+        expected = [(match.start(), match.end(), match.group()) for match in re.finditer(r"ACME(-Bank)?", text)]
+
+        ner = NERService.__new__(NERService)
+        ner.pipe = StandInPipe()
+        ner._pipe_lock = threading.Lock()
+        ner.batcher = None
+
+        original = dict(ner_module.LONG_DOCUMENT_NER_CONFIG)
+        ner_module.LONG_DOCUMENT_NER_CONFIG.update({"enabled": True, "window_tokens": 8, "overlap_tokens": 3,
+                                                    "batch_size": 2})
+        try:
+            windows = ner._split_windows(text)
+            assert windows[0][0] == 0 and windows[-1][1] == len(text) and len(windows) > 5, windows
+            tokenizer = StandInTokenizer()
+            for (start, end), (next_start, _) in zip(windows, windows[1:]):
+                # 相邻窗口重叠，窗口边界不落在 "ACME-Bank" 内部
+                assert next_start < end and text[next_start - 1] == " " and text[end:end + 1] in ("", " ")
+            assert all(len(tokenizer(text[start:end])["offset_mapping"]) <= 8 for start, end in windows)
+
+            types = {"allFinancialTerms": True}
+            result = ner.process(text, {}, types)
+            assert ner.pipe.inputs == [text[start:end] for start, end in windows]
+            # 重叠区域中的实体被多个窗口识别，合并后只保留一个
+            assert sum(len(entities) for entities in ner.pipe(ner.pipe.inputs)) > len(expected)
+            found = [(entity["start"], entity["end"], entity["word"]) for entity in result["entities"]]
+            assert found == expected, found
+            assert all(text[start:end] == word for start, end, word in found)
+
+            streamed = [(entity["start"], entity["end"], entity["word"])
+                        for entity in ner.iter_long_document(text, {}, types)]
+            assert streamed == expected, streamed
+
+            # 未超过窗口长度的文本不切分
+            assert ner._split_windows("ACME word") is None
+        finally:
+            ner_module.LONG_DOCUMENT_NER_CONFIG.clear()
+            ner_module.LONG_DOCUMENT_NER_CONFIG.update(original)
+
+        print(f"✅ 长文档滑动窗口实体识别正常: {len(windows)} 个窗口, {len(found)} 个实体")
+        return True
+
+    except Exception as e:
+        print(f"❌ 长文档滑动窗口实体识别测试失败: {e}")
+        return False
+
+def test_std_batch_endpoint():
+    """用替代的标准化函数测试 /api/std/batch：JSON、NDJSON、multipart 三种请求格式和单个文档的错误隔离"""
+    print("\n🔍 测试批量标准化接口...")
+
+    try:
+        from fastapi.testclient import TestClient
+        import main
+
+        def standardize_stub(texts, options, embedding_options):
+            """整块中有 "boom" 时失败，逐个重试时只有该文档失败"""
+            if "boom" in texts:
+                raise RuntimeError("model failed")
+            return [{"text": text, "dbName": embedding_options.dbName} for text in texts]
+
+        def result_lines(response):
+            assert response.status_code == 200, response.text
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            return sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+
+        original = main.standardize_documents
+        main.standardize_documents = standardize_stub
+        try:
+            client = TestClient(main.app)
+
+            # JSON：字符串和对象文档混合，格式错误和处理失败的文档各自返回错误行
+            lines = result_lines(client.post("/api/std/batch", json={
+                "documents": ["bond yield", {"id": "d2", "text": "boom"}, 42, {"id": "d4", "text": "swap"}],
+                "embeddingOptions": {"dbName": "custom_db"}
+            }))
+            assert [line["status"] for line in lines] == ["success", "error", "error", "success"], lines
+            assert lines[0]["result"] == {"text": "bond yield", "dbName": "custom_db"}
+            assert lines[1]["id"] == "d2" and lines[1]["error"] == "model failed"
+            assert lines[3]["id"] == "d4" and lines[3]["result"]["text"] == "swap"
+
+            # NDJSON：跳过空行，无法解析的行返回错误行
+            body = '"bond"\n\n{"id": "x", "text": "swap"}\nnot json\n'
+            lines = result_lines(client.post("/api/std/batch", content=body.encode("utf-8"),
+                                             headers={"content-type": "application/x-ndjson"}))
+            assert [(line["index"], line["id"], line["status"]) for line in lines] == \
+                [(0, None, "success"), (1, "x", "success"), (2, None, "error")], lines
+
+            # multipart：JSONL 文件加 config 字段
+            lines = result_lines(client.post(
+                "/api/std/batch",
+                files={"file": ("docs.jsonl", b'{"id": "a", "text": "bond"}\n"swap"\n', "application/jsonl")},
+                data={"config": json.dumps({"embeddingOptions": {"dbName": "upload_db"}})}
+            ))
+            assert [line["result"] for line in lines] == [{"text": "bond", "dbName": "upload_db"},
+                                                          {"text": "swap", "dbName": "upload_db"}], lines
+
+            # 请求本身无法解析时返回 400
+            assert client.post("/api/std/batch", content=b"{", headers={"content-type": "application/json"}).status_code == 400
+            assert client.post("/api/std/batch", files={"other": ("x.txt", b"")}).status_code == 400
+        finally:
+            main.standardize_documents = original
+
+        print("✅ 批量标准化接口正常")
+        return True
+
+    except Exception as e:
+        print(f"❌ 批量标准化接口测试失败: {e}")
+        return False
+
+def test_std_batch_search():
+    """用替代的嵌入函数和 NumPy 索引测试批量检索：查询去重、按输入顺序返回、术语名称命中与向量检索的拆分"""
+    print("\n🔍 测试批量术语检索...")
+
+    try:
+        import tempfile
+        import numpy as np
+        from services.std_service import StdService
+        from utils.numpy_index import NumpyVectorIndex, save_index
+        from utils.term_catalog import TermLexicon
+
+        vocabulary = ["bond", "swap", "yield", "rate"]
+
+        class StandInEmbeddings:
+            """按词表计数生成向量，并记录每次调用的文本"""
+            def __init__(self):
+                self.calls = []
+
+            def _vector(self, text):
+                words = text.lower().split()
+                return [float(words.count(word)) + 0.01 for word in vocabulary]
+
+            def embed_query(self, text):
+                self.calls.append(("query", [text]))
+                return self._vector(text)
+
+            def embed_documents(self, texts):
+                self.calls.append(("documents", list(texts)))
+                return [self._vector(text) for text in texts]
+
+        terms = [
+            {"term_id": f"FIN_{idx:06d}", "term_name": name, "term_type": "FINTERM",
+             "domain": "Finance", "category": "Standard"}
+            for idx, name in enumerate(["Treasury Bond", "Swap Spread", "Yield Curve", "Interest Rate"])
+        ]
+        embeddings = StandInEmbeddings()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "financial_terms_test.db")
+            save_index(db_path, np.asarray([embeddings._vector(term["term_name"]) for term in terms]), terms, "test-model")
+
+            service = StdService.__new__(StdService)
+            service.embedding_func = embeddings
+            service.backend = "numpy"
+            service.index = NumpyVectorIndex(db_path)
+            service.lexicon = TermLexicon(terms)
+            service.bm25 = None
+            service.bm25_terms = []
+
+            queries = ["bond", "Yield Curve", "swap", "bond", "yield curve"]
+            embeddings.calls.clear()
+            results = service.search_similar_terms_batch(queries, limit=2)
+
+            # 术语名称命中的查询不计算向量，其余去重后一次批量计算
+            assert embeddings.calls == [("documents", ["bond", "swap"])], embeddings.calls
+            assert len(results) == len(queries) and results[0] == results[3]
+            assert [result[0]["term_id"] for result in results] == \
+                ["FIN_000000", "FIN_000002", "FIN_000001", "FIN_000000", "FIN_000002"]
+            assert [result[0]["match_type"] for result in results] == \
+                ["vector", "exact", "vector", "vector", "normalized"]
+            assert all(len(result) <= 2 for result in results)
+
+            # 与逐个查询的结果一致（批量矩阵乘法的得分只有浮点舍入差异）
+            for query, result in zip(queries, results):
+                single = service.search_similar_terms(query, limit=2)
+                assert [(hit["term_id"], hit["match_type"]) for hit in single] == \
+                    [(hit["term_id"], hit["match_type"]) for hit in result], query
+                assert all(abs(a["distance"] - b["distance"]) < 1e-5 for a, b in zip(single, result))
+            assert service.search_similar_terms_batch([]) == []
+
+        print("✅ 批量术语检索正常")
+        return True
+
+    except Exception as e:
+        print(f"❌ 批量术语检索测试失败: {e}")
+        return False
+
 def test_api_endpoints():
     """测试API端点"""
     print("\n🔍 测试API端点...")
@@ -167,6 +956,21 @@ def main():
         ("后端服务测试", test_backend_services),
         ("前端文件测试", test_frontend_files),
         ("示例测试", run_sample_test),
+        ("ONNX NER 一致性测试", test_onnx_ner_parity),
+        ("图数据库同义词批量获取测试", test_graph_synonym_fetch),
+        ("离线同义词快照测试", test_synonym_snapshot),
+        ("标准化服务注册表测试", test_std_registry),
+        ("NumPy 索引与压缩重排测试", test_numpy_index_rescoring),
+        ("术语快速匹配测试", test_term_lexicon),
+        ("BM25 与 RRF 融合测试", test_bm25_fusion),
+        ("接口响应缓存测试", test_response_cache),
+        ("增量同步计划测试", test_index_sync_plan),
+        ("索引构建检查点测试", test_build_checkpoint),
+        ("微批处理调度器测试", test_micro_batcher),
+        ("查询向量缓存测试", test_embedding_cache),
+        ("长文档滑动窗口实体识别测试", test_long_document_ner),
+        ("批量标准化接口测试", test_std_batch_endpoint),
+        ("批量术语检索测试", test_std_batch_search),
         # ("API端点测试", test_api_endpoints),  # 需要服务器运行
     ]
     